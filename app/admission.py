@@ -0,0 +1,134 @@
+"""Admission control: a bounded in-flight limit and wait queue in front of the LLM stage."""
+
+import asyncio
+import logging
+import math
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Weight of the latest request in the moving average of service time
+_EWMA_ALPHA = 0.2
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed instead of queued."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Lets at most ``max_in_flight`` requests into the LLM stage at once.
+
+    Further requests wait in a FIFO queue of at most ``max_queue`` entries.
+    A request is shed with ``Overloaded`` when the queue is full or when its
+    estimated wait (queue position times the moving average of service time)
+    exceeds ``slo_seconds``; a request that was admitted to the queue but is
+    still waiting after ``slo_seconds`` is shed as well. A ``max_in_flight``
+    of 0 disables admission control.
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int = 64, slo_seconds: float = 10.0):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.slo_seconds = slo_seconds
+        self._semaphore = asyncio.Semaphore(max(1, max_in_flight))
+        self._in_flight = 0
+        self._waiting = 0
+        self._avg_service_seconds: Optional[float] = None
+        self._avg_wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+        self._counters = {"admitted": 0, "rejected": 0, "timed_out": 0}
+
+    @property
+    def enabled(self) -> bool:
+        """Whether requests are limited at all."""
+        return self.max_in_flight > 0
+
+    def estimated_wait(self) -> float:
+        """Seconds a request arriving now is expected to wait for a slot."""
+        if self._in_flight < self.max_in_flight or self._avg_service_seconds is None:
+            return 0.0
+        # Slots free up max_in_flight at a time, roughly every average service time
+        return math.ceil((self._waiting + 1) / self.max_in_flight) * self._avg_service_seconds
+
+    async def acquire(self) -> float:
+        """Wait for a slot and return the admission time, or raise ``Overloaded``."""
+        if not self.enabled:
+            return time.monotonic()
+
+        queued_at = time.monotonic()
+        if self._semaphore.locked():
+            self._shed_if_overloaded()
+            self._waiting += 1
+            acquired = False
+            try:
+                # Acquired in this task (unlike wait_for, which wraps it in another
+                # task and can drop a slot granted just as the wait is cancelled)
+                async with asyncio.timeout(self.slo_seconds):
+                    await self._semaphore.acquire()
+                    acquired = True
+            except TimeoutError:
+                if acquired:
+                    self._semaphore.release()
+                self._counters["timed_out"] += 1
+                raise Overloaded("Server is overloaded. Please try again later.", retry_after=self._retry_after())
+            finally:
+                self._waiting -= 1
+        else:
+            await self._semaphore.acquire()
+
+        admitted_at = time.monotonic()
+        self._in_flight += 1
+        self._counters["admitted"] += 1
+        waited = admitted_at - queued_at
+        self._avg_wait_seconds += _EWMA_ALPHA * (waited - self._avg_wait_seconds)
+        self._max_wait_seconds = max(self._max_wait_seconds, waited)
+        return admitted_at
+
+    def release(self, admitted_at: float) -> None:
+        """Free the slot taken at ``admitted_at`` and record the service time."""
+        if not self.enabled:
+            return
+
+        service = time.monotonic() - admitted_at
+        if self._avg_service_seconds is None:
+            self._avg_service_seconds = service
+        else:
+            self._avg_service_seconds += _EWMA_ALPHA * (service - self._avg_service_seconds)
+        self._in_flight -= 1
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth, wait times and counters."""
+        return {
+            "enabled": self.enabled,
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "slo_seconds": self.slo_seconds,
+            "in_flight": self._in_flight,
+            "queue_depth": self._waiting,
+            "estimated_wait_seconds": round(self.estimated_wait(), 3),
+            "avg_wait_seconds": round(self._avg_wait_seconds, 3),
+            "max_wait_seconds": round(self._max_wait_seconds, 3),
+            "avg_service_seconds": round(self._avg_service_seconds or 0.0, 3),
+            **self._counters
+        }
+
+    def _shed_if_overloaded(self) -> None:
+        """Raise ``Overloaded`` if a request arriving now should not be queued."""
+        if self._waiting >= self.max_queue:
+            self._counters["rejected"] += 1
+            raise Overloaded("Server is overloaded. Please try again later.", retry_after=self._retry_after())
+
+        estimate = self.estimated_wait()
+        if estimate > self.slo_seconds:
+            self._counters["rejected"] += 1
+            raise Overloaded("Server is overloaded. Please try again later.", retry_after=estimate)
+
+    def _retry_after(self) -> float:
+        return max(1.0, self.estimated_wait())
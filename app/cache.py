@@ -0,0 +1,157 @@
+"""In-process result caching with LRU and TTL eviction."""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with per-entry TTL and a memory ceiling.
+
+    Entries are evicted least-recently-used first whenever the entry count or
+    the estimated total size exceeds its limit; expired entries are dropped
+    lazily on access.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, max_bytes: int = 0):
+        """Initialize the cache; a ``max_bytes`` of 0 disables the size ceiling."""
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[float, int, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, size, value = entry
+            if self.ttl_seconds > 0 and time.monotonic() >= expires_at:
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, size: int = 0) -> None:
+        """Store a value with its estimated size in bytes."""
+        if self.max_bytes and size > self.max_bytes:
+            logger.debug(f"Not caching entry of {size} bytes (ceiling {self.max_bytes})")
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, size, value)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or (self.max_bytes and self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        """Remove an entry if present."""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return occupancy and hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+def normalize_prompt(user_prompt: str) -> str:
+    """Normalize a prompt for cache keying (case and whitespace insensitive)."""
+    return " ".join(user_prompt.lower().split())
+
+
+def fingerprint_table(table_data: List[Dict[str, Any]]) -> str:
+    """Return a stable hash of table data, independent of key order."""
+    canonical = json.dumps(table_data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache(TTLCache):
+    """Cache of processed responses keyed by prompt, table and template version."""
+
+    @staticmethod
+    def make_key(user_prompt: str, table_data: List[Dict[str, Any]], template_version: str) -> str:
+        """Build the cache key for a request."""
+        raw = f"{template_version}\x00{normalize_prompt(user_prompt)}\x00{fingerprint_table(table_data)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get_response(self, key: str) -> Optional[Tuple[str, List[Dict[str, Any]]]]:
+        """Return a cached (ai_message, table_data) pair."""
+        return self.get(key)
+
+    def set_response(self, key: str, ai_message: str, table_data: List[Dict[str, Any]]) -> None:
+        """Cache an (ai_message, table_data) pair, sized by its JSON encoding."""
+        size = len(ai_message) + len(json.dumps(table_data, separators=(",", ":"), default=str))
+        self.set(key, (ai_message, table_data), size=size)
+
+
+def fingerprint_schema(schema: Dict[str, str]) -> str:
+    """Return a stable hash of a table schema (field path -> type), independent of column order."""
+    canonical = json.dumps(sorted(schema.items()), separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class PlanCache(TTLCache):
+    """
+    Cache of generated table programs keyed by prompt, table schema and program version.
+
+    Declined requests are cached too (with a None program), so tables of a
+    known shape skip the planning call whichever way it went.
+    """
+
+    @staticmethod
+    def make_key(user_prompt: str, schema: Dict[str, str], program_version: str) -> str:
+        """Build the cache key for a prompt against tables of ``schema``."""
+        raw = f"{program_version}\x00{normalize_prompt(user_prompt)}\x00{fingerprint_schema(schema)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get_plan(self, key: str) -> Optional[Tuple[str, Optional[Dict[str, Any]]]]:
+        """Return a cached (explanation, program) pair; the program is None for declined requests."""
+        return self.get(key)
+
+    def set_plan(self, key: str, explanation: str, program: Optional[Dict[str, Any]]) -> None:
+        """Cache an (explanation, program) pair, sized by its JSON encoding."""
+        size = len(explanation) + len(json.dumps(program, separators=(",", ":"), default=str))
+        self.set(key, (explanation, program), size=size)
@@ -0,0 +1,142 @@
+"""Chunked concurrent fan-out of table rows across LLM calls."""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+Rows = List[Dict[str, Any]]
+ChunkWorker = Callable[[Rows], Awaitable[Tuple[str, Rows]]]
+
+# Error of a chunk whose result rows cannot be matched to its input rows
+ROW_COUNT_MISMATCH = "row count mismatch"
+
+
+class ChunkResult:
+    """Outcome of processing one chunk of rows."""
+
+    __slots__ = ("index", "offset", "rows", "explanation", "error")
+
+    def __init__(self, index: int, offset: int, rows: Rows, explanation: str = "", error: Optional[str] = None):
+        self.index = index
+        self.offset = offset
+        self.rows = rows
+        self.explanation = explanation
+        self.error = error
+
+
+def chunk_rows(rows: Rows, chunk_size: int) -> List[Rows]:
+    """Split rows into consecutive chunks of at most ``chunk_size`` rows."""
+    if chunk_size <= 0 or len(rows) <= chunk_size:
+        return [rows]
+    return [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+
+
+async def _run_chunk(
+    index: int,
+    offset: int,
+    chunk: Rows,
+    worker: ChunkWorker,
+    semaphore: asyncio.Semaphore,
+    timeout: Optional[float],
+    abort_on: Tuple[Type[BaseException], ...] = (),
+    match_rows: bool = True
+) -> ChunkResult:
+    """
+    Run the worker on a single chunk, keeping the original rows on failure.
+
+    With ``match_rows``, returning a different number of rows than the chunk
+    holds counts as a failure, since results are matched to input rows by
+    position.
+    """
+    async with semaphore:
+        try:
+            explanation, rows = await asyncio.wait_for(worker(chunk), timeout=timeout)
+            if match_rows and len(rows) != len(chunk):
+                logger.warning(f"Chunk {index} returned {len(rows)} row(s) for {len(chunk)}")
+                return ChunkResult(index, offset, chunk, error=ROW_COUNT_MISMATCH)
+            return ChunkResult(index, offset, rows, explanation)
+        except abort_on:
+            raise
+        except asyncio.TimeoutError:
+            logger.warning(f"Chunk {index} ({len(chunk)} rows) timed out after {timeout}s")
+            return ChunkResult(index, offset, chunk, error="timeout")
+        except Exception as e:
+            logger.error(f"Chunk {index} ({len(chunk)} rows) failed: {e}")
+            return ChunkResult(index, offset, chunk, error=str(e))
+
+
+def _chunk_tasks(
+    rows: Rows,
+    worker: ChunkWorker,
+    chunk_size: int,
+    max_concurrency: int,
+    timeout: Optional[float],
+    abort_on: Tuple[Type[BaseException], ...] = (),
+    match_rows: bool = True
+) -> List[Awaitable[ChunkResult]]:
+    """Build one bounded coroutine per chunk of rows."""
+    chunks = chunk_rows(rows, chunk_size)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    timeout = timeout if timeout and timeout > 0 else None
+
+    tasks = []
+    offset = 0
+    for index, chunk in enumerate(chunks):
+        tasks.append(_run_chunk(index, offset, chunk, worker, semaphore, timeout, abort_on, match_rows))
+        offset += len(chunk)
+
+    logger.info(f"Fanning out {len(rows)} rows across {len(chunks)} chunk(s)")
+    return tasks
+
+
+async def fan_out(
+    rows: Rows,
+    worker: ChunkWorker,
+    chunk_size: int,
+    max_concurrency: int,
+    timeout: Optional[float] = None,
+    abort_on: Tuple[Type[BaseException], ...] = (),
+    match_rows: bool = True
+) -> List[ChunkResult]:
+    """
+    Process rows in bounded chunks concurrently.
+
+    At most ``max_concurrency`` chunks are in flight at once. Results are
+    returned in the original chunk order regardless of completion order.
+    A chunk failing with one of the ``abort_on`` exceptions cancels the
+    remaining chunks and the exception is raised instead. Without
+    ``match_rows`` a chunk may return any number of rows (a filter, say).
+    """
+    tasks = [
+        asyncio.ensure_future(task)
+        for task in _chunk_tasks(rows, worker, chunk_size, max_concurrency, timeout, abort_on, match_rows)
+    ]
+    try:
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+def merge_chunk_results(results: List[ChunkResult]) -> Tuple[str, Rows]:
+    """Reassemble chunk results into a single explanation and row list."""
+    merged_rows: Rows = []
+    explanations: List[str] = []
+    failed = 0
+
+    for result in sorted(results, key=lambda r: r.index):
+        merged_rows.extend(result.rows)
+        if result.error:
+            failed += 1
+        elif result.explanation and result.explanation not in explanations:
+            explanations.append(result.explanation)
+
+    explanation = " ".join(explanations)
+    if failed:
+        note = f"{failed} of {len(results)} chunk(s) could not be processed and were returned unchanged."
+        explanation = f"{explanation} {note}".strip()
+
+    return explanation, merged_rows
@@ -0,0 +1,199 @@
+"""Deduplication of table values and rows before they are sent to the model."""
+
+import json
+import logging
+import re
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+from app.plan import describe_schema, get_field, set_field
+
+logger = logging.getLogger(__name__)
+
+Rows = List[Dict[str, Any]]
+FieldPath = Tuple[str, ...]
+
+_SCALAR_TYPES = {"string", "number", "boolean", "null"}
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Requests that reorder, drop or aggregate rows; their replies do not map one row to one row
+_NON_MAPPING_WORDS = {
+    "sort", "sorted", "sorting", "order", "ordered", "rank", "ranked", "ranking",
+    "filter", "filtered", "keep", "remove", "drop", "delete", "exclude", "only",
+    "top", "limit", "count", "group", "unique", "distinct", "dedupe", "deduplicate",
+    "duplicate", "reverse", "shuffle", "sum", "total", "average"
+}
+
+
+def _words(text: str) -> List[str]:
+    # Split snake_case, kebab-case and camelCase alike
+    return _WORD.findall(re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", text).lower())
+
+
+def _singular(word: str) -> str:
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+        return word[:-1]
+    return word
+
+
+def find_source_column(user_prompt: str, table_data: Rows) -> Optional[FieldPath]:
+    """
+    The one column a transformation request is about, if it names exactly one.
+
+    A table with a single scalar column is always about that column.
+    Otherwise a column counts as named when every word of its name appears
+    in the prompt (ignoring plurals); a column whose words are all part of
+    another named column's (``name`` inside ``company_name``) is not counted
+    separately. Returns None when no column, or more than one, is named.
+    """
+    schema = describe_schema(table_data)
+    columns = [
+        tuple(path.split("."))
+        for path, types in schema.items()
+        if set(types.split("|")) <= _SCALAR_TYPES
+    ]
+    if len(columns) == 1:
+        return columns[0]
+
+    prompt_words = {_singular(word) for word in _words(user_prompt)}
+    named: Dict[FieldPath, set] = {}
+    for path in columns:
+        column_words = {_singular(word) for word in _words(path[-1])}
+        if column_words and column_words <= prompt_words:
+            named[path] = column_words
+
+    candidates = [
+        path for path, column_words in named.items()
+        if not any(column_words < other for other_path, other in named.items() if other_path != path)
+    ]
+    return candidates[0] if len(candidates) == 1 else None
+
+
+def is_row_mapping(user_prompt: str) -> bool:
+    """
+    Whether a request looks like it maps each row to exactly one result row.
+
+    Conservative: any word suggesting sorting, filtering or aggregation
+    ("Sort by name", "Keep names starting with K") rules it out.
+    """
+    return not any(_singular(word) in _NON_MAPPING_WORDS for word in _words(user_prompt))
+
+
+def value_key(value: Any) -> str:
+    """Hashable identity of a cell value (``1`` and ``"1"`` stay distinct)."""
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def distinct_values(table_data: Rows, path: FieldPath) -> List[Any]:
+    """Distinct values of the column at ``path``, in order of first appearance."""
+    seen: Dict[str, Any] = {}
+    for row in table_data:
+        value = get_field(row, path)
+        seen.setdefault(value_key(value), value)
+    return list(seen.values())
+
+
+def derive_fields(column: str, values: List[Any], transformed: Rows) -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    The fields the model derived for each value, keyed by ``value_key``.
+
+    ``transformed`` holds the result row of each entry of ``values``, in the
+    same order (delta replies are already placed by ``_row``). A changed
+    value under ``column`` counts as a derived field, so rewrites such as
+    capitalization are kept. Values that got no derived fields are left
+    out. Returns None when the row count differs, i.e. the reply did not
+    map one value to one row.
+    """
+    if len(transformed) != len(values):
+        return None
+    fields_by_value: Dict[str, Dict[str, Any]] = {}
+    for value, row in zip(values, transformed):
+        if not isinstance(row, dict):
+            continue
+        fields = {
+            name: field for name, field in row.items()
+            if name != column or value_key(field) != value_key(value)
+        }
+        if fields:
+            fields_by_value.setdefault(value_key(value), fields)
+    return fields_by_value
+
+
+def broadcast_fields(table_data: Rows, path: FieldPath, fields_by_value: Dict[str, Dict[str, Any]]) -> Rows:
+    """
+    Add the fields derived for each distinct value to every row holding that value.
+
+    New fields are placed next to the source column, so nested columns get
+    nested results; a field named like the source column replaces its value.
+    Rows whose value has no fields are returned unchanged.
+    """
+    result: Rows = []
+    for row in table_data:
+        fields = fields_by_value.get(value_key(get_field(row, path)))
+        if fields:
+            for name, field in fields.items():
+                row = set_field(row, path[:-1] + (name,), field)
+        result.append(row)
+    return result
+
+
+def parse_ignored_fields(spec: str) -> FrozenSet[str]:
+    """Parse ``"id,timestamp"`` into the field names left out of row content keys."""
+    return frozenset(name.strip() for name in spec.split(",") if name.strip())
+
+
+def _without(value: Any, ignored: FrozenSet[str]) -> Any:
+    if isinstance(value, dict):
+        return {key: _without(nested, ignored) for key, nested in value.items() if key not in ignored}
+    return value
+
+
+def content_key(row: Dict[str, Any], ignored: FrozenSet[str] = frozenset()) -> str:
+    """Identity of a row's content, leaving out ``ignored`` fields at any nesting level."""
+    return value_key(_without(row, ignored))
+
+
+def group_rows(table_data: Rows, ignored: FrozenSet[str] = frozenset()) -> List[List[int]]:
+    """Indexes of rows with equal content, grouped in order of first appearance."""
+    groups: Dict[str, List[int]] = {}
+    for index, row in enumerate(table_data):
+        groups.setdefault(content_key(row, ignored), []).append(index)
+    return list(groups.values())
+
+
+def diff_fields(
+    original: Dict[str, Any],
+    transformed: Dict[str, Any],
+    ignored: FrozenSet[str] = frozenset()
+) -> Dict[str, Any]:
+    """
+    Fields ``transformed`` adds to or changes in ``original``, nested objects compared key by key.
+
+    ``ignored`` fields are left out at any nesting level: they differ between
+    rows grouped as duplicates, so one row's values must not be copied to the
+    others.
+    """
+    delta: Dict[str, Any] = {}
+    for key, value in transformed.items():
+        if key in ignored:
+            continue
+        if key not in original:
+            delta[key] = _without(value, ignored)
+        elif isinstance(value, dict) and isinstance(original[key], dict):
+            nested = diff_fields(original[key], value, ignored)
+            if nested:
+                delta[key] = nested
+        elif original[key] != value:
+            delta[key] = _without(value, ignored)
+    return delta
+
+
+def merge_fields(row: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of ``row`` with a ``diff_fields`` delta applied."""
+    merged = dict(row)
+    for key, value in delta.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_fields(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
@@ -0,0 +1,56 @@
+"""Merging of delta-only LLM output (new fields keyed by row index) into the original rows."""
+
+import logging
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Field the model uses to say which input row a delta belongs to
+ROW_ID_FIELD = "_row"
+
+
+def merge_delta_rows(
+    original_rows: List[Dict[str, Any]],
+    deltas: List[Any]
+) -> Tuple[List[Dict[str, Any]], List[int], List[Any]]:
+    """
+    Merge per-row deltas into the original rows.
+
+    Returns the merged rows together with the indexes of rows the model did
+    not return (kept unchanged) and the row ids of deltas that did not match
+    exactly one input row (unknown, duplicate or malformed; dropped).
+    """
+    fields_by_index: Dict[int, Dict[str, Any]] = {}
+    extra: List[Any] = []
+
+    for delta in deltas:
+        if not isinstance(delta, dict):
+            extra.append(delta)
+            continue
+
+        row_id = delta.get(ROW_ID_FIELD)
+        try:
+            index = int(row_id)
+        except (TypeError, ValueError):
+            extra.append(row_id)
+            continue
+
+        if not 0 <= index < len(original_rows) or index in fields_by_index:
+            extra.append(row_id)
+            continue
+
+        fields_by_index[index] = {key: value for key, value in delta.items() if key != ROW_ID_FIELD}
+
+    merged: List[Dict[str, Any]] = []
+    missing: List[int] = []
+    for index, row in enumerate(original_rows):
+        fields = fields_by_index.get(index)
+        if fields is None:
+            missing.append(index)
+            merged.append(row)
+        else:
+            merged.append({**row, **fields})
+
+    if missing or extra:
+        logger.warning(f"Delta merge: {len(missing)} missing row(s), {len(extra)} extra row(s)")
+    return merged, missing, extra
@@ -0,0 +1,100 @@
+"""FastAPI dependencies shared by the routers."""
+
+import logging
+from typing import Awaitable, Callable, Optional
+from fastapi import Depends, HTTPException, Request, status
+from app.admission import AdmissionController
+from app.cache import PlanCache, ResponseCache
+from app.governor import UpstreamGovernor
+from app.intent import LocalIntentClassifier
+from app.llm_pool import LLMClientPool
+from app.llm_service import LLMService
+from app.quotas import TokenQuotaTracker
+from app.scheduler import FairScheduler
+from app.value_store import ValueResultStore
+
+logger = logging.getLogger(__name__)
+
+
+def get_llm_pool(request: Request) -> LLMClientPool:
+    """Return the LLM client pool created at application startup."""
+    return request.app.state.llm_pool
+
+
+def get_intent_classifier(request: Request) -> Optional[LocalIntentClassifier]:
+    """Return the local intent classifier built at startup, if any."""
+    return request.app.state.intent_classifier
+
+
+def get_upstream_governor(request: Request) -> UpstreamGovernor:
+    """Return the process-wide upstream call governor."""
+    return request.app.state.upstream_governor
+
+
+def get_fair_scheduler(request: Request) -> Optional[FairScheduler]:
+    """Return the process-wide fair scheduler of LLM calls, if enabled."""
+    return request.app.state.fair_scheduler
+
+
+def get_plan_cache(request: Request) -> Optional[PlanCache]:
+    """Return the process-wide cache of table programs, if enabled."""
+    return request.app.state.plan_cache
+
+
+def get_value_store(request: Request) -> Optional[ValueResultStore]:
+    """Return the persistent per-value result store, if configured."""
+    return request.app.state.value_store
+
+
+LLMServiceFactory = Callable[[str], Awaitable[LLMService]]
+
+
+def get_llm_service_factory(
+    pool: LLMClientPool = Depends(get_llm_pool),
+    intent_classifier: Optional[LocalIntentClassifier] = Depends(get_intent_classifier),
+    governor: UpstreamGovernor = Depends(get_upstream_governor),
+    scheduler: Optional[FairScheduler] = Depends(get_fair_scheduler),
+    plan_cache: Optional[PlanCache] = Depends(get_plan_cache),
+    value_store: Optional[ValueResultStore] = Depends(get_value_store)
+) -> LLMServiceFactory:
+    """
+    Return a builder of the per-request LLM service, scheduled under the caller's API key.
+
+    Routes call it once the key is verified, so rejected requests never take
+    a pooled client.
+    """
+    async def build(client_key: str) -> LLMService:
+        try:
+            llm = await pool.acquire()
+        except ValueError as e:
+            logger.error(f"Could not acquire LLM client: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="LLM service is not configured"
+            )
+        return LLMService(
+            llm=llm,
+            intent_classifier=intent_classifier,
+            governor=governor,
+            scheduler=scheduler,
+            client_key=client_key,
+            plan_cache=plan_cache,
+            value_store=value_store
+        )
+
+    return build
+
+
+def get_response_cache(request: Request) -> ResponseCache:
+    """Return the process-wide response cache."""
+    return request.app.state.response_cache
+
+
+def get_token_quota(request: Request) -> TokenQuotaTracker:
+    """Return the process-wide per-key token quota tracker."""
+    return request.app.state.token_quota
+
+
+def get_admission_controller(request: Request) -> AdmissionController:
+    """Return the process-wide admission controller for the LLM stage."""
+    return request.app.state.admission
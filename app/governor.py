@@ -0,0 +1,201 @@
+"""Process-wide pacing of upstream LLM calls against the provider's RPM/TPM limits."""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, TypeVar
+from app.timing import stage
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Substrings of upstream errors that mean "slow down"
+_RATE_LIMIT_MARKERS = ("429", "resource_exhausted", "resource has been exhausted", "rate limit", "quota exceeded")
+
+
+class UpstreamBusy(Exception):
+    """Raised when an upstream call cannot be scheduled within the allowed wait."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_upstream_rate_limit(error: Exception) -> bool:
+    """Whether an exception raised by the LLM client is the provider pushing back."""
+    for attribute in ("status_code", "code"):
+        if getattr(error, attribute, None) == 429:
+            return True
+    if type(error).__name__ in ("ResourceExhausted", "RateLimitError", "TooManyRequests"):
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in _RATE_LIMIT_MARKERS)
+
+
+class UpstreamGovernor:
+    """
+    Paces upstream calls so they stay within ``rpm_limit`` requests and
+    ``tpm_limit`` tokens per ``window_seconds``.
+
+    Admissions are recorded in a sliding log, so the limits hold over every
+    window rather than on average. Callers queue in FIFO order and wait for
+    capacity for at most ``max_wait_seconds``; if the wait would be longer,
+    ``UpstreamBusy`` is raised with a retry hint. When the provider answers
+    with a rate limit error anyway, all callers pause for a jittered
+    exponential backoff and the call is retried up to ``max_retries`` times.
+    A limit of 0 disables that check.
+    """
+
+    def __init__(
+        self,
+        rpm_limit: int = 0,
+        tpm_limit: int = 0,
+        window_seconds: float = 60.0,
+        max_wait_seconds: float = 10.0,
+        max_retries: int = 3,
+        backoff_base_seconds: float = 1.0,
+        backoff_max_seconds: float = 30.0
+    ):
+        self.rpm_limit = rpm_limit
+        self.tpm_limit = tpm_limit
+        self.window_seconds = window_seconds
+        self.max_wait_seconds = max_wait_seconds
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        # (timestamp, tokens) of calls admitted within the window
+        self._log: deque = deque()
+        self._window_tokens = 0
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+        self._counters = {"admitted": 0, "delayed": 0, "rejected": 0, "throttled": 0, "retries": 0}
+
+    async def acquire(self, tokens: int) -> None:
+        """Wait until a call of ``tokens`` fits the limits, or raise ``UpstreamBusy``."""
+        deadline = time.monotonic() + self.max_wait_seconds
+        if self.tpm_limit > 0:
+            # A single call larger than the whole budget is admitted into an empty window
+            tokens = min(tokens, self.tpm_limit)
+
+        acquired = False
+        try:
+            # Acquired in this task; wait_for would run it in another one, which
+            # can leave the lock held if the wait ends just as it is granted
+            async with asyncio.timeout(self.max_wait_seconds):
+                await self._lock.acquire()
+                acquired = True
+        except TimeoutError:
+            if acquired:
+                self._lock.release()
+            self._counters["rejected"] += 1
+            raise UpstreamBusy("Upstream capacity exhausted. Please try again later.", retry_after=self.max_wait_seconds)
+
+        try:
+            delayed = False
+            while True:
+                now = time.monotonic()
+                wait = self._wait_time(tokens, now)
+                if wait <= 0:
+                    break
+                if now + wait > deadline:
+                    self._counters["rejected"] += 1
+                    raise UpstreamBusy("Upstream capacity exhausted. Please try again later.", retry_after=wait)
+                delayed = True
+                await asyncio.sleep(wait)
+
+            self._log.append((now, tokens))
+            self._window_tokens += tokens
+            self._counters["admitted"] += 1
+            if delayed:
+                self._counters["delayed"] += 1
+        finally:
+            self._lock.release()
+
+    async def call(self, invoke: Callable[[], Awaitable[T]], tokens: int) -> T:
+        """Run ``invoke`` once capacity is available, retrying upstream rate limit errors."""
+        attempt = 0
+        while True:
+            with stage("queue"):
+                await self.acquire(tokens)
+            try:
+                return await invoke()
+            except Exception as e:
+                self._backoff_or_raise(e, attempt)
+                attempt += 1
+
+    async def stream(self, open_stream: Callable[[], AsyncIterator[T]], tokens: int) -> AsyncIterator[T]:
+        """
+        Yield from ``open_stream`` once capacity is available.
+
+        Rate limit errors are retried only until the first item has been
+        yielded; after that the partial output cannot be taken back.
+        """
+        attempt = 0
+        while True:
+            with stage("queue"):
+                await self.acquire(tokens)
+            started = False
+            try:
+                async for item in open_stream():
+                    started = True
+                    yield item
+                return
+            except Exception as e:
+                if started:
+                    raise
+                self._backoff_or_raise(e, attempt)
+                attempt += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return current window usage and counters."""
+        self._prune(time.monotonic())
+        return {
+            "rpm_limit": self.rpm_limit,
+            "tpm_limit": self.tpm_limit,
+            "window_requests": len(self._log),
+            "window_tokens": self._window_tokens,
+            **self._counters
+        }
+
+    def _backoff_or_raise(self, error: Exception, attempt: int) -> None:
+        """Pause all callers after an upstream rate limit error, or re-raise anything else."""
+        if not is_upstream_rate_limit(error):
+            raise error
+
+        self._counters["throttled"] += 1
+        # Full jitter keeps retries from many callers from arriving in lockstep
+        delay = random.uniform(0, min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** attempt))
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        if attempt >= self.max_retries:
+            raise UpstreamBusy("Upstream rate limit reached. Please try again later.", retry_after=max(delay, 1.0)) from error
+
+        logger.warning(f"Upstream rate limited (attempt {attempt + 1}), backing off {delay:.2f}s")
+        self._counters["retries"] += 1
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        """Seconds until a call of ``tokens`` fits every limit."""
+        self._prune(now)
+        wait = self._paused_until - now
+
+        log = self._log
+        if self.rpm_limit > 0 and len(log) >= self.rpm_limit:
+            wait = max(wait, log[len(log) - self.rpm_limit][0] + self.window_seconds - now)
+
+        if self.tpm_limit > 0:
+            excess = self._window_tokens + tokens - self.tpm_limit
+            for timestamp, entry_tokens in log:
+                if excess <= 0:
+                    break
+                excess -= entry_tokens
+                wait = max(wait, timestamp + self.window_seconds - now)
+        return wait
+
+    def _prune(self, now: float) -> None:
+        cutoff = now - self.window_seconds
+        log = self._log
+        while log and log[0][0] <= cutoff:
+            self._window_tokens -= log.popleft()[1]
+
@@ -0,0 +1,171 @@
+"""Local (in-process) intent classifiers used before falling back to the LLM."""
+
+import json
+import logging
+import math
+import os
+import re
+from abc import ABC, abstractmethod
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Keyword rules per intent category; multi-word phrases are matched as substrings
+DEFAULT_KEYWORD_RULES: Dict[str, List[str]] = {
+    "data_filtering": [
+        "filter", "only", "where", "exclude", "remove", "select", "keep", "find",
+        "greater than", "less than", "more than", "fewer than", "show me", "without"
+    ],
+    "data_transformation": [
+        "add", "categorize", "categorise", "classify", "convert", "format", "rename",
+        "create", "column", "field", "enrich", "map", "normalize", "label", "tag",
+        "extract", "translate", "nationality", "each"
+    ],
+    "data_analysis": [
+        "analyze", "analyse", "summarize", "summarise", "summary", "average", "mean",
+        "total", "count", "insight", "trend", "distribution", "statistics", "compare"
+    ]
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens of a prompt."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class LocalIntentClassifier(ABC):
+    """Base class for classifiers that run without a model call."""
+
+    @abstractmethod
+    def predict(self, user_prompt: str) -> Tuple[Optional[str], float]:
+        """Return the best intent and a confidence in [0, 1]."""
+
+
+class KeywordIntentClassifier(LocalIntentClassifier):
+    """Scores each category by how many of its keywords appear in the prompt."""
+
+    def __init__(self, categories: List[str], rules: Optional[Dict[str, List[str]]] = None):
+        rules = rules or DEFAULT_KEYWORD_RULES
+        self.rules = {category: rules.get(category, []) for category in categories}
+
+    def predict(self, user_prompt: str) -> Tuple[Optional[str], float]:
+        text = " ".join(tokenize(user_prompt))
+        words = set(text.split())
+
+        scores = {}
+        for category, keywords in self.rules.items():
+            scores[category] = sum(
+                1 for keyword in keywords
+                if (keyword in text if " " in keyword else keyword in words)
+            )
+
+        total = sum(scores.values())
+        if not total:
+            return None, 0.0
+
+        best = max(scores, key=scores.get)
+        return best, scores[best] / total
+
+
+class NaiveBayesIntentClassifier(LocalIntentClassifier):
+    """Multinomial naive Bayes over prompt tokens, trained from logged prompts."""
+
+    def __init__(self, categories: List[str]):
+        self.categories = list(categories)
+        self._class_counts: Counter = Counter()
+        self._token_counts: Dict[str, Counter] = defaultdict(Counter)
+        self._token_totals: Counter = Counter()
+        self._vocabulary: set = set()
+
+    def train(self, samples: Iterable[Tuple[str, str]]) -> int:
+        """Fit on (prompt, intent) pairs; returns the number of samples used."""
+        used = 0
+        for prompt, intent in samples:
+            if intent not in self.categories:
+                continue
+            tokens = tokenize(prompt)
+            self._class_counts[intent] += 1
+            self._token_counts[intent].update(tokens)
+            self._token_totals[intent] += len(tokens)
+            self._vocabulary.update(tokens)
+            used += 1
+        return used
+
+    def predict(self, user_prompt: str) -> Tuple[Optional[str], float]:
+        total_samples = sum(self._class_counts.values())
+        if not total_samples:
+            return None, 0.0
+
+        tokens = tokenize(user_prompt)
+        vocabulary_size = len(self._vocabulary) or 1
+        log_scores = {}
+        for category in self.categories:
+            class_count = self._class_counts[category]
+            if not class_count:
+                continue
+            score = math.log(class_count / total_samples)
+            denominator = self._token_totals[category] + vocabulary_size
+            counts = self._token_counts[category]
+            for token in tokens:
+                score += math.log((counts[token] + 1) / denominator)
+            log_scores[category] = score
+
+        # Softmax over log scores gives the posterior probability of the winner
+        peak = max(log_scores.values())
+        weights = {category: math.exp(score - peak) for category, score in log_scores.items()}
+        best = max(weights, key=weights.get)
+        return best, weights[best] / sum(weights.values())
+
+
+def load_training_samples(path: str) -> List[Tuple[str, str]]:
+    """Read (prompt, intent) pairs from a JSONL file of logged classifications."""
+    samples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+                samples.append((record["prompt"], record["intent"]))
+            except (ValueError, KeyError):
+                logger.warning(f"Skipping malformed intent training record: {line[:80]}")
+    return samples
+
+
+def log_classification(user_prompt: str, intent: str) -> None:
+    """Append an LLM classification to the training log, if one is configured."""
+    if not settings.INTENT_LOG_FILE:
+        return
+    try:
+        with open(settings.INTENT_LOG_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"prompt": user_prompt, "intent": intent}) + "\n")
+    except OSError as e:
+        logger.warning(f"Could not log intent classification: {e}")
+
+
+def build_intent_classifier() -> Optional[LocalIntentClassifier]:
+    """Create the local classifier selected by ``INTENT_CLASSIFIER``."""
+    kind = settings.INTENT_CLASSIFIER.lower()
+    categories = settings.INTENT_CATEGORIES
+
+    if kind == "keyword":
+        return KeywordIntentClassifier(categories)
+
+    if kind == "naive_bayes":
+        classifier = NaiveBayesIntentClassifier(categories)
+        path = settings.INTENT_TRAINING_FILE
+        if path and os.path.exists(path):
+            used = classifier.train(load_training_samples(path))
+            logger.info(f"Trained naive Bayes intent classifier on {used} sample(s)")
+        else:
+            logger.warning("INTENT_TRAINING_FILE not found - naive Bayes classifier is untrained")
+        return classifier
+
+    if kind not in ("", "none", "llm"):
+        logger.warning(f"Unknown INTENT_CLASSIFIER '{kind}', using the LLM only")
+    return None
@@ -0,0 +1,54 @@
+"""Single-pass extraction of the outermost JSON value from free-form LLM output."""
+
+import json
+import re
+from typing import Any, Tuple
+
+_OPENER_RE = re.compile(r"[{\[]")
+
+# A candidate that decodes this far before failing is a malformed payload, not stray prose
+_MAX_PROSE_PROBE = 256
+
+_decoder = json.JSONDecoder()
+
+
+def _is_payload(value: Any) -> bool:
+    """Objects and arrays of objects are payloads; stray prose like "[1]" is not."""
+    if isinstance(value, dict):
+        return True
+    return all(isinstance(item, dict) for item in value)
+
+
+def extract_json(text: str) -> Tuple[Any, int]:
+    """
+    Parse the outermost JSON object or array embedded in ``text``.
+
+    Candidate openers are located with a regex and decoded in place with the C
+    decoder, which matches brackets and strings while parsing, so the payload
+    is scanned and parsed in one pass and trailing prose is never read.
+    Brackets in leading prose or code fences fail to decode within a few
+    characters and are skipped, as a whole: decoding resumes where the failed
+    candidate broke off, so a truncated reply is never mistaken for the first
+    row nested inside it. Returns the parsed value and the index just
+    past it; raises ``ValueError`` when no JSON payload can be found.
+    """
+    pos = 0
+    search = _OPENER_RE.search
+
+    while True:
+        match = search(text, pos)
+        if match is None:
+            raise ValueError("No JSON object or array found in response")
+
+        start = match.start()
+        try:
+            value, end = _decoder.raw_decode(text, start)
+        except json.JSONDecodeError as e:
+            if e.pos - start > _MAX_PROSE_PROBE:
+                raise ValueError(f"Malformed JSON in response: {e}") from e
+            pos = max(e.pos, start + 1)
+            continue
+
+        if _is_payload(value):
+            return value, end
+        pos = end
@@ -0,0 +1,158 @@
+"""Incremental parsing of streamed LLM output into rows as soon as they close."""
+
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Start of the row array: a labelled data key, or a bare (optionally fenced) array
+_ARRAY_MARKER_RE = re.compile(r'(?:TRANSFORMED|FILTERED|ANALYZED)_DATA"?\s*:\s*\[')
+_BARE_ARRAY_RE = re.compile(r"\s*(?:```[A-Za-z]*\s*)?\[")
+_EXPLANATION_RE = re.compile(r'EXPLANATION"?\s*:\s*')
+
+_STRUCTURAL_RE = re.compile(r'[{}\[\]"]')
+_STRING_SPECIAL_RE = re.compile(r'["\\]')
+
+_decoder = json.JSONDecoder()
+
+
+class IncrementalRowParser:
+    """
+    Feed streamed text in; get each object of the data array back once it closes.
+
+    Consumed row text is discarded as parsing proceeds, so memory stays bounded
+    by the largest single row rather than the whole response. Text before and
+    after the array is kept so the explanation can be recovered at the end.
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0
+        self._head = ""
+        self._tail = ""
+        self._in_array = False
+        self._done = False
+        self._in_string = False
+        self._depth = 0
+        self._row_start: Optional[int] = None
+        self.errors = 0
+
+    @property
+    def found_array(self) -> bool:
+        """Whether the data array has been located in the stream."""
+        return self._in_array or self._done
+
+    @property
+    def text(self) -> str:
+        """Unconsumed text; the whole response if no data array was found."""
+        return self._head + self._buf + self._tail
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Add streamed text and return the rows completed by it."""
+        if self._done:
+            self._tail += text
+            return []
+
+        self._buf += text
+        if not self._in_array and not self._find_array():
+            return []
+        return self._scan()
+
+    def explanation(self) -> str:
+        """The explanation found around the data array, if any."""
+        surrounding = self._head + self._tail
+        match = _EXPLANATION_RE.search(surrounding)
+        if not match:
+            return ""
+
+        rest = surrounding[match.end():]
+        if rest.startswith('"'):
+            try:
+                return _decoder.raw_decode(rest)[0]
+            except ValueError:
+                pass
+        return rest.strip().rstrip("`}").strip()
+
+    def _find_array(self) -> bool:
+        match = _ARRAY_MARKER_RE.search(self._buf) or _BARE_ARRAY_RE.match(self._buf)
+        if not match:
+            return False
+
+        self._head = self._buf[:match.end()]
+        self._buf = self._buf[match.end():]
+        self._pos = 0
+        self._in_array = True
+        return True
+
+    def _scan(self) -> List[Dict[str, Any]]:
+        buf = self._buf
+        pos = self._pos
+        rows: List[Dict[str, Any]] = []
+
+        while pos < len(buf):
+            if self._in_string:
+                match = _STRING_SPECIAL_RE.search(buf, pos)
+                if match is None:
+                    pos = len(buf)
+                    break
+                index = match.start()
+                if buf[index] == "\\":
+                    if index + 1 >= len(buf):
+                        # Wait for the escaped character to arrive
+                        pos = index
+                        break
+                    pos = index + 2
+                    continue
+                self._in_string = False
+                pos = index + 1
+                continue
+
+            match = _STRUCTURAL_RE.search(buf, pos)
+            if match is None:
+                pos = len(buf)
+                break
+
+            index = match.start()
+            char = buf[index]
+            pos = index + 1
+
+            if char == '"':
+                self._in_string = True
+            elif char == "{" or char == "[":
+                if self._depth == 0:
+                    self._row_start = index
+                self._depth += 1
+            elif self._depth == 0:
+                if char == "]":
+                    # End of the data array; keep the rest for the explanation
+                    self._in_array = False
+                    self._done = True
+                    self._tail = buf[pos:]
+                    self._buf = ""
+                    self._pos = 0
+                    return rows
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(buf[self._row_start:pos], rows)
+                    self._row_start = None
+
+        # Drop everything that has been consumed
+        keep_from = self._row_start if self._row_start is not None else pos
+        self._buf = buf[keep_from:]
+        self._pos = pos - keep_from
+        if self._row_start is not None:
+            self._row_start = 0
+        return rows
+
+    def _emit(self, row_text: str, rows: List[Dict[str, Any]]) -> None:
+        try:
+            row = json.loads(row_text)
+        except ValueError as e:
+            logger.warning(f"Skipping malformed streamed row: {e}")
+            self.errors += 1
+            return
+        if isinstance(row, dict):
+            rows.append(row)
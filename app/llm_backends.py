@@ -0,0 +1,209 @@
+"""LLM backend interface and a deterministic local fake for offline benchmarking."""
+
+import asyncio
+import ast
+import hashlib
+import json
+import logging
+import math
+import random
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+from app.table_encoding import decode_table
+
+logger = logging.getLogger(__name__)
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+# Spread of the lognormal latency distribution (its mean stays at the configured latency)
+_LOGNORMAL_SIGMA = 0.5
+
+# Characters per streamed piece, roughly what hosted models send per event
+_STREAM_PIECE_CHARS = 64
+
+
+class LLMMessage:
+    """A model reply (or streamed piece of one) with optional token usage."""
+
+    __slots__ = ("content", "usage_metadata")
+
+    def __init__(self, content: str, usage_metadata: Optional[Dict[str, int]] = None):
+        self.content = content
+        self.usage_metadata = usage_metadata
+
+
+class LLMBackend(ABC):
+    """
+    Interface the service expects from a chat model.
+
+    Messages are objects with ``content`` (and ``type``, e.g. "system" or
+    "human"); replies are objects with ``content`` and optionally
+    ``usage_metadata``. LangChain chat models satisfy it as they are.
+    """
+
+    @abstractmethod
+    async def ainvoke(self, messages: Sequence[Any]) -> Any:
+        """Return the complete reply to ``messages``."""
+
+    @abstractmethod
+    def astream(self, messages: Sequence[Any]) -> AsyncIterator[Any]:
+        """Yield the reply to ``messages`` piece by piece."""
+
+
+class FakeLLMError(Exception):
+    """Simulated upstream failure."""
+
+
+class FakeRateLimitError(FakeLLMError):
+    """Simulated upstream 429."""
+
+    status_code = 429
+
+
+class FakeLLMBackend(LLMBackend):
+    """
+    Local stand-in for the hosted model that answers every prompt with
+    well-formed output, without network access.
+
+    Transformation prompts get one record per input row (delta or full rows,
+    following the system prompt), planning prompts get a program adding one
+    field and intent prompts get the first category.
+    Replies are deterministic: the random draws for a call are seeded from
+    ``seed`` and the message contents. Time to first token follows
+    ``latency_distribution`` around ``latency_ms``, output is paced at
+    ``tokens_per_second`` (0 for instant), ``error_rate`` and
+    ``rate_limit_rate`` fail that share of calls, and ``truncation_rate``
+    cuts that share of replies short.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 200.0,
+        latency_distribution: str = "lognormal",
+        tokens_per_second: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        truncation_rate: float = 0.0,
+        seed: int = 0
+    ):
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution '{latency_distribution}', expected one of {LATENCY_DISTRIBUTIONS}")
+        self.latency_ms = latency_ms
+        self.latency_distribution = latency_distribution
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.truncation_rate = truncation_rate
+        self.seed = seed
+        self.calls = 0
+
+    async def ainvoke(self, messages: Sequence[Any]) -> LLMMessage:
+        rng, text, usage = self._prepare(messages)
+        await asyncio.sleep(self._first_token_delay(rng))
+        if self.tokens_per_second > 0:
+            await asyncio.sleep(usage["output_tokens"] / self.tokens_per_second)
+        return LLMMessage(text, usage)
+
+    async def astream(self, messages: Sequence[Any]) -> AsyncIterator[LLMMessage]:
+        rng, text, usage = self._prepare(messages)
+        await asyncio.sleep(self._first_token_delay(rng))
+        piece_delay = _STREAM_PIECE_CHARS / 4 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        for start in range(0, len(text), _STREAM_PIECE_CHARS):
+            if start and piece_delay:
+                await asyncio.sleep(piece_delay)
+            yield LLMMessage(text[start:start + _STREAM_PIECE_CHARS])
+        # Hosted models report usage on the final streamed piece
+        yield LLMMessage("", usage)
+
+    def _prepare(self, messages: Sequence[Any]) -> Tuple[random.Random, str, Dict[str, int]]:
+        """Draw this call's outcome and build its reply."""
+        self.calls += 1
+        digest = hashlib.sha256("\x00".join(str(m.content) for m in messages).encode()).hexdigest()
+        rng = random.Random(f"{self.seed}:{digest}")
+
+        draw = rng.random()
+        if draw < self.rate_limit_rate:
+            raise FakeRateLimitError("429 Resource has been exhausted (fake backend)")
+        if draw < self.rate_limit_rate + self.error_rate:
+            raise FakeLLMError("500 Internal error (fake backend)")
+
+        system = " ".join(str(m.content) for m in messages if getattr(m, "type", "") == "system")
+        human = " ".join(str(m.content) for m in messages if getattr(m, "type", "") != "system")
+        text = self._reply(system, human, rng)
+        if rng.random() < self.truncation_rate:
+            text = text[:int(len(text) * rng.uniform(0.3, 0.9))]
+
+        usage = {
+            "input_tokens": math.ceil((len(system) + len(human)) / 4),
+            "output_tokens": math.ceil(len(text) / 4)
+        }
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        return rng, text, usage
+
+    def _first_token_delay(self, rng: random.Random) -> float:
+        mean = self.latency_ms / 1000
+        if mean <= 0:
+            return 0.0
+        if self.latency_distribution == "fixed":
+            return mean
+        if self.latency_distribution == "uniform":
+            return rng.uniform(0, 2 * mean)
+        if self.latency_distribution == "exponential":
+            return rng.expovariate(1 / mean)
+        return rng.lognormvariate(math.log(mean) - _LOGNORMAL_SIGMA ** 2 / 2, _LOGNORMAL_SIGMA)
+
+    def _reply(self, system: str, human: str, rng: random.Random) -> str:
+        if "intent classification" in system:
+            _, _, categories = system.partition("categories:")
+            first_line = categories.strip().split("\n")[0]
+            return first_line.split(",")[0].strip()
+
+        if "table program" in system:
+            program = {"assign": {"fake_label": rng.choice(["alpha", "beta", "gamma", "delta"])}}
+            return json.dumps({"PROGRAM": program, "EXPLANATION": "Added fake_label to every record."})
+
+        rows = _prompt_rows(human)
+        labels = ["alpha", "beta", "gamma", "delta"]
+        if '"_row"' in system:
+            records: List[Dict[str, Any]] = [
+                {"_row": index, "fake_label": rng.choice(labels), "reasoning": "Deterministic fake transformation"}
+                for index in range(len(rows))
+            ]
+        else:
+            records = [
+                {**row, "fake_label": rng.choice(labels), "reasoning": "Deterministic fake transformation"}
+                for row in rows
+            ]
+
+        data_key = "TRANSFORMED_DATA"
+        for candidate in ("FILTERED_DATA", "ANALYZED_DATA"):
+            if candidate in system:
+                data_key = candidate
+        return json.dumps(
+            {data_key: records, "EXPLANATION": f"Added fake_label to {len(records)} record(s)."},
+            ensure_ascii=False,
+            default=str
+        )
+
+
+def _prompt_rows(prompt: str) -> List[Dict[str, Any]]:
+    """Recover the table rows from a prompt built by ``LLMService._build_user_prompt``."""
+    header, separator, table = prompt.partition("):\n")
+    if not separator:
+        return []
+    try:
+        if header.rstrip().endswith("list of row objects"):
+            return ast.literal_eval(table)
+        if table.lstrip().startswith("{"):
+            return decode_table(table, "json") or []
+    except (ValueError, SyntaxError, KeyError, IndexError):
+        logger.warning("Fake backend could not decode the prompt table")
+        return []
+
+    # TSV: "#<column>" dictionary lines, a header line, then one line per row
+    lines = [line for line in table.split("\n") if not line.startswith("#")]
+    if not lines:
+        return []
+    columns = lines[0].split("\t")
+    return [dict(zip(columns, line.split("\t"))) for line in lines[1:]]
+
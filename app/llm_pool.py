@@ -0,0 +1,128 @@
+"""Process-wide pool of reusable LLM clients."""
+
+import asyncio
+import itertools
+import logging
+import time
+from typing import Any, Callable, Dict, List
+from config import settings
+from app.llm_backends import FakeLLMBackend
+
+logger = logging.getLogger(__name__)
+
+
+def create_llm_client() -> Any:
+    """Create a chat client for the configured ``LLM_BACKEND``."""
+    if settings.LLM_BACKEND == "fake":
+        return FakeLLMBackend(
+            latency_ms=settings.FAKE_LLM_LATENCY_MS,
+            latency_distribution=settings.FAKE_LLM_LATENCY_DISTRIBUTION,
+            tokens_per_second=settings.FAKE_LLM_TOKENS_PER_SECOND,
+            error_rate=settings.FAKE_LLM_ERROR_RATE,
+            rate_limit_rate=settings.FAKE_LLM_RATE_LIMIT_RATE,
+            truncation_rate=settings.FAKE_LLM_TRUNCATION_RATE,
+            seed=settings.FAKE_LLM_SEED
+        )
+    if settings.LLM_BACKEND != "gemini":
+        raise ValueError(f"Unknown LLM backend '{settings.LLM_BACKEND}', expected 'gemini' or 'fake'")
+    if not settings.GOOGLE_API_KEY:
+        raise ValueError("GOOGLE_API_KEY is required")
+
+    # Imported lazily so the fake backend runs without the Google client installed
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(
+        model=settings.LLM_MODEL,
+        google_api_key=settings.GOOGLE_API_KEY,
+        temperature=settings.LLM_TEMPERATURE,
+        transport=settings.LLM_TRANSPORT
+    )
+
+
+class _PooledClient:
+    """A pooled client together with its last-used timestamp."""
+
+    __slots__ = ("client", "last_used")
+
+    def __init__(self, client: Any):
+        self.client = client
+        self.last_used = time.monotonic()
+
+
+class LLMClientPool:
+    """
+    Fixed-size pool of long-lived LLM clients shared by all requests.
+
+    Clients are handed out round-robin so concurrent requests spread over
+    several underlying connections. A client that has been idle for longer
+    than ``keepalive_seconds`` is rebuilt on its next use, since the upstream
+    connection behind it has most likely been dropped by then. Clients are
+    built by ``start`` before requests are served; the few built later
+    (slots of a pool that was not started, idle recycles) are constructed in
+    a worker thread so the event loop keeps serving other requests.
+    """
+
+    def __init__(
+        self,
+        size: int = settings.LLM_POOL_SIZE,
+        keepalive_seconds: float = settings.LLM_POOL_KEEPALIVE_SECONDS,
+        factory: Callable[[], Any] = create_llm_client
+    ):
+        """Initialize an empty pool; clients are built by ``start``."""
+        self.size = max(1, size)
+        self.keepalive_seconds = keepalive_seconds
+        self._factory = factory
+        self._slots: List[_PooledClient] = []
+        self._cursor = itertools.count()
+        self._lock = asyncio.Lock()
+        self._created = 0
+        self._recycled = 0
+
+    def start(self) -> None:
+        """Eagerly build every client in the pool; called at startup, before requests arrive."""
+        while len(self._slots) < self.size:
+            self._slots.append(_PooledClient(self._build()))
+        logger.info(f"LLM client pool started with {self.size} client(s)")
+
+    async def acquire(self) -> Any:
+        """Return the next client in round-robin order."""
+        index = next(self._cursor) % self.size
+        now = time.monotonic()
+
+        slot = self._slots[index] if index < len(self._slots) else None
+        if slot is None or self._idle(slot, now):
+            async with self._lock:
+                # Pool was not started (or only partially); fill lazily
+                while len(self._slots) <= index:
+                    self._slots.append(_PooledClient(await asyncio.to_thread(self._build)))
+
+                # Checked again: a request waiting on the lock may have rebuilt it already
+                slot = self._slots[index]
+                if self._idle(slot, now):
+                    logger.debug(f"Recycling idle LLM client in slot {index}")
+                    slot.client = await asyncio.to_thread(self._build)
+                    self._recycled += 1
+        slot.last_used = max(slot.last_used, now)
+        return slot.client
+
+    def close(self) -> None:
+        """Drop all pooled clients."""
+        self._slots.clear()
+        logger.info("LLM client pool closed")
+
+    def stats(self) -> Dict[str, int]:
+        """Return pool counters."""
+        return {
+            "size": self.size,
+            "active": len(self._slots),
+            "created": self._created,
+            "recycled": self._recycled
+        }
+
+    def _idle(self, slot: _PooledClient, now: float) -> bool:
+        return self.keepalive_seconds > 0 and now - slot.last_used > self.keepalive_seconds
+
+    def _build(self) -> Any:
+        client = self._factory()
+        self._created += 1
+        return client
+
@@ -1,32 +1,182 @@
 """LLM service for intent classification and data processing using LangChain."""
 
+import asyncio
+import contextlib
+import json
 import logging
-from typing import List, Dict, Any, Literal, Optional
-from langchain_google_genai import ChatGoogleGenerativeAI
+import math
+import time
+from typing import List, Dict, Any, AsyncIterator, Literal, Optional
 from langchain_core.messages import HumanMessage, SystemMessage
 from config import settings
+from app.llm_pool import create_llm_client
+from app.intent import LocalIntentClassifier, log_classification
+from app.table_encoding import TableEncoder
+from app.delta import merge_delta_rows, ROW_ID_FIELD
+from app.json_extract import extract_json
+from app.json_stream import IncrementalRowParser
+from app.plan import OPERATORS, PROGRAM_VERSION, PlanError, TablePlan, describe_schema
+from app.cache import PlanCache
+from app.dedup import (
+    broadcast_fields,
+    derive_fields,
+    is_row_mapping,
+    diff_fields,
+    distinct_values,
+    find_source_column,
+    group_rows,
+    merge_fields,
+    parse_ignored_fields,
+    value_key
+)
+from app.value_store import ValueResultStore
+from app.quotas import CHARS_PER_TOKEN, estimate_tokens
+from app.governor import UpstreamBusy, UpstreamGovernor
+from app.scheduler import FairScheduler
+from app.metrics import DEDUP_ROWS_SKIPPED_TOTAL, LLM_CALLS_IN_FLIGHT, PARSE_FAILURES_TOTAL, TOKENS_TOTAL
+from app.timing import observe_stage, stage
+from app.chunking import ROW_COUNT_MISMATCH, ChunkResult, chunk_rows, fan_out, merge_chunk_results
 from pydantic import BaseModel, Field
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever a system prompt changes so cached responses are invalidated
+PROMPT_TEMPLATE_VERSION = "3"
+
+# Rough per-call and per-row token costs used to estimate a request before it runs
+SYSTEM_PROMPT_TOKENS = 400
+OUTPUT_TOKENS_PER_ROW = 40
+# Rows serialized to estimate the size of the whole table
+ESTIMATE_SAMPLE_ROWS = 32
+
 
 class LLMService:
     """Service for LLM operations."""
     
-    def __init__(self):
-        """Initialize LLM service."""
-        if not settings.GOOGLE_API_KEY:
-            raise ValueError("GOOGLE_API_KEY is required")
+    def __init__(
+        self,
+        llm: Optional[Any] = None,
+        intent_classifier: Optional[LocalIntentClassifier] = None,
+        governor: Optional[UpstreamGovernor] = None,
+        scheduler: Optional[FairScheduler] = None,
+        client_key: Optional[str] = None,
+        plan_cache: Optional[PlanCache] = None,
+        value_store: Optional[ValueResultStore] = None
+    ):
+        """Initialize LLM service with a (usually pooled) chat client."""
+        self.llm = llm if llm is not None else create_llm_client()
+        self.intent_classifier = intent_classifier
+        # Shared pacing of upstream calls; calls go straight through without one
+        self.governor = governor
+        # Fair sharing of call slots between API keys; calls are scheduled under client_key
+        self.scheduler = scheduler
+        self.client_key = client_key
+        # Table programs shared across requests (plan-then-execute mode)
+        self.plan_cache = plan_cache
+        # Persistent per-value results of single-column transformations
+        self.value_store = value_store
+        self.table_encoder = TableEncoder(settings.TABLE_ENCODING, settings.TABLE_DICTIONARY_ENCODING)
+        # Set when a request fell back to unprocessed data; such results must not be cached
+        self.degraded = False
+        # Tokens consumed by every model call made through this service
+        self.usage = {"input_tokens": 0, "output_tokens": 0}
+        # Rows not sent to the model because an identical row or value was sent instead
+        self.deduplicated_rows = 0
+    
+    def estimate_request_tokens(self, user_prompt: str, table_data: List[Dict[str, Any]]) -> tuple[int, int]:
+        """
+        Estimate (input, output) tokens a request will consume before running it.
         
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-1.5-flash",
-            google_api_key=settings.GOOGLE_API_KEY,
-            temperature=0.1
-        )
+        The table's size is extrapolated from the JSON size of up to
+        ``ESTIMATE_SAMPLE_ROWS`` evenly spaced rows instead of encoding the
+        whole table a second time.
+        """
+        chunk_count = len(chunk_rows(table_data, settings.LLM_CHUNK_SIZE))
+        table_tokens = estimate_tokens(user_prompt)
+        if table_data:
+            sample = table_data[::max(1, len(table_data) // ESTIMATE_SAMPLE_ROWS)][:ESTIMATE_SAMPLE_ROWS]
+            sample_chars = len(json.dumps(sample, ensure_ascii=False, default=str))
+            table_tokens += math.ceil(sample_chars * len(table_data) / len(sample) / CHARS_PER_TOKEN)
+        input_tokens = table_tokens + SYSTEM_PROMPT_TOKENS * chunk_count
+        
+        output_tokens = OUTPUT_TOKENS_PER_ROW * len(table_data)
+        if settings.TRANSFORM_OUTPUT_MODE != "delta":
+            # Full mode echoes every original field back
+            output_tokens += table_tokens
+        return input_tokens, output_tokens
     
     async def classify_intent(self, user_prompt: str) -> str:
-        """Classify user intent into predefined categories."""
+        """
+        Classify user intent into predefined categories.
+        
+        Skips classification entirely when only one category is enabled, and
+        tries the local classifier before falling back to an LLM call.
+        """
+        with stage("intent"):
+            intent, confident = self._classify_locally(user_prompt)
+        if confident:
+            return intent
+        # The model call is timed as llm_call, not intent
+        return await self._classify_with_llm(user_prompt)
+    
+    async def classify_and_process(self, user_prompt: str, table_data: List[Dict[str, Any]]) -> tuple[str, str, List[Dict[str, Any]]]:
+        """
+        Classify intent and process the data, speculating when the LLM classifier is needed.
+        
+        With speculation enabled, the most likely processing path starts in
+        parallel with LLM classification. If the classifier disagrees, the
+        speculative work is cancelled and the correct path is re-run.
+        """
+        with stage("intent"):
+            intent, confident = self._classify_locally(user_prompt)
+        if confident or not settings.SPECULATIVE_PROCESSING_ENABLED:
+            if not confident:
+                intent = await self._classify_with_llm(user_prompt)
+            ai_message, processed_data = await self.process_data(intent, user_prompt, table_data)
+            return intent, ai_message, processed_data
+        
+        guess = intent or settings.INTENT_CATEGORIES[0]
+        logger.info(f"Speculatively processing as '{guess}' while classifying")
+        speculative = asyncio.ensure_future(self.process_data(guess, user_prompt, table_data))
+        try:
+            intent = await self._classify_with_llm(user_prompt)
+        except BaseException:
+            speculative.cancel()
+            raise
+        
+        if intent == guess:
+            ai_message, processed_data = await speculative
+            return intent, ai_message, processed_data
+        
+        logger.info(f"Speculation missed ('{guess}' vs '{intent}'), re-running")
+        speculative.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await speculative
+        self.degraded = False
+        ai_message, processed_data = await self.process_data(intent, user_prompt, table_data)
+        return intent, ai_message, processed_data
+    
+    def _classify_locally(self, user_prompt: str) -> tuple[Optional[str], bool]:
+        """Return the best local intent guess and whether it is confident enough to use."""
+        if len(settings.INTENT_CATEGORIES) == 1:
+            return settings.INTENT_CATEGORIES[0], True
+        
+        if self.intent_classifier is None:
+            return None, False
+        
+        intent, confidence = self.intent_classifier.predict(user_prompt)
+        if intent not in settings.INTENT_CATEGORIES:
+            return None, False
+        if confidence >= settings.INTENT_CONFIDENCE_THRESHOLD:
+            logger.info(f"Classified intent locally: {intent} (confidence {confidence:.2f})")
+            return intent, True
+        
+        logger.info(f"Local intent confidence too low ({confidence:.2f}), asking the LLM")
+        return intent, False
+    
+    async def _classify_with_llm(self, user_prompt: str) -> str:
+        """Classify user intent with an LLM call."""
         try:
             system_prompt = f"""
             You are an intent classification system. Classify the user's request into one of these categories:
@@ -40,7 +190,7 @@ class LLMService:
                 HumanMessage(content=user_prompt)
             ]
             
-            response = await self.llm.ainvoke(messages)
+            response = await self._invoke(messages)
             intent = response.content.strip().lower()
             
             # Validate intent is in our categories
@@ -49,6 +199,7 @@ class LLMService:
                 return settings.INTENT_CATEGORIES[0]  # Default to first category
             
             logger.info(f"Classified intent: {intent}")
+            log_classification(user_prompt, intent)
             return intent
             
         except Exception as e:
@@ -58,6 +209,15 @@ class LLMService:
     async def process_data(self, intent: str, user_prompt: str, table_data: List[Dict[str, Any]]) -> tuple[str, List[Dict[str, Any]]]:
         """Process table data based on classified intent."""
         try:
+            if settings.PLAN_EXECUTION_ENABLED and table_data:
+                try:
+                    planned = await self._plan_and_execute(user_prompt, table_data)
+                except Exception as e:
+                    logger.warning(f"Planning failed, processing rows with the model: {e}")
+                    planned = None
+                if planned is not None:
+                    return planned
+            
             # TEMPORARY: Only enable transformation function for debugging
             # Force all requests to use transformation function
             logger.info(f"Processing with transformation function (intent was: {intent})")
@@ -78,10 +238,238 @@ class LLMService:
             # 
             # return ai_message, processed_data
             
+        except UpstreamBusy:
+            # Nothing useful can be returned now; let the caller retry later
+            self.degraded = True
+            raise
         except Exception as e:
             logger.error(f"Error processing data: {e}")
+            self.degraded = True
             return f"I encountered an error while processing your request: {str(e)}", table_data
     
+    async def stream_process_data(self, intent: str, user_prompt: str, table_data: List[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process table data and yield NDJSON-ready records as rows are parsed.
+        
+        Chunks are transformed concurrently from the model's token stream and
+        each ``rows`` record is emitted as soon as a row closes, carrying its
+        ``offset`` into the original table (rows arrive in completion order).
+        Rows a chunk failed to produce are emitted unchanged when the chunk
+        ends. Duplicate rows are sent once and their results copied to every
+        duplicate. A single ``explanation`` record, reporting
+        ``deduplicated_rows``, closes the stream. When a table
+        program handles the request, or its distinct values are transformed
+        instead of its rows, the result is sent as one ``rows`` record.
+        
+        Requests that filter, sort or aggregate are streamed from one call
+        over the whole table; their ``rows`` records carry no ``offset`` and
+        arrive in result order, and only when the model produced no rows at
+        all is the table sent back unchanged.
+        """
+        if settings.PLAN_EXECUTION_ENABLED and table_data:
+            try:
+                planned = await self._plan_and_execute(user_prompt, table_data)
+            except Exception as e:
+                logger.warning(f"Planning failed, processing rows with the model: {e}")
+                planned = None
+            if planned is not None:
+                ai_message, processed_data = planned
+                if processed_data:
+                    yield {"type": "rows", "offset": 0, "rows": processed_data}
+                yield {"type": "explanation", "ai_message": ai_message, "row_count": len(processed_data), "deduplicated_rows": self.deduplicated_rows}
+                return
+        
+        deduplicated = self._dedup_column(user_prompt, table_data)
+        if deduplicated is not None:
+            try:
+                transformed = await self._transform_distinct_values(user_prompt, table_data, *deduplicated)
+            except Exception as e:
+                logger.error(f"Error transforming distinct values: {e}")
+                self.degraded = True
+                transformed = f"I encountered an error while processing your request: {str(e)}", table_data
+            if transformed is not None:
+                ai_message, processed_data = transformed
+                yield {"type": "rows", "offset": 0, "rows": processed_data}
+                yield {"type": "explanation", "ai_message": ai_message, "row_count": len(processed_data), "deduplicated_rows": self.deduplicated_rows}
+                return
+        
+        logger.info(f"Streaming transformation function (intent was: {intent})")
+        # Result rows only line up with input rows when each row maps to one result row
+        mapping = is_row_mapping(user_prompt)
+        # With duplicates, only the first row of each group is streamed through the model
+        groups = self._row_groups(table_data) if mapping else None
+        rows_to_send = table_data if groups is None else [table_data[group[0]] for group in groups]
+        ignored = parse_ignored_fields(settings.ROW_DEDUP_IGNORE_FIELDS)
+        chunks = []
+        offset = 0
+        for index, rows in enumerate(chunk_rows(rows_to_send, settings.LLM_CHUNK_SIZE if mapping else 0)):
+            chunks.append(ChunkResult(index, offset, rows))
+            offset += len(rows)
+        
+        queue: asyncio.Queue = asyncio.Queue()
+        semaphore = asyncio.Semaphore(max(1, settings.LLM_MAX_CONCURRENCY))
+        timeout = settings.LLM_CHUNK_TIMEOUT_SECONDS or None
+        
+        async def run(chunk: ChunkResult) -> None:
+            emitted: Dict[int, Dict[str, Any]] = {}
+            try:
+                async with semaphore:
+                    await asyncio.wait_for(self._stream_transform_chunk(user_prompt, chunk, emitted, queue, mapping), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Chunk {chunk.index} ({len(chunk.rows)} rows) timed out after {timeout}s")
+                chunk.error = "timeout"
+            except Exception as e:
+                logger.error(f"Chunk {chunk.index} ({len(chunk.rows)} rows) failed: {e}")
+                chunk.error = str(e)
+            finally:
+                # Rows the model never produced are sent back unchanged; a filter may drop rows on purpose
+                if mapping or not emitted:
+                    for index, row in enumerate(chunk.rows):
+                        if index not in emitted:
+                            self.degraded = True
+                            queue.put_nowait((chunk.offset + index, row))
+                queue.put_nowait(None)
+        
+        tasks = [asyncio.ensure_future(run(chunk)) for chunk in chunks]
+        logger.info(f"Streaming {len(rows_to_send)} rows across {len(chunks)} chunk(s)")
+        row_count = len(table_data) if mapping else 0
+        try:
+            remaining = len(tasks)
+            while remaining:
+                item = await queue.get()
+                if item is None:
+                    remaining -= 1
+                    continue
+                if not mapping:
+                    row_count += 1
+                    yield {"type": "rows", "rows": [item[1]]}
+                    continue
+                if groups is None:
+                    yield {"type": "rows", "offset": item[0], "rows": [item[1]]}
+                    continue
+                # Copy the representative's derived fields to every row of its group
+                delta = diff_fields(rows_to_send[item[0]], item[1], ignored)
+                for index in groups[item[0]]:
+                    yield {"type": "rows", "offset": index, "rows": [merge_fields(table_data[index], delta)]}
+            
+            ai_message, _ = merge_chunk_results(chunks)
+        except Exception as e:
+            logger.error(f"Error streaming data: {e}")
+            self.degraded = True
+            ai_message = f"I encountered an error while processing your request: {str(e)}"
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+        
+        yield {
+            "type": "explanation",
+            "ai_message": ai_message,
+            "row_count": row_count,
+            "deduplicated_rows": self.deduplicated_rows
+        }
+    
+    async def _plan_and_execute(self, user_prompt: str, table_data: List[Dict[str, Any]]) -> Optional[tuple[str, List[Dict[str, Any]]]]:
+        """
+        Have the model write a table program from the schema and a few sample rows, then run it locally.
+        
+        Returns None when the model finds the request needs per-row judgement
+        or its program is invalid, so the caller processes the rows with the
+        model instead. Programs and declines are reused from the plan cache for
+        tables with the same schema.
+        """
+        schema = describe_schema(table_data)
+        cache_key = None
+        if self.plan_cache is not None:
+            cache_key = PlanCache.make_key(user_prompt, schema, PROGRAM_VERSION)
+            cached = self.plan_cache.get_plan(cache_key)
+            if cached is not None:
+                explanation, program = cached
+                if program is None:
+                    return None
+                try:
+                    plan = TablePlan(program)
+                    with stage("execute"):
+                        processed_data = await asyncio.to_thread(plan.execute, table_data)
+                    logger.info(f"Cached table program produced {len(processed_data)} of {len(table_data)} row(s) locally")
+                    return explanation, processed_data
+                except Exception as e:
+                    logger.warning(f"Cached table program failed, replanning: {e}")
+                    self.plan_cache.delete(cache_key)
+        
+        response = await self._invoke(self._plan_messages(user_prompt, table_data, schema))
+        try:
+            with stage("parse"):
+                reply, _ = extract_json(response.content)
+            if not isinstance(reply, dict):
+                raise PlanError("Reply is not a JSON object")
+            explanation = str(reply.get("EXPLANATION") or "")
+            if reply.get("PROGRAM") is None:
+                logger.info(f"Request cannot be planned: {explanation}")
+                if cache_key is not None:
+                    self.plan_cache.set_plan(cache_key, explanation, None)
+                return None
+            plan = TablePlan(reply["PROGRAM"])
+        except ValueError as e:
+            logger.warning(f"Unusable table program, processing rows with the model: {e}")
+            return None
+        
+        if cache_key is not None:
+            self.plan_cache.set_plan(cache_key, explanation, reply["PROGRAM"])
+        
+        with stage("execute"):
+            # Off the event loop: a large table can take a while even at in-process speed
+            processed_data = await asyncio.to_thread(plan.execute, table_data)
+        logger.info(f"Table program produced {len(processed_data)} of {len(table_data)} row(s) locally")
+        return explanation, processed_data
+    
+    def _plan_messages(self, user_prompt: str, table_data: List[Dict[str, Any]], schema: Dict[str, str]) -> List[Any]:
+        """Build the planning prompt: the table's schema and sample rows, never the whole table."""
+        system_prompt = """
+        You are a data processing planner. Instead of processing the table yourself, write a table program
+        that a local engine runs over every row. You only see the table's schema and a few sample rows.
+        
+        A program is a JSON object with any of these keys, applied in this order:
+        - "filter": expression; keeps the rows where it is true
+        - "assign": {"field path": expression, ...}; sets (new) fields on every row, in order
+        - "sort": {"by": expression, "descending": true or false}
+        - "limit": maximum number of rows to return
+        
+        An expression is one of:
+        - a JSON string, number, boolean or null (a literal), or a list of literals
+        - {"field": "path"}: the value of a field; use "." for nested fields exactly as in the schema, e.g. "data.price"
+        - {"op": "name", "args": [expression, ...]} with one of these operators:
+          """ + ", ".join(OPERATORS) + """
+        Text comparisons ignore case. "in" checks whether its first argument is in the list given second.
+        
+        For example, for "Filter products with price greater than 100 and mark the expensive ones":
+        {
+          "PROGRAM": {
+            "filter": {"op": ">", "args": [{"field": "data.price"}, 100]},
+            "assign": {"data.expensive": {"op": ">=", "args": [{"field": "data.price"}, 1000]}}
+          },
+          "EXPLANATION": "Kept products priced above 100 and flagged those costing 1000 or more."
+        }
+        
+        If the request needs judgement or knowledge about each individual row that the operators cannot
+        express (for example classifying names by nationality), return {"PROGRAM": null, "EXPLANATION": "why"}.
+        
+        Return ONLY the JSON object.
+        """
+        
+        schema_lines = "\n".join(f"- {path}: {kind}" for path, kind in schema.items())
+        samples = json.dumps(table_data[:max(1, settings.PLAN_SAMPLE_ROWS)], ensure_ascii=False, default=str)
+        full_prompt = (
+            f"User request: {user_prompt}\n\n"
+            f"Table schema ({len(table_data)} rows; field path: type):\n{schema_lines}\n\n"
+            f"Sample rows:\n{samples}"
+        )
+        
+        return [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=full_prompt)
+        ]
+    
     async def _filter_data(self, user_prompt: str, table_data: List[Dict[str, Any]]) -> tuple[str, List[Dict[str, Any]]]:
         """Filter table data based on user prompt."""
         system_prompt = """
@@ -93,20 +481,304 @@ class LLMService:
         EXPLANATION: [brief explanation of filtering applied]
         """
         
-        data_str = str(table_data)
-        full_prompt = f"User request: {user_prompt}\n\nTable data: {data_str}"
+        full_prompt = self._build_user_prompt(user_prompt, table_data)
         
         messages = [
             SystemMessage(content=system_prompt),
             HumanMessage(content=full_prompt)
         ]
         
-        response = await self.llm.ainvoke(messages)
+        response = await self._invoke(messages)
         return self._parse_llm_response(response.content, table_data)
     
     async def _transform_data(self, user_prompt: str, table_data: List[Dict[str, Any]]) -> tuple[str, List[Dict[str, Any]]]:
-        """Transform table data based on user prompt."""
-        system_prompt = """
+        """Transform table data based on user prompt, sending each distinct value once when the request is about one column."""
+        if not is_row_mapping(user_prompt):
+            return await self._transform_table(user_prompt, table_data)
+        deduplicated = self._dedup_column(user_prompt, table_data)
+        if deduplicated is not None:
+            transformed = await self._transform_distinct_values(user_prompt, table_data, *deduplicated)
+            if transformed is not None:
+                return transformed
+        groups = self._row_groups(table_data)
+        if groups is not None:
+            return await self._transform_representatives(user_prompt, table_data, groups)
+        return await self._transform_rows(user_prompt, table_data)
+    
+    def _row_groups(self, table_data: List[Dict[str, Any]]) -> Optional[List[List[int]]]:
+        """Groups of duplicate row indexes (counting the rows they save), if row deduplication applies and finds any."""
+        if not settings.ROW_DEDUP_ENABLED:
+            return None
+        groups = group_rows(table_data, parse_ignored_fields(settings.ROW_DEDUP_IGNORE_FIELDS))
+        if len(groups) == len(table_data):
+            return None
+        skipped = len(table_data) - len(groups)
+        logger.info(f"Sending {len(groups)} representative row(s) for {len(table_data)} rows")
+        DEDUP_ROWS_SKIPPED_TOTAL.inc(skipped, ("row",))
+        self.deduplicated_rows = skipped
+        return groups
+    
+    async def _transform_representatives(
+        self,
+        user_prompt: str,
+        table_data: List[Dict[str, Any]],
+        groups: List[List[int]]
+    ) -> tuple[str, List[Dict[str, Any]]]:
+        """Transform the first row of each group of duplicates and copy its derived fields to the others."""
+        representatives = [table_data[group[0]] for group in groups]
+        explanation, transformed = await self._transform_rows(user_prompt, representatives)
+        if len(transformed) != len(representatives):
+            # Results are matched to representatives by position
+            logger.warning(f"Got {len(transformed)} row(s) for {len(representatives)} representative(s)")
+            self.degraded = True
+            return explanation, table_data
+        
+        ignored = parse_ignored_fields(settings.ROW_DEDUP_IGNORE_FIELDS)
+        processed_data = list(table_data)
+        for group, representative, row in zip(groups, representatives, transformed):
+            if not isinstance(row, dict):
+                continue
+            delta = diff_fields(representative, row, ignored)
+            for index in group:
+                processed_data[index] = merge_fields(table_data[index], delta)
+        return explanation, processed_data
+    
+    def _dedup_column(self, user_prompt: str, table_data: List[Dict[str, Any]]) -> Optional[tuple[tuple[str, ...], List[Any]]]:
+        """The (column, distinct values) to transform instead of whole rows, if value deduplication applies."""
+        if not settings.VALUE_DEDUP_ENABLED:
+            return None
+        if not is_row_mapping(user_prompt):
+            return None
+        column = find_source_column(user_prompt, table_data)
+        if column is None:
+            return None
+        values = distinct_values(table_data, column)
+        if len(values) == len(table_data) and self.value_store is None:
+            # Nothing to save unless earlier results can be reused
+            return None
+        return column, values
+    
+    async def _transform_distinct_values(
+        self,
+        user_prompt: str,
+        table_data: List[Dict[str, Any]],
+        column: tuple[str, ...],
+        values: List[Any]
+    ) -> Optional[tuple[str, List[Dict[str, Any]]]]:
+        """
+        Transform each distinct value of ``column`` once and broadcast the new fields to every row.
+        
+        Values already in the value store are not sent to the model. Results
+        for the others are added to it only from chunks that completed cleanly
+        and whose rows are tied to their value (by ``_row`` in delta mode, by
+        the echoed value otherwise). Returns None, for the rows to be
+        transformed instead, when the model did not return one row per value.
+        """
+        name = column[-1]
+        logger.info(f"Transforming {len(values)} distinct '{'.'.join(column)}' value(s) instead of {len(table_data)} rows")
+        degraded = self.degraded
+        
+        fields_by_value: Dict[str, Dict[str, Any]] = {}
+        intent_key = None
+        if self.value_store is not None:
+            intent_key = ValueResultStore.intent_key(user_prompt, name, PROMPT_TEMPLATE_VERSION)
+            fields_by_value = await asyncio.to_thread(
+                self.value_store.get_many, intent_key, [value_key(value) for value in values]
+            )
+        misses = [value for value in values if value_key(value) not in fields_by_value]
+        
+        explanation = f"Reused stored results for all {len(values)} distinct value(s)."
+        if misses:
+            logger.info(f"{len(values) - len(misses)} distinct value(s) found in the value store, sending {len(misses)}")
+            results = await self._fan_out_rows(user_prompt, [{name: value} for value in misses])
+            explanation, transformed = merge_chunk_results(results)
+            derived = derive_fields(name, misses, transformed)
+            if derived is None or any(result.error == ROW_COUNT_MISMATCH for result in results):
+                logger.warning("The model did not return one row per distinct value, transforming rows instead")
+                self.degraded = degraded
+                return None
+            if intent_key is not None:
+                persisted = self._persistable_fields(name, misses, results, derived)
+                if persisted:
+                    await asyncio.to_thread(self.value_store.set_many, intent_key, persisted)
+            fields_by_value.update(derived)
+            
+            unmatched = len(misses) - len(derived)
+            if unmatched:
+                logger.warning(f"No derived fields for {unmatched} of {len(values)} distinct value(s)")
+                self.degraded = True
+        
+        DEDUP_ROWS_SKIPPED_TOTAL.inc(len(table_data) - len(values), ("value",))
+        self.deduplicated_rows = len(table_data) - len(values)
+        return explanation, broadcast_fields(table_data, column, fields_by_value)
+    
+    @staticmethod
+    def _persistable_fields(
+        column: str,
+        values: List[Any],
+        results: List[ChunkResult],
+        derived: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, Dict[str, Any]]:
+        """The entries of ``derived`` safe to store: from clean chunks, with each row tied to its value."""
+        delta_mode = settings.TRANSFORM_OUTPUT_MODE == "delta"
+        persistable: Dict[str, Dict[str, Any]] = {}
+        for result in results:
+            if result.error:
+                continue
+            for value, row in zip(values[result.offset:result.offset + len(result.rows)], result.rows):
+                key = value_key(value)
+                if key not in derived:
+                    continue
+                # In full mode rows are matched by position; only trust rows that echo their value
+                if delta_mode or (isinstance(row, dict) and value_key(row.get(column)) == key):
+                    persistable[key] = derived[key]
+        return persistable
+    
+    async def _fan_out_rows(self, user_prompt: str, table_data: List[Dict[str, Any]]) -> List[ChunkResult]:
+        """Transform rows with the model in concurrent chunks, returning each chunk's result."""
+        results = await fan_out(
+            table_data,
+            lambda chunk: self._transform_chunk(user_prompt, chunk, settings.TRANSFORM_OUTPUT_MODE == "delta"),
+            chunk_size=settings.LLM_CHUNK_SIZE,
+            max_concurrency=settings.LLM_MAX_CONCURRENCY,
+            timeout=settings.LLM_CHUNK_TIMEOUT_SECONDS,
+            abort_on=(UpstreamBusy,)
+        )
+        if any(result.error for result in results):
+            self.degraded = True
+        return results
+    
+    async def _transform_rows(self, user_prompt: str, table_data: List[Dict[str, Any]]) -> tuple[str, List[Dict[str, Any]]]:
+        """Transform rows with the model, fanning them out in concurrent chunks."""
+        return merge_chunk_results(await self._fan_out_rows(user_prompt, table_data))
+    
+    async def _transform_table(self, user_prompt: str, table_data: List[Dict[str, Any]]) -> tuple[str, List[Dict[str, Any]]]:
+        """
+        Transform a request that may drop, reorder or aggregate rows ("Filter
+        products with price greater than 100") with one call over the whole
+        table, accepting however many rows come back.
+        """
+        results = await fan_out(
+            table_data,
+            lambda rows: self._transform_chunk(user_prompt, rows, delta_mode=False),
+            chunk_size=0,
+            max_concurrency=1,
+            timeout=settings.LLM_CHUNK_TIMEOUT_SECONDS,
+            abort_on=(UpstreamBusy,),
+            match_rows=False
+        )
+        if any(result.error for result in results):
+            self.degraded = True
+        return merge_chunk_results(results)
+    
+    async def _transform_chunk(
+        self,
+        user_prompt: str,
+        table_data: List[Dict[str, Any]],
+        delta_mode: bool
+    ) -> tuple[str, List[Dict[str, Any]]]:
+        """Transform a single chunk of table data with one LLM call."""
+        messages = self._transform_messages(user_prompt, table_data, delta_mode)
+        
+        response = await self._invoke(messages)
+        logger.info(f"Response while data transformation: {response.content}")
+        explanation, transformed_data = self._parse_llm_response(response.content, table_data)
+        
+        if delta_mode and transformed_data is not table_data:
+            transformed_data, missing, extra = merge_delta_rows(table_data, transformed_data)
+            if missing or extra:
+                self.degraded = True
+                explanation = f"{explanation} ({len(missing)} row(s) were not returned by the model and were left unchanged; {len(extra)} unexpected row(s) were ignored.)".strip()
+        
+        return explanation, transformed_data
+    
+    async def _stream_transform_chunk(
+        self,
+        user_prompt: str,
+        chunk: ChunkResult,
+        emitted: Dict[int, Dict[str, Any]],
+        queue: "asyncio.Queue",
+        mapping: bool = True
+    ) -> None:
+        """
+        Transform a chunk from the model's token stream, queueing each row as soon as it closes.
+        
+        Rows are queued as ``(absolute_index, row)`` and recorded in ``emitted``
+        by their index within the chunk. Unless ``mapping``, the index is the
+        row's position in the result, which may hold fewer or more rows than
+        the chunk.
+        """
+        delta_mode = mapping and settings.TRANSFORM_OUTPUT_MODE == "delta"
+        parser = IncrementalRowParser()
+        
+        def emit(rows: List[Dict[str, Any]]) -> None:
+            for row in rows:
+                if delta_mode:
+                    try:
+                        index = int(row.pop(ROW_ID_FIELD))
+                    except (KeyError, TypeError, ValueError):
+                        index = -1
+                    if not 0 <= index < len(chunk.rows) or index in emitted:
+                        logger.warning(f"Ignoring unexpected streamed row id in chunk {chunk.index}")
+                        self.degraded = True
+                        continue
+                    row = {**chunk.rows[index], **row}
+                else:
+                    index = len(emitted)
+                    if mapping and index >= len(chunk.rows):
+                        continue
+                emitted[index] = row
+                queue.put_nowait((chunk.offset + index, row))
+        
+        parse_seconds = 0.0
+        async for text in self._stream(self._transform_messages(user_prompt, chunk.rows, delta_mode)):
+            start = time.perf_counter()
+            rows = parser.feed(text)
+            parse_seconds += time.perf_counter() - start
+            emit(rows)
+        observe_stage("parse", parse_seconds)
+        
+        if parser.found_array:
+            chunk.explanation = parser.explanation()
+            if parser.errors:
+                PARSE_FAILURES_TOTAL.inc(parser.errors, ("stream_row",))
+                self.degraded = True
+        else:
+            # No recognizable data array in the stream; parse the whole response instead
+            explanation, transformed_data = self._parse_llm_response(parser.text, chunk.rows)
+            if transformed_data is not chunk.rows:
+                emit([dict(row) for row in transformed_data if isinstance(row, dict)])
+            chunk.explanation = explanation
+    
+    def _transform_messages(self, user_prompt: str, table_data: List[Dict[str, Any]], delta_mode: bool) -> List[Any]:
+        """Build the transformation prompt for a chunk of table data, asking for per-row deltas or full rows."""
+        if delta_mode:
+            system_prompt = """
+        You are a data transformation assistant. Based on the user's request, derive new field(s) for each record of the provided table data.
+        Return ONLY the new field(s) for each record, never the record's existing fields.
+        
+        CRITICAL JSON FORMATTING RULES:
+        1. Return ONLY valid JSON
+        2. Return exactly one object per input record, in input order
+        3. Every object must include "_row": the zero-based index of the input record it belongs to
+        4. Every object must include a "reasoning" field explaining the new values
+        5. Do NOT repeat any existing field of the record
+        
+        For example, if the records are "kabir" (row 0) and "ivan" (row 1) and the user requests
+        "categorize each name based on likeliest nationality", return:
+        [
+          {"_row": 0, "name_nationality": "Indian", "reasoning": "Kabir is a common name in India"},
+          {"_row": 1, "name_nationality": "Russian", "reasoning": "Ivan is a common name for Russian boys"}
+        ]
+        
+        Format your response EXACTLY as:
+        {
+          "TRANSFORMED_DATA": [valid JSON array only]
+          "EXPLANATION": [brief explanation of transformations applied]
+        }
+        """
+        else:
+            system_prompt = """
         You are a data transformation assistant. Based on the user's request, modify the provided table data.
         User query will require you to create additional field(s) in order to fulfill users requests. This can be done by addition of key-value pair in each of the data object inside of the array.
         
@@ -116,6 +788,7 @@ class LLMService:
         3. Do NOT add content after the JSON array
         4. Ensure all JSON is properly formatted with correct commas and brackets
         5. Every transformation must include a "reasoning" field explaining the changes
+        6. The input table may use a compact encoding; always return each record as a full JSON object keyed by field name, with dictionary indexes resolved to their values
         
         For example, if table_data input is:
         [
@@ -148,17 +821,12 @@ class LLMService:
         }
         """
         
-        data_str = str(table_data)
-        full_prompt = f"User request: {user_prompt}\n\nTable data: {data_str}"
+        full_prompt = self._build_user_prompt(user_prompt, table_data)
         
-        messages = [
+        return [
             SystemMessage(content=system_prompt),
             HumanMessage(content=full_prompt)
         ]
-        
-        response = await self.llm.ainvoke(messages)
-        logger.info(f"Response while data transformation: {response.content}")
-        return self._parse_llm_response(response.content, table_data)
     
     async def _analyze_data(self, user_prompt: str, table_data: List[Dict[str, Any]]) -> tuple[str, List[Dict[str, Any]]]:
         """Analyze table data based on user prompt."""
@@ -171,36 +839,122 @@ class LLMService:
         EXPLANATION: [brief explanation of analysis performed]
         """
         
-        data_str = str(table_data)
-        full_prompt = f"User request: {user_prompt}\n\nTable data: {data_str}"
+        full_prompt = self._build_user_prompt(user_prompt, table_data)
         
         messages = [
             SystemMessage(content=system_prompt),
             HumanMessage(content=full_prompt)
         ]
         
-        response = await self.llm.ainvoke(messages)
+        response = await self._invoke(messages)
         return self._parse_llm_response(response.content, table_data)
     
+    async def _invoke(self, messages: List[Any]) -> Any:
+        """Call the model once (scheduled and paced) and record its token usage."""
+        tokens = sum(estimate_tokens(message.content) for message in messages)
+        
+        async def call() -> Any:
+            with stage("llm_call"):
+                return await self.llm.ainvoke(messages)
+        
+        async with self._call_slot(tokens):
+            if self.governor is None:
+                response = await call()
+            else:
+                response = await self.governor.call(call, tokens)
+        self._record_usage(messages, len(response.content), getattr(response, "usage_metadata", None))
+        return response
+    
+    async def _stream(self, messages: List[Any]) -> AsyncIterator[str]:
+        """Stream the model's output text (scheduled and paced) and record its token usage."""
+        tokens = sum(estimate_tokens(message.content) for message in messages)
+        async with self._call_slot(tokens):
+            async for text in self._stream_unscheduled(messages, tokens):
+                yield text
+    
+    @contextlib.asynccontextmanager
+    async def _call_slot(self, tokens: int) -> AsyncIterator[None]:
+        """Hold this client's fair-share slot for one model call, timing the wait for it as ``queue``."""
+        if self.scheduler is not None:
+            with stage("queue"):
+                await self.scheduler.acquire(self.client_key, tokens)
+        try:
+            LLM_CALLS_IN_FLIGHT.inc()
+            try:
+                yield
+            finally:
+                LLM_CALLS_IN_FLIGHT.dec()
+        finally:
+            if self.scheduler is not None:
+                self.scheduler.release(self.client_key)
+    
+    async def _stream_unscheduled(self, messages: List[Any], tokens: int) -> AsyncIterator[str]:
+        async def timed_pieces() -> AsyncIterator[Any]:
+            with stage("llm_call"):
+                async for piece in self.llm.astream(messages):
+                    yield piece
+        
+        if self.governor is None:
+            pieces = timed_pieces()
+        else:
+            pieces = self.governor.stream(timed_pieces, tokens)
+        
+        output_chars = 0
+        usage_metadata: Dict[str, int] = {}
+        try:
+            async for piece in pieces:
+                output_chars += len(piece.content)
+                # Streamed chunks report incremental usage
+                for key, value in (getattr(piece, "usage_metadata", None) or {}).items():
+                    if isinstance(value, int):
+                        usage_metadata[key] = usage_metadata.get(key, 0) + value
+                yield piece.content
+        finally:
+            self._record_usage(messages, output_chars, usage_metadata)
+    
+    def _record_usage(self, messages: List[Any], output_chars: int, usage_metadata: Optional[Dict[str, int]]) -> None:
+        """Add a call's reported usage (or an estimate when none is reported) to ``self.usage``."""
+        if usage_metadata and usage_metadata.get("input_tokens"):
+            input_tokens = usage_metadata["input_tokens"]
+            output_tokens = usage_metadata.get("output_tokens", 0)
+        else:
+            input_tokens = sum(estimate_tokens(message.content) for message in messages)
+            output_tokens = math.ceil(output_chars / CHARS_PER_TOKEN)
+        self.usage["input_tokens"] += input_tokens
+        self.usage["output_tokens"] += output_tokens
+        TOKENS_TOTAL.inc(input_tokens, ("input",))
+        TOKENS_TOTAL.inc(output_tokens, ("output",))
+    
+    def _build_user_prompt(self, user_prompt: str, table_data: List[Dict[str, Any]]) -> str:
+        """Combine the user request with the encoded table data."""
+        with stage("prompt_build"):
+            description, data_str = self.table_encoder.encode(table_data)
+        return f"User request: {user_prompt}\n\nTable data ({description}):\n{data_str}"
+    
     def _parse_llm_response(self, response_content: str, fallback_data: List[Dict[str, Any]]) -> tuple[str, List[Dict[str, Any]]]:
-        import json
-
+        """Extract the data and explanation from an LLM response."""
         try:
-            # Try to parse the response as JSON directly
-            jsonData = json.loads(response_content)
-        except Exception:
-            # If direct parsing fails, try to extract the JSON object from the string
-            import re
-            match = re.search(r'\{.*\}', response_content, re.DOTALL)
-            if match:
-                jsonData = json.loads(match.group(0))
-            else:
-                # Fallback: return the fallback data and a message
-                return "Could not parse LLM response as JSON.", fallback_data
+            # Single pass over the response, tolerating code fences and surrounding prose
+            with stage("parse"):
+                jsonData, json_end = extract_json(response_content)
+        except ValueError:
+            # Fallback: return the fallback data and a message
+            PARSE_FAILURES_TOTAL.inc(labels=("response",))
+            self.degraded = True
+            return "Could not parse LLM response as JSON.", fallback_data
+
+        if isinstance(jsonData, list):
+            # Bare array, e.g. "TRANSFORMED_DATA: [...] EXPLANATION: ..."
+            _, _, explanation = response_content[json_end:].partition("EXPLANATION:")
+            return explanation.strip(), jsonData
 
         # Try to extract the correct keys, fallback to other keys if needed
-        transformed_data = jsonData.get("TRANSFORMED_DATA") or jsonData.get("FILTERED_DATA") or jsonData.get("ANALYZED_DATA") or fallback_data
+        transformed_data = jsonData.get("TRANSFORMED_DATA") or jsonData.get("FILTERED_DATA") or jsonData.get("ANALYZED_DATA")
         explanation = jsonData.get("EXPLANATION", "")
+        if not transformed_data:
+            logger.warning("LLM response has no data, returning the rows unchanged")
+            self.degraded = True
+            transformed_data = fallback_data
 
         return explanation, transformed_data
     
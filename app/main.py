@@ -1,10 +1,19 @@
 """Main FastAPI application."""
 
 import logging
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from config import settings
 from app.routers.process import router as process_router
+from app.llm_pool import LLMClientPool
+from app.cache import PlanCache, ResponseCache
+from app.value_store import open_value_store
+from app.intent import build_intent_classifier
+from app.quotas import TokenQuotaTracker
+from app import metrics
+from app.governor import UpstreamGovernor
+from app.admission import AdmissionController
+from app.scheduler import FairScheduler, parse_key_weights
 
 # Configure logging
 logging.basicConfig(
@@ -29,6 +38,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets frontend code read the per-stage timings
+    expose_headers=["Server-Timing"],
 )
 
 # Include routers
@@ -42,14 +53,86 @@ async def startup_event():
     logger.info(f"Debug mode: {settings.DEBUG}")
     
     # Validate configuration
-    if not settings.GOOGLE_API_KEY:
+    if settings.LLM_BACKEND == "fake":
+        logger.warning("Using the fake LLM backend - responses are synthetic")
+    elif not settings.GOOGLE_API_KEY:
         logger.warning("GOOGLE_API_KEY not set - LLM functionality will not work")
+    
+    # Shared LLM clients, reused across requests
+    app.state.llm_pool = LLMClientPool()
+    if settings.LLM_BACKEND == "fake" or settings.GOOGLE_API_KEY:
+        app.state.llm_pool.start()
+    
+    # Bounded in-flight limit and wait queue in front of the LLM stage
+    app.state.admission = AdmissionController(
+        max_in_flight=settings.ADMISSION_MAX_IN_FLIGHT,
+        max_queue=settings.ADMISSION_MAX_QUEUE,
+        slo_seconds=settings.ADMISSION_QUEUE_SLO_SECONDS
+    )
+    
+    # Weighted fair sharing of LLM call slots between API keys
+    app.state.fair_scheduler = None
+    if settings.SCHEDULER_MAX_CONCURRENT_CALLS > 0:
+        app.state.fair_scheduler = FairScheduler(
+            max_concurrent=settings.SCHEDULER_MAX_CONCURRENT_CALLS,
+            per_key_limit=settings.SCHEDULER_PER_KEY_MAX_CALLS,
+            quantum=settings.SCHEDULER_QUANTUM_TOKENS,
+            weights=parse_key_weights(settings.SCHEDULER_KEY_WEIGHTS)
+        )
+    
+    # Pacing of all upstream calls against the provider's RPM/TPM limits
+    app.state.upstream_governor = UpstreamGovernor(
+        rpm_limit=settings.UPSTREAM_RPM_LIMIT,
+        tpm_limit=settings.UPSTREAM_TPM_LIMIT,
+        max_wait_seconds=settings.UPSTREAM_MAX_WAIT_SECONDS,
+        max_retries=settings.UPSTREAM_MAX_RETRIES,
+        backoff_base_seconds=settings.UPSTREAM_BACKOFF_BASE_SECONDS,
+        backoff_max_seconds=settings.UPSTREAM_BACKOFF_MAX_SECONDS
+    )
+    
+    # Local intent classifier tried before the LLM classifier
+    app.state.intent_classifier = build_intent_classifier()
+    
+    # Per-key token budgets
+    app.state.token_quota = TokenQuotaTracker(
+        input_limit=settings.TOKEN_QUOTA_INPUT_PER_WINDOW,
+        output_limit=settings.TOKEN_QUOTA_OUTPUT_PER_WINDOW,
+        window_seconds=settings.TOKEN_QUOTA_WINDOW_SECONDS,
+        max_keys=settings.RATE_LIMIT_MAX_KEYS
+    )
+    
+    # Cache of processed responses for repeated prompt/table pairs
+    app.state.response_cache = ResponseCache(
+        max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+        max_bytes=settings.RESPONSE_CACHE_MAX_BYTES
+    )
+    
+    # Table programs for prompt/schema pairs, reused across tables of the same shape
+    app.state.plan_cache = None
+    if settings.PLAN_CACHE_ENABLED:
+        app.state.plan_cache = PlanCache(
+            max_entries=settings.PLAN_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.PLAN_CACHE_TTL_SECONDS
+        )
+    
+    # On-disk memo of per-value transformation results, shared across requests and restarts
+    app.state.value_store = None
+    if settings.VALUE_STORE_PATH:
+        app.state.value_store = open_value_store(
+            settings.VALUE_STORE_PATH,
+            max_entries=settings.VALUE_STORE_MAX_ENTRIES,
+            ttl_seconds=settings.VALUE_STORE_TTL_SECONDS
+        )
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Application shutdown event."""
     logger.info("Shutting down LLM Backend API")
+    app.state.llm_pool.close()
+    if app.state.value_store is not None:
+        app.state.value_store.close()
 
 
 @app.get("/")
@@ -62,6 +145,14 @@ async def root():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Prometheus metrics: per-stage latency histograms, token and cache counters, in-flight gauges."""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
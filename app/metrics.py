@@ -0,0 +1,203 @@
+"""In-process metrics rendered in the Prometheus text exposition format."""
+
+import math
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans in-process stages (sub-millisecond) up to slow model calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = Tuple[str, ...]
+
+
+class _Metric(ABC):
+    """A named metric family; one value per combination of label values."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        REGISTRY.append(self)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Return the sample lines of this family."""
+
+    def _label_text(self, labels: Labels, extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labels)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter(_Metric):
+    """Monotonically increasing total."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, labels: Labels = ()) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, labels: Labels = ()) -> float:
+        return self._values.get(labels, 0.0)
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{self._label_text(labels)} {_number(value)}" for labels, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, labels: Labels = ()) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, labels: Labels = ()) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) - amount
+
+    def set(self, value: float, labels: Labels = ()) -> None:
+        self._values[labels] = value
+
+    def value(self, labels: Labels = ()) -> float:
+        return self._values.get(labels, 0.0)
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{self._label_text(labels)} {_number(value)}" for labels, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    """
+    Distribution of observed values over fixed buckets.
+
+    Observing costs one bisect and three additions; cumulative bucket counts
+    are only computed when the metrics are rendered.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last is +Inf), sum, count]
+        self._values: Dict[Labels, list] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        state = self._values.get(labels)
+        if state is None:
+            state = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            self._values[labels] = state
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def time(self, labels: Labels = ()) -> "_Timer":
+        """Context manager observing the wall-clock duration of the block, in seconds."""
+        return _Timer(self, labels)
+
+    def count(self, labels: Labels = ()) -> int:
+        state = self._values.get(labels)
+        return state[2] if state else 0
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for labels, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == math.inf else _number(bound)
+                bucket_labels = self._label_text(labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{self._label_text(labels)} {count}")
+        return lines
+
+
+class _Timer:
+    """Plain class rather than a generator context manager, which costs several times more."""
+
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: Labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        self.histogram.observe(time.perf_counter() - self.start, self.labels)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+REGISTRY: List[_Metric] = []
+
+
+def render() -> str:
+    """All registered metrics in the Prometheus text format."""
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# Metrics of the processing pipeline
+STAGE_SECONDS = Histogram(
+    "llm_backend_stage_duration_seconds",
+    "Time spent in each processing stage (auth, intent, prompt_build, llm_call, parse, execute, serialize)",
+    ("stage",)
+)
+REQUEST_SECONDS = Histogram(
+    "llm_backend_request_duration_seconds",
+    "Time to produce a /api/v1/process response, by response mode",
+    ("mode",)
+)
+TABLE_ROWS = Histogram(
+    "llm_backend_table_rows",
+    "Rows per processed table",
+    buckets=(1, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+)
+TOKENS_TOTAL = Counter("llm_backend_tokens_total", "Model tokens consumed, by direction", ("direction",))
+CACHE_LOOKUPS_TOTAL = Counter("llm_backend_cache_lookups_total", "Response cache lookups, by result", ("result",))
+PARSE_FAILURES_TOTAL = Counter(
+    "llm_backend_parse_failures_total",
+    "Model output that could not be parsed, by kind (response, stream_row)",
+    ("kind",)
+)
+DEDUP_ROWS_SKIPPED_TOTAL = Counter(
+    "llm_backend_dedup_rows_skipped_total",
+    "Rows not sent to the model because their value was already being transformed, by kind",
+    ("kind",)
+)
+RATE_LIMIT_FAIL_OPEN_TOTAL = Counter(
+    "llm_backend_rate_limit_fail_open_total",
+    "Requests allowed without a rate limit check because the shared store was unavailable"
+)
+REQUESTS_IN_FLIGHT = Gauge("llm_backend_requests_in_flight", "Requests currently in the LLM stage")
+LLM_CALLS_IN_FLIGHT = Gauge("llm_backend_llm_calls_in_flight", "Model calls currently running")
@@ -24,6 +24,7 @@ class ProcessResponse(BaseModel):
     """Main response model."""
     ai_message: str = Field(..., description="AI's response message")
     response_data: ResponseData = Field(..., description="Processed table data")
+    deduplicated_rows: int = Field(0, description="Rows not sent to the model because an identical row or value was sent instead")
 
 
 class ErrorResponse(BaseModel):
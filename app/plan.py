@@ -0,0 +1,365 @@
+"""
+Sandboxed table programs: the model plans from the schema and a few sample
+rows, and the program is run over the whole table locally.
+
+A program is a JSON object with any of these keys, applied in this order:
+
+    {
+      "filter": <expression>,                      keep rows where it is true
+      "assign": {"<field path>": <expression>},    set fields, in order
+      "sort": {"by": <expression>, "descending": false},
+      "limit": <non-negative integer>
+    }
+
+An expression is a JSON scalar (a literal), a list of scalars (a literal
+list, for ``in``), ``{"field": "<path>"}`` reading a field (``.`` separates
+nested keys, e.g. ``"data.price"``) or ``{"op": "<name>", "args": [...]}``.
+Text equality, ``contains`` and ``startswith``/``endswith`` ignore case,
+numeric strings compare as numbers, and an operator that fails on a row's
+values, or whose text or integer result would exceed ``MAX_TEXT_LENGTH``
+characters or ``MAX_INT_BITS`` bits, yields null. Programs are compiled into closures over a fixed set of
+operators; nothing the model writes is ever evaluated as code.
+"""
+
+import math
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Row = Dict[str, Any]
+Expression = Callable[[Row], Any]
+
+# Bump whenever the program format or operator semantics change so cached programs are invalidated
+PROGRAM_VERSION = "2"
+
+MAX_PROGRAM_NODES = 500
+MAX_PROGRAM_DEPTH = 24
+MAX_FIELD_PATH_DEPTH = 8
+
+# Results larger than this are null; assigns can feed each other, so values could otherwise double per step
+MAX_TEXT_LENGTH = 10000
+MAX_INT_BITS = 64
+MAX_ROUND_DIGITS = 15
+
+_PROGRAM_KEYS = ("filter", "assign", "sort", "limit")
+_FIELD_PATH = re.compile(r"^[^.]+(\.[^.]+)*$")
+
+# Value errors inside an operator make its result null instead of failing the table
+_ROW_ERRORS = (TypeError, ValueError, ArithmeticError, AttributeError, OverflowError)
+
+
+class PlanError(ValueError):
+    """Raised for a program that is malformed or uses unsupported operators."""
+
+
+def _number(value: Any) -> Any:
+    """Numeric strings compare and calculate as numbers; everything else is returned as is."""
+    if isinstance(value, str):
+        try:
+            return float(value) if any(c in value for c in ".eE") else int(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _comparable(a: Any, b: Any) -> Tuple[Any, Any]:
+    if isinstance(a, (int, float)) and not isinstance(b, (int, float)):
+        return a, _number(b)
+    if isinstance(b, (int, float)) and not isinstance(a, (int, float)):
+        return _number(a), b
+    return a, b
+
+
+def _equal(a: Any, b: Any) -> bool:
+    a, b = _comparable(a, b)
+    if isinstance(a, str) and isinstance(b, str):
+        return a.casefold() == b.casefold()
+    return a == b
+
+
+def _ordered(compare: Callable[[Any, Any], bool]) -> Callable[[Any, Any], bool]:
+    def op(a: Any, b: Any) -> bool:
+        if a is None or b is None:
+            return False
+        return compare(*_comparable(a, b))
+    return op
+
+
+def _bounded(result: Any) -> Any:
+    """``result``, or None when it is too large to keep."""
+    if isinstance(result, str) and len(result) > MAX_TEXT_LENGTH:
+        return None
+    if isinstance(result, int) and not isinstance(result, bool) and result.bit_length() > MAX_INT_BITS:
+        return None
+    if isinstance(result, float) and not math.isfinite(result):
+        return None
+    return result
+
+
+def _arithmetic(calculate: Callable[..., Any]) -> Callable[..., Any]:
+    def op(*args: Any) -> Any:
+        numbers = [_bounded(_number(arg)) for arg in args]
+        # Numbers only: "x" * 10 ** 9 must not be able to exhaust memory
+        if not all(isinstance(n, (int, float)) and not isinstance(n, bool) for n in numbers):
+            return None
+        return _bounded(calculate(*numbers))
+    return op
+
+
+def _text(function: Callable[..., Any]) -> Callable[..., Any]:
+    def op(value: Any, *args: Any) -> Any:
+        if value is None:
+            return None
+        return _bounded(function(str(value), *args))
+    return op
+
+
+def _concat(*args: Any) -> Any:
+    parts = ["" if arg is None else str(arg) for arg in args]
+    if sum(len(part) for part in parts) > MAX_TEXT_LENGTH:
+        return None
+    return "".join(parts)
+
+
+def _contains(container: Any, item: Any) -> bool:
+    if container is None or item is None:
+        return False
+    if isinstance(container, list):
+        return any(_equal(element, item) for element in container)
+    return str(item).casefold() in str(container).casefold()
+
+
+def _to_number(value: Any) -> Any:
+    converted = _number(value)
+    return converted if isinstance(converted, (int, float)) and not isinstance(converted, bool) else None
+
+
+def _round(value: Any, digits: Any = 0) -> Any:
+    value = _number(value)
+    if value is None:
+        return None
+    return _bounded(round(value, max(-MAX_ROUND_DIGITS, min(MAX_ROUND_DIGITS, int(digits)))))
+
+
+def _length(value: Any) -> Any:
+    if value is None:
+        return None
+    return len(value) if isinstance(value, (list, dict)) else len(str(value))
+
+
+# name -> (minimum arguments, maximum arguments or None for any, implementation)
+OPERATORS: Dict[str, Tuple[int, Optional[int], Callable[..., Any]]] = {
+    "==": (2, 2, _equal),
+    "!=": (2, 2, lambda a, b: not _equal(a, b)),
+    ">": (2, 2, _ordered(lambda a, b: a > b)),
+    ">=": (2, 2, _ordered(lambda a, b: a >= b)),
+    "<": (2, 2, _ordered(lambda a, b: a < b)),
+    "<=": (2, 2, _ordered(lambda a, b: a <= b)),
+    "and": (1, None, lambda *args: all(args)),
+    "or": (1, None, lambda *args: any(args)),
+    "not": (1, 1, lambda a: not a),
+    "in": (2, 2, lambda item, container: _contains(container, item)),
+    "contains": (2, 2, _contains),
+    "is_null": (1, 1, lambda a: a is None or a == ""),
+    "+": (2, None, _arithmetic(lambda *args: sum(args[1:], args[0]))),
+    "-": (2, 2, _arithmetic(lambda a, b: a - b)),
+    "*": (2, None, _arithmetic(lambda *args: math.prod(args))),
+    "/": (2, 2, _arithmetic(lambda a, b: a / b)),
+    "%": (2, 2, _arithmetic(lambda a, b: a % b)),
+    "abs": (1, 1, _arithmetic(abs)),
+    "min": (1, None, _arithmetic(min)),
+    "max": (1, None, _arithmetic(max)),
+    "round": (1, 2, _round),
+    "to_number": (1, 1, _to_number),
+    "to_string": (1, 1, lambda a: None if a is None else _bounded(str(a))),
+    "lower": (1, 1, _text(str.lower)),
+    "upper": (1, 1, _text(str.upper)),
+    "strip": (1, 1, _text(str.strip)),
+    "startswith": (2, 2, _text(lambda s, prefix: s.casefold().startswith(str(prefix).casefold()))),
+    "endswith": (2, 2, _text(lambda s, suffix: s.casefold().endswith(str(suffix).casefold()))),
+    "concat": (1, None, _concat),
+    "length": (1, 1, _length),
+    "if": (3, 3, lambda condition, then, otherwise: then if condition else otherwise),
+    "coalesce": (1, None, lambda *args: next((arg for arg in args if arg is not None), None)),
+}
+
+
+def get_field(row: Row, path: Tuple[str, ...]) -> Any:
+    """Value at ``path`` in a (possibly nested) row, or None."""
+    value: Any = row
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def set_field(row: Row, path: Tuple[str, ...], value: Any) -> Row:
+    """Copy of ``row`` with ``path`` set, copying nested objects instead of mutating them."""
+    updated = dict(row)
+    target = updated
+    for key in path[:-1]:
+        nested = target.get(key)
+        nested = dict(nested) if isinstance(nested, dict) else {}
+        target[key] = nested
+        target = nested
+    target[path[-1]] = value
+    return updated
+
+
+class _Compiler:
+    """Turns a JSON expression into a closure, enforcing the program size limits."""
+
+    def __init__(self):
+        self.nodes = 0
+
+    def expression(self, node: Any, depth: int = 0) -> Expression:
+        self.nodes += 1
+        if self.nodes > MAX_PROGRAM_NODES:
+            raise PlanError(f"Program has more than {MAX_PROGRAM_NODES} nodes")
+        if depth > MAX_PROGRAM_DEPTH:
+            raise PlanError(f"Program is nested deeper than {MAX_PROGRAM_DEPTH} levels")
+
+        if node is None or isinstance(node, (str, int, float, bool)):
+            return lambda row: node
+        if isinstance(node, list):
+            if not all(item is None or isinstance(item, (str, int, float, bool)) for item in node):
+                raise PlanError("Literal lists may only contain scalars")
+            values = list(node)
+            return lambda row: values
+        if not isinstance(node, dict):
+            raise PlanError(f"Unsupported expression: {node!r}")
+
+        if set(node) == {"field"}:
+            path = self.field_path(node["field"])
+            return lambda row: get_field(row, path)
+
+        if set(node) - {"op", "args"} or "op" not in node:
+            raise PlanError(f"Expressions are a literal, {{'field': ...}} or {{'op': ..., 'args': [...]}}, got {node!r}")
+        name = node["op"]
+        if name not in OPERATORS:
+            raise PlanError(f"Unknown operator '{name}'")
+        args = node.get("args", [])
+        if not isinstance(args, list):
+            raise PlanError(f"Arguments of '{name}' must be a list")
+        minimum, maximum, function = OPERATORS[name]
+        if len(args) < minimum or (maximum is not None and len(args) > maximum):
+            raise PlanError(f"Operator '{name}' got {len(args)} argument(s)")
+
+        operands = [self.expression(arg, depth + 1) for arg in args]
+
+        def evaluate(row: Row) -> Any:
+            try:
+                return function(*[operand(row) for operand in operands])
+            except _ROW_ERRORS:
+                return None
+        return evaluate
+
+    @staticmethod
+    def field_path(path: Any) -> Tuple[str, ...]:
+        if not isinstance(path, str) or not _FIELD_PATH.match(path):
+            raise PlanError(f"Invalid field path {path!r}")
+        keys = tuple(path.split("."))
+        if len(keys) > MAX_FIELD_PATH_DEPTH:
+            raise PlanError(f"Field path {path!r} is nested too deeply")
+        return keys
+
+
+class TablePlan:
+    """A validated program, ready to run over any number of rows."""
+
+    def __init__(self, program: Dict[str, Any]):
+        if not isinstance(program, dict):
+            raise PlanError("Program must be a JSON object")
+        unknown = set(program) - set(_PROGRAM_KEYS)
+        if unknown:
+            raise PlanError(f"Unknown program key(s): {', '.join(sorted(unknown))}")
+
+        compiler = _Compiler()
+        self.program = program
+        self.filter: Optional[Expression] = None
+        if program.get("filter") is not None:
+            self.filter = compiler.expression(program["filter"])
+
+        assign = program.get("assign") or {}
+        if not isinstance(assign, dict):
+            raise PlanError("'assign' must map field paths to expressions")
+        self.assign: List[Tuple[Tuple[str, ...], Expression]] = [
+            (compiler.field_path(path), compiler.expression(expression))
+            for path, expression in assign.items()
+        ]
+
+        self.sort_key: Optional[Expression] = None
+        self.descending = False
+        sort = program.get("sort")
+        if sort is not None:
+            if not isinstance(sort, dict) or "by" not in sort or set(sort) - {"by", "descending"}:
+                raise PlanError("'sort' must be {'by': <expression>, 'descending': <bool>}")
+            self.sort_key = compiler.expression(sort["by"])
+            self.descending = bool(sort.get("descending", False))
+
+        self.limit: Optional[int] = program.get("limit")
+        if self.limit is not None and (isinstance(self.limit, bool) or not isinstance(self.limit, int) or self.limit < 0):
+            raise PlanError("'limit' must be a non-negative integer")
+
+    def execute(self, rows: List[Row]) -> List[Row]:
+        """Run the program over ``rows`` without modifying them."""
+        if self.filter is not None:
+            keep = self.filter
+            rows = [row for row in rows if keep(row)]
+        if self.assign:
+            rows = [self._assign(row) for row in rows]
+        if self.sort_key is not None:
+            rows = self._sort(rows)
+        if self.limit is not None:
+            rows = rows[:self.limit]
+        return rows
+
+    def _assign(self, row: Row) -> Row:
+        for path, expression in self.assign:
+            row = set_field(row, path, expression(row))
+        return row
+
+    def _sort(self, rows: List[Row]) -> List[Row]:
+        key = self.sort_key
+        keyed = [(_number(key(row)), row) for row in rows]
+        # Nulls go last in either direction; mixed types sort numbers before text
+        present = [item for item in keyed if item[0] is not None]
+        missing = [row for value, row in keyed if value is None]
+        present.sort(
+            key=lambda item: (0, item[0], "") if isinstance(item[0], (int, float)) else (1, 0, str(item[0]).casefold()),
+            reverse=self.descending
+        )
+        return [row for _, row in present] + missing
+
+
+def describe_schema(rows: List[Row], max_rows: int = 50) -> Dict[str, str]:
+    """Field paths of the first ``max_rows`` rows with the JSON types seen at each."""
+    types: Dict[str, List[str]] = {}
+
+    def visit(value: Any, prefix: str) -> None:
+        if isinstance(value, dict) and value:
+            for key, nested in value.items():
+                visit(nested, f"{prefix}.{key}" if prefix else str(key))
+            return
+        seen = types.setdefault(prefix, [])
+        name = _json_type(value)
+        if name not in seen:
+            seen.append(name)
+
+    for row in rows[:max_rows]:
+        visit(row, "")
+    return {path: "|".join(names) for path, names in types.items() if path}
+
+
+def _json_type(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, list):
+        return "array"
+    if isinstance(value, dict):
+        return "object"
+    return "string"
@@ -0,0 +1,163 @@
+"""Per-API-key token budgets over rolling windows."""
+
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio used when the provider reports no usage
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a piece of text."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+class QuotaExceeded(Exception):
+    """Raised when a request would exceed a key's token budget."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Reservation:
+    """Tokens charged to a key for one request; estimated at admission, settled afterwards."""
+
+    __slots__ = ("key", "timestamp", "input_tokens", "output_tokens", "settled", "_usage")
+
+    def __init__(self, key: Hashable, timestamp: float, input_tokens: int, output_tokens: int, usage: "_KeyUsage"):
+        self.key = key
+        self.timestamp = timestamp
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.settled = False
+        # The window entry charged; settling applies only while it is still tracked
+        self._usage = usage
+
+
+class _KeyUsage:
+    __slots__ = ("entries", "input_tokens", "output_tokens")
+
+    def __init__(self):
+        self.entries: deque = deque()
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+
+class TokenQuotaTracker:
+    """
+    Rolling-window input/output token budgets per API key.
+
+    ``reserve`` charges a request's estimated tokens before the LLM call and
+    rejects it if either budget would be exceeded; ``settle`` replaces the
+    estimate with the actual usage once it is known. A limit of 0 disables
+    that budget. At most ``max_keys`` keys are tracked (least recently used
+    keys are dropped first).
+    """
+
+    def __init__(self, input_limit: int, output_limit: int, window_seconds: float = 3600.0, max_keys: int = 100_000):
+        self.input_limit = input_limit
+        self.output_limit = output_limit
+        self.window_seconds = window_seconds
+        self.max_keys = max(1, max_keys)
+        self._keys: "OrderedDict[Hashable, _KeyUsage]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any budget is enforced."""
+        return self.input_limit > 0 or self.output_limit > 0
+
+    def reserve(self, key: Hashable, input_tokens: int, output_tokens: int, now: Optional[float] = None) -> Reservation:
+        """Charge an estimate to ``key`` or raise ``QuotaExceeded``."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            usage = self._usage_for(key, now)
+
+            over_input = self.input_limit > 0 and usage.input_tokens + input_tokens > self.input_limit
+            over_output = self.output_limit > 0 and usage.output_tokens + output_tokens > self.output_limit
+            if over_input or over_output:
+                raise QuotaExceeded(
+                    "Token quota exceeded. Please try again later.",
+                    retry_after=self._retry_after(usage, input_tokens, output_tokens, now)
+                )
+
+            reservation = Reservation(key, now, input_tokens, output_tokens, usage)
+            usage.entries.append(reservation)
+            usage.input_tokens += input_tokens
+            usage.output_tokens += output_tokens
+            return reservation
+
+    def settle(self, reservation: Reservation, input_tokens: int, output_tokens: int) -> None:
+        """Replace a reservation's estimate with the actual usage."""
+        with self._lock:
+            if reservation.settled:
+                return
+            reservation.settled = True
+            usage = self._keys.get(reservation.key)
+            # Reservations whose key was evicted (even if since re-created) or
+            # that already left the window no longer count
+            if usage is not reservation._usage or reservation.timestamp <= time.monotonic() - self.window_seconds:
+                return
+            usage.input_tokens += input_tokens - reservation.input_tokens
+            usage.output_tokens += output_tokens - reservation.output_tokens
+            reservation.input_tokens = input_tokens
+            reservation.output_tokens = output_tokens
+
+    def usage(self, key: Hashable) -> Dict[str, Any]:
+        """Current usage and limits for ``key``."""
+        with self._lock:
+            usage = self._keys.get(key)
+            if usage is not None:
+                self._prune(usage, time.monotonic())
+            return {
+                "window_seconds": self.window_seconds,
+                "input_tokens": usage.input_tokens if usage else 0,
+                "output_tokens": usage.output_tokens if usage else 0,
+                "input_limit": self.input_limit,
+                "output_limit": self.output_limit,
+                "requests": len(usage.entries) if usage else 0
+            }
+
+    def _usage_for(self, key: Hashable, now: float) -> _KeyUsage:
+        usage = self._keys.get(key)
+        if usage is None:
+            usage = _KeyUsage()
+            self._keys[key] = usage
+            while len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+        else:
+            self._keys.move_to_end(key)
+            self._prune(usage, now)
+        return usage
+
+    def _prune(self, usage: _KeyUsage, now: float) -> None:
+        cutoff = now - self.window_seconds
+        entries = usage.entries
+        while entries and entries[0].timestamp <= cutoff:
+            expired = entries.popleft()
+            usage.input_tokens -= expired.input_tokens
+            usage.output_tokens -= expired.output_tokens
+
+    def _retry_after(self, usage: _KeyUsage, input_tokens: int, output_tokens: int, now: float) -> float:
+        """Seconds until enough reservations expire for the request to fit."""
+        if (self.input_limit > 0 and input_tokens > self.input_limit) or (self.output_limit > 0 and output_tokens > self.output_limit):
+            # Never fits; report a full window
+            return self.window_seconds
+
+        freed_input = usage.input_tokens
+        freed_output = usage.output_tokens
+        for entry in usage.entries:
+            freed_input -= entry.input_tokens
+            freed_output -= entry.output_tokens
+            fits_input = self.input_limit <= 0 or freed_input + input_tokens <= self.input_limit
+            fits_output = self.output_limit <= 0 or freed_output + output_tokens <= self.output_limit
+            if fits_input and fits_output:
+                return max(0.0, entry.timestamp + self.window_seconds - now)
+        return self.window_seconds
@@ -0,0 +1,268 @@
+"""Per-key rate limiting backends: bounded in-process limiters and a host-wide SQLite store."""
+
+import logging
+import sqlite3
+from abc import ABC, abstractmethod
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, Hashable, Optional
+from app.metrics import RATE_LIMIT_FAIL_OPEN_TOTAL
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitBackend(ABC):
+    """Interface for rate limit storage shared by all requests of a worker (or host)."""
+
+    # True when ``allow`` does I/O and must be called off the event loop
+    blocking = False
+
+    @abstractmethod
+    def allow(self, key: Hashable, now: Optional[float] = None) -> bool:
+        """Record a request for ``key`` and return whether it is within the limit."""
+
+    def stats(self) -> Dict[str, Any]:
+        """Return backend counters."""
+        return {}
+
+
+class RateLimiter(RateLimitBackend):
+    """
+    Base class for per-key limiters allowing ``limit`` requests per ``window_seconds``.
+
+    Per-key state lives in an LRU-ordered map capped at ``max_keys``. Keys idle
+    for longer than ``idle_seconds`` are evicted from the cold end as new checks
+    arrive, so every check costs amortized O(1) and memory stays bounded no
+    matter how many distinct keys are seen.
+    """
+
+    def __init__(self, limit: int, window_seconds: float = 60.0, max_keys: int = 100_000, idle_seconds: float = 120.0):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.max_keys = max(1, max_keys)
+        # Evicting before a full window has passed would forget live state
+        self.idle_seconds = max(idle_seconds, window_seconds)
+        self._state: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._last_seen: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def allow(self, key: Hashable, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            state = self._state.get(key)
+            if state is None:
+                state = self._new_state(now)
+                self._state[key] = state
+            else:
+                self._state.move_to_end(key)
+            self._last_seen[key] = now
+            allowed = self._check(state, now)
+            self._evict(now)
+            return allowed
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the number of tracked keys and eviction count."""
+        return {"tracked_keys": len(self._state), "max_keys": self.max_keys, "evictions": self.evictions}
+
+    def __len__(self) -> int:
+        return len(self._state)
+
+    def _evict(self, now: float) -> None:
+        state = self._state
+        last_seen = self._last_seen
+        while state:
+            oldest = next(iter(state))
+            if len(state) <= self.max_keys and now - last_seen[oldest] <= self.idle_seconds:
+                break
+            del state[oldest]
+            del last_seen[oldest]
+            self.evictions += 1
+
+    @abstractmethod
+    def _new_state(self, now: float) -> Any:
+        """Return fresh per-key state for a key first seen at ``now``."""
+
+    @abstractmethod
+    def _check(self, state: Any, now: float) -> bool:
+        """Update ``state`` for a request at ``now`` and return whether it is allowed."""
+
+
+class TokenBucketLimiter(RateLimiter):
+    """Token bucket holding up to ``limit`` tokens, refilled evenly over the window."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._refill_per_second = self.limit / self.window_seconds
+
+    def _new_state(self, now: float) -> list:
+        # [tokens, last refill time]
+        return [float(self.limit), now]
+
+    def _check(self, state: list, now: float) -> bool:
+        tokens = min(self.limit, state[0] + (now - state[1]) * self._refill_per_second)
+        state[1] = now
+        if tokens < 1:
+            state[0] = tokens
+            return False
+        state[0] = tokens - 1
+        return True
+
+
+class SlidingLogLimiter(RateLimiter):
+    """Exact sliding window keeping the timestamps of accepted requests."""
+
+    def _new_state(self, now: float) -> deque:
+        return deque()
+
+    def _check(self, state: deque, now: float) -> bool:
+        cutoff = now - self.window_seconds
+        while state and state[0] <= cutoff:
+            state.popleft()
+        if len(state) >= self.limit:
+            return False
+        state.append(now)
+        return True
+
+
+class SQLiteRateLimitBackend(RateLimitBackend):
+    """
+    Token bucket stored in a SQLite database in WAL mode, shared by every worker on the host.
+
+    Each check is a single atomic UPSERT that refills the bucket, takes a token
+    and reports success, so concurrent processes can never over-admit. Rows of
+    idle keys are purged every ``cleanup_interval`` checks. A check waits up
+    to ``busy_timeout`` seconds for another process's write lock and retries
+    ``lock_retries`` times after a short pause; if the store is still locked
+    (or otherwise unusable) it fails open (allows the request), so a stuck
+    writer cannot stall requests. Fail-open checks are counted in
+    ``llm_backend_rate_limit_fail_open_total``.
+    """
+
+    blocking = True
+
+    def __init__(
+        self,
+        path: str,
+        limit: int,
+        window_seconds: float = 60.0,
+        idle_seconds: float = 120.0,
+        cleanup_interval: int = 1000,
+        busy_timeout: float = 0.1,
+        lock_retries: int = 2,
+        retry_delay: float = 0.01
+    ):
+        self.path = path
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.idle_seconds = max(idle_seconds, window_seconds)
+        self.cleanup_interval = cleanup_interval
+        self.busy_timeout = busy_timeout
+        self.lock_retries = max(0, lock_retries)
+        self.retry_delay = retry_delay
+        self._refill_per_second = limit / window_seconds
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._checks = 0
+
+    def allow(self, key: Hashable, now: Optional[float] = None) -> bool:
+        # Wall-clock time, since timestamps are compared across processes
+        now = time.time() if now is None else now
+        with self._lock:
+            for attempt in range(self.lock_retries + 1):
+                try:
+                    return self._take(key, now)
+                except sqlite3.OperationalError as e:
+                    error = e
+                    if not _is_locked(e):
+                        break
+                    if attempt < self.lock_retries:
+                        time.sleep(self.retry_delay * (attempt + 1))
+            RATE_LIMIT_FAIL_OPEN_TOTAL.inc()
+            logger.warning(f"Rate limit store unavailable, allowing request: {error}")
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            tracked = self._connect().execute("SELECT count(*) FROM rate_limits").fetchone()[0]
+        return {"tracked_keys": tracked, "path": self.path}
+
+    def close(self) -> None:
+        """Close this process's connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _take(self, key: Hashable, now: float) -> bool:
+        conn = self._connect()
+        row = conn.execute(
+            """
+            INSERT INTO rate_limits (key, tokens, updated) VALUES (:key, :limit - 1, :now)
+            ON CONFLICT (key) DO UPDATE SET
+                tokens = min(:limit, tokens + (:now - updated) * :rate) - 1,
+                updated = :now
+            WHERE min(:limit, tokens + (:now - updated) * :rate) >= 1
+            RETURNING tokens
+            """,
+            {"key": str(key), "limit": self.limit, "now": now, "rate": self._refill_per_second}
+        ).fetchone()
+
+        self._checks += 1
+        if self._checks % self.cleanup_interval == 0:
+            conn.execute("DELETE FROM rate_limits WHERE updated < ?", (now - self.idle_seconds,))
+        return row is not None
+
+    def _connect(self) -> sqlite3.Connection:
+        # Opened lazily so each worker process gets its own connection
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None, check_same_thread=False)
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+
+def _is_locked(error: sqlite3.OperationalError) -> bool:
+    """Whether ``error`` is a transient lock conflict worth retrying."""
+    message = str(error)
+    return "locked" in message or "busy" in message
+
+
+RATE_LIMIT_ALGORITHMS = {
+    "token_bucket": TokenBucketLimiter,
+    "sliding_log": SlidingLogLimiter
+}
+
+
+def create_rate_limiter(algorithm: str, limit: int, window_seconds: float = 60.0, max_keys: int = 100_000, idle_seconds: float = 120.0) -> RateLimiter:
+    """Create a limiter by algorithm name."""
+    limiter_class = RATE_LIMIT_ALGORITHMS.get(algorithm)
+    if limiter_class is None:
+        raise ValueError(f"Unknown rate limit algorithm '{algorithm}', expected one of {list(RATE_LIMIT_ALGORITHMS)}")
+    return limiter_class(limit, window_seconds=window_seconds, max_keys=max_keys, idle_seconds=idle_seconds)
+
+
+def create_rate_limit_backend(
+    backend: str,
+    algorithm: str,
+    limit: int,
+    window_seconds: float = 60.0,
+    max_keys: int = 100_000,
+    idle_seconds: float = 120.0,
+    sqlite_path: str = ""
+) -> RateLimitBackend:
+    """Create the configured backend: an in-process limiter or the shared SQLite store."""
+    if backend == "memory":
+        return create_rate_limiter(algorithm, limit, window_seconds=window_seconds, max_keys=max_keys, idle_seconds=idle_seconds)
+    if backend == "sqlite":
+        if algorithm != "token_bucket":
+            raise ValueError("The sqlite rate limit backend only supports the token_bucket algorithm")
+        return SQLiteRateLimitBackend(sqlite_path, limit, window_seconds=window_seconds, idle_seconds=idle_seconds)
+    raise ValueError(f"Unknown rate limit backend '{backend}', expected 'memory' or 'sqlite'")
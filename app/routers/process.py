@@ -1,30 +1,149 @@
 """Process router for handling data processing requests."""
 
+import json
 import logging
-from typing import Dict, Any
-from fastapi import APIRouter, Depends, Header, HTTPException, status
+import math
+import time
+from typing import Dict, Any, AsyncIterator, Callable, List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from config import settings
 from app.models import ProcessRequest, ProcessResponse, ErrorResponse
-from app.security import verify_api_key, get_api_key_from_header
-from app.llm_service import LLMService
+from app.security import verify_api_key, validate_api_key, get_api_key_from_header
+from app.llm_service import LLMService, PROMPT_TEMPLATE_VERSION
+from app.cache import PlanCache, ResponseCache
+from app.quotas import QuotaExceeded, TokenQuotaTracker
+from app.governor import UpstreamBusy, UpstreamGovernor
+from app.admission import AdmissionController, Overloaded
+from app.scheduler import FairScheduler
+from app.value_store import ValueResultStore
+from app.metrics import CACHE_LOOKUPS_TOTAL, REQUEST_SECONDS, REQUESTS_IN_FLIGHT, TABLE_ROWS
+from app.timing import current_timing, observe_stage, stage, start_request_timing
+from app.dependencies import (
+    LLMServiceFactory,
+    get_admission_controller,
+    get_fair_scheduler,
+    get_llm_service_factory,
+    get_plan_cache,
+    get_response_cache,
+    get_token_quota,
+    get_upstream_governor,
+    get_value_store
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1", tags=["processing"])
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+async def _ndjson_lines(records: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    """Serialize streamed records as newline-delimited JSON."""
+    serialize_seconds = 0.0
+    try:
+        async for record in records:
+            start = time.perf_counter()
+            line = json.dumps(record, default=str) + "\n"
+            serialize_seconds += time.perf_counter() - start
+            yield line
+    finally:
+        observe_stage("serialize", serialize_seconds)
+
+
+def _with_server_timing(headers: Dict[str, str]) -> Dict[str, str]:
+    """Add the Server-Timing header when the request is being timed."""
+    timing = current_timing()
+    if timing is None:
+        return headers
+    return {**headers, "Server-Timing": timing.header()}
+
+
+def _json_response(
+    ai_message: str,
+    table_data: List[Dict[str, Any]],
+    headers: Dict[str, str],
+    deduplicated_rows: int = 0
+) -> Response:
+    """Serialize a ProcessResponse body directly, timing the serialization stage."""
+    with stage("serialize"):
+        body = ProcessResponse(
+            ai_message=ai_message,
+            response_data={"table_data": table_data},
+            deduplicated_rows=deduplicated_rows
+        ).model_dump_json()
+    return Response(content=body, media_type="application/json", headers=_with_server_timing(headers))
+
+
+async def _cached_records(ai_message: str, table_data: List[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+    """Replay a cached response in the streaming record format."""
+    yield {"type": "rows", "offset": 0, "rows": table_data}
+    yield {"type": "explanation", "ai_message": ai_message, "row_count": len(table_data), "deduplicated_rows": 0}
+
+
+async def _caching_records(
+    records: AsyncIterator[Dict[str, Any]],
+    llm_service: LLMService,
+    response_cache: ResponseCache,
+    cache_key: str
+) -> AsyncIterator[Dict[str, Any]]:
+    """Pass streamed records through, caching the reassembled response at the end."""
+    chunks = []
+    async for record in records:
+        if record["type"] == "rows":
+            # Records without an offset (filters, sorts) are already in result order
+            chunks.append((record.get("offset", len(chunks)), record["rows"]))
+        elif record["type"] == "explanation" and not llm_service.degraded:
+            processed_data = [row for _, rows in sorted(chunks, key=lambda c: c[0]) for row in rows]
+            response_cache.set_response(cache_key, record["ai_message"], processed_data)
+        yield record
+
+
+async def _finishing_records(
+    records: AsyncIterator[Dict[str, Any]],
+    finish: Callable[[], None]
+) -> AsyncIterator[Dict[str, Any]]:
+    """Pass streamed records through, calling ``finish`` once the stream ends."""
+    try:
+        async for record in records:
+            yield record
+    finally:
+        finish()
+
+
+def _should_bypass_cache(cache_bypass: Optional[str], cache_control: Optional[str]) -> bool:
+    """Whether the client asked to skip the response cache."""
+    if cache_bypass and cache_bypass.strip().lower() in ("1", "true", "yes"):
+        return True
+    return bool(cache_control and "no-cache" in cache_control.lower())
+
 
 @router.post(
     "/process",
     response_model=ProcessResponse,
     responses={
+        200: {
+            "content": {NDJSON_MEDIA_TYPE: {}},
+            "description": "Processed data; streamed as NDJSON when requested via the Accept header"
+        },
         400: {"model": ErrorResponse, "description": "Bad request"},
         401: {"model": ErrorResponse, "description": "Unauthorized"},
-        429: {"model": ErrorResponse, "description": "Rate limit exceeded"},
+        429: {"model": ErrorResponse, "description": "Rate limit or token quota exceeded"},
+        503: {"model": ErrorResponse, "description": "Server overloaded or upstream model capacity exhausted"},
         500: {"model": ErrorResponse, "description": "Internal server error"}
     }
 )
 async def process_data(
     request: ProcessRequest,
-    api_key: str = Header(None, alias="X-API-Key")
+    api_key: str = Header(None, alias="X-API-Key"),
+    accept: Optional[str] = Header(None),
+    cache_bypass: Optional[str] = Header(None, alias="X-Cache-Bypass"),
+    cache_control: Optional[str] = Header(None),
+    make_llm_service: LLMServiceFactory = Depends(get_llm_service_factory),
+    response_cache: ResponseCache = Depends(get_response_cache),
+    token_quota: TokenQuotaTracker = Depends(get_token_quota),
+    admission: AdmissionController = Depends(get_admission_controller)
 ) -> ProcessResponse:
     """
     Process table data based on user prompt.
@@ -33,39 +152,154 @@ async def process_data(
     1. Classifies the user's intent
     2. Processes the table data accordingly
     3. Returns the AI response and processed data
+    
+    Clients sending ``Accept: application/x-ndjson`` receive transformed rows
+    as soon as each chunk is ready, followed by a final explanation record.
+    
+    Repeated prompt/table pairs are served from the response cache unless the
+    request sends ``X-Cache-Bypass: true`` or ``Cache-Control: no-cache``.
+    
+    With ``SERVER_TIMING_ENABLED`` responses carry a ``Server-Timing``
+    header. Streamed responses send it before the first record, so it only
+    covers the stages up to intent classification.
     """
+    started = time.perf_counter()
+    timing = start_request_timing() if settings.SERVER_TIMING_ENABLED else None
     try:
         # Verify API key and rate limiting
-        await verify_api_key(get_api_key_from_header(api_key))
+        with stage("auth"):
+            key = await verify_api_key(get_api_key_from_header(api_key))
         
         logger.info(f"Processing request from user: {request.user_prompt[:50]}...")
         
-        # Initialize LLM service
-        llm_service = LLMService()
-        
         # Convert table data to simple format for processing
         table_data = request.request_data.table_data
+        streaming = bool(accept and NDJSON_MEDIA_TYPE in accept)
+        TABLE_ROWS.observe(len(table_data))
+        
+        # Serve repeated requests from the response cache
+        cache_key = None
+        cache_headers = {}
+        if settings.RESPONSE_CACHE_ENABLED:
+            if _should_bypass_cache(cache_bypass, cache_control):
+                cache_headers["X-Cache"] = "BYPASS"
+            else:
+                cache_key = ResponseCache.make_key(request.user_prompt, table_data, PROMPT_TEMPLATE_VERSION)
+                cached = response_cache.get_response(cache_key)
+                cache_headers["X-Cache"] = "HIT" if cached is not None else "MISS"
+            CACHE_LOOKUPS_TOTAL.inc(labels=(cache_headers["X-Cache"].lower(),))
+            if timing is not None:
+                timing.cache = cache_headers["X-Cache"]
+            
+            if cache_headers["X-Cache"] == "HIT":
+                logger.info("Serving response from cache")
+                ai_message, processed_data = cached
+                if streaming:
+                    cached_response = StreamingResponse(
+                        _ndjson_lines(_cached_records(ai_message, processed_data)),
+                        media_type=NDJSON_MEDIA_TYPE,
+                        headers=_with_server_timing(cache_headers)
+                    )
+                else:
+                    cached_response = _json_response(ai_message, processed_data, cache_headers)
+                REQUEST_SECONDS.observe(time.perf_counter() - started, ("cache",))
+                return cached_response
+        
+        # Take a pooled client only for authenticated requests that need the model
+        llm_service = await make_llm_service(key)
+        
+        # Charge the estimated token cost against the key's budget before calling the model
+        reservation = None
+        if token_quota.enabled:
+            estimated_input, estimated_output = llm_service.estimate_request_tokens(request.user_prompt, table_data)
+            try:
+                reservation = token_quota.reserve(key, estimated_input, estimated_output)
+            except QuotaExceeded as e:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail=str(e),
+                    headers={"Retry-After": str(math.ceil(e.retry_after))}
+                )
         
-        # Classify intent
-        intent = await llm_service.classify_intent(request.user_prompt)
+        # Wait for a slot in the LLM stage, or shed the request if the queue is too long
+        try:
+            admitted_at = await admission.acquire()
+        except Overloaded as e:
+            if reservation is not None:
+                token_quota.settle(reservation, **llm_service.usage)
+            logger.warning(f"Shedding request: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=str(e),
+                headers={"Retry-After": str(math.ceil(e.retry_after))}
+            )
+        
+        REQUESTS_IN_FLIGHT.inc()
+        
+        finished = False
+        
+        def finish() -> None:
+            """Release everything held for the model calls once they are done; later calls do nothing."""
+            nonlocal finished
+            if finished:
+                return
+            finished = True
+            if reservation is not None:
+                token_quota.settle(reservation, **llm_service.usage)
+            admission.release(admitted_at)
+            REQUESTS_IN_FLIGHT.dec()
+            if streaming:
+                # Streamed responses are complete once the last record is sent
+                REQUEST_SECONDS.observe(time.perf_counter() - started, ("ndjson",))
+        
+        if streaming:
+            try:
+                intent = await llm_service.classify_intent(request.user_prompt)
+            except BaseException:
+                finish()
+                raise
+            logger.info(f"Classified intent: {intent}")
+            logger.info("Streaming response as NDJSON")
+            records = llm_service.stream_process_data(intent, request.user_prompt, table_data)
+            if cache_key is not None:
+                records = _caching_records(records, llm_service, response_cache, cache_key)
+            # The background task also releases when the body is never iterated
+            return StreamingResponse(
+                _ndjson_lines(_finishing_records(records, finish)),
+                media_type=NDJSON_MEDIA_TYPE,
+                headers=_with_server_timing(cache_headers),
+                background=BackgroundTask(finish)
+            )
+        
+        # Classify intent and process data accordingly
+        try:
+            intent, ai_message, processed_data = await llm_service.classify_and_process(
+                request.user_prompt, table_data
+            )
+        finally:
+            finish()
         logger.info(f"Classified intent: {intent}")
         
-        # Process data based on intent
-        ai_message, processed_data = await llm_service.process_data(
-            intent, request.user_prompt, table_data
-        )
+        if cache_key is not None and not llm_service.degraded:
+            response_cache.set_response(cache_key, ai_message, processed_data)
         
         # Return processed data directly (no wrapping needed)
         logger.info("Request processed successfully")
         
-        return ProcessResponse(
-            ai_message=ai_message,
-            response_data={"table_data": processed_data}
-        )
+        json_response = _json_response(ai_message, processed_data, cache_headers, llm_service.deduplicated_rows)
+        REQUEST_SECONDS.observe(time.perf_counter() - started, ("json",))
+        return json_response
         
     except HTTPException:
         # Re-raise HTTP exceptions (auth, rate limit)
         raise
+    except UpstreamBusy as e:
+        logger.warning(f"Upstream busy, rejecting request: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))}
+        )
     except Exception as e:
         logger.error(f"Unexpected error processing request: {e}")
         raise HTTPException(
@@ -74,6 +308,63 @@ async def process_data(
         )
 
 
+@router.get("/usage")
+async def token_usage(
+    api_key: str = Header(None, alias="X-API-Key"),
+    token_quota: TokenQuotaTracker = Depends(get_token_quota)
+):
+    """Current token usage and budgets for the calling API key."""
+    key = get_api_key_from_header(api_key)
+    if not validate_api_key(key):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or missing API key"
+        )
+    return token_quota.usage(key)
+
+
+@router.get("/cache/stats")
+async def cache_stats(response_cache: ResponseCache = Depends(get_response_cache)):
+    """Response cache occupancy and hit/miss counters."""
+    return response_cache.stats()
+
+
+@router.get("/plan-cache/stats")
+async def plan_cache_stats(plan_cache: Optional[PlanCache] = Depends(get_plan_cache)):
+    """Table program cache occupancy and hit/miss counters."""
+    if plan_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **plan_cache.stats()}
+
+
+@router.get("/value-store/stats")
+async def value_store_stats(value_store: Optional[ValueResultStore] = Depends(get_value_store)):
+    """Persistent per-value result store occupancy and hit/miss counters."""
+    if value_store is None:
+        return {"enabled": False}
+    return {"enabled": True, **value_store.stats()}
+
+
+@router.get("/admission/stats")
+async def admission_stats(admission: AdmissionController = Depends(get_admission_controller)):
+    """Admission control: in-flight requests, queue depth and wait times."""
+    return admission.stats()
+
+
+@router.get("/scheduler/stats")
+async def scheduler_stats(scheduler: Optional[FairScheduler] = Depends(get_fair_scheduler)):
+    """Fair scheduler slot usage and queue sizes."""
+    if scheduler is None:
+        return {"enabled": False}
+    return {"enabled": True, **scheduler.stats()}
+
+
+@router.get("/upstream/stats")
+async def upstream_stats(governor: UpstreamGovernor = Depends(get_upstream_governor)):
+    """Upstream call pacing: current window usage and throttling counters."""
+    return governor.stats()
+
+
 @router.get("/health")
 async def health_check():
     """Simple health check endpoint."""
@@ -0,0 +1,197 @@
+"""Weighted fair scheduling of LLM calls across API keys (deficit round robin)."""
+
+import asyncio
+import contextlib
+import logging
+from collections import deque
+from typing import Any, AsyncIterator, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def parse_key_weights(spec: str) -> Dict[str, float]:
+    """Parse ``"key-a:2,key-b:0.5"`` into a weight per API key."""
+    weights: Dict[str, float] = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        key, separator, weight = item.rpartition(":")
+        key = key.strip()
+        if not separator or not key:
+            raise ValueError(f"Invalid scheduler weight '{item}', expected 'key:weight'")
+        weights[key] = float(weight)
+        if weights[key] <= 0:
+            raise ValueError(f"Scheduler weight for '{key}' must be positive")
+    return weights
+
+
+class _KeyQueue:
+    __slots__ = ("waiters", "deficit", "running", "turn_open")
+
+    def __init__(self):
+        # (cost, future) of calls waiting for a slot
+        self.waiters: deque = deque()
+        self.deficit = 0.0
+        self.running = 0
+        self.turn_open = False
+
+
+class FairScheduler:
+    """
+    Grants LLM call slots across API keys by deficit round robin.
+
+    At most ``max_concurrent`` calls run at once, and at most
+    ``per_key_limit`` of them for any one key. Waiting calls are queued per
+    key; each key with waiting calls takes its turn in round-robin order and
+    earns ``quantum`` times its weight in credit per turn, spending it on the
+    estimated token cost of its calls. A tenant fanning out a huge table
+    therefore gets its weighted share of slots, while a small request from
+    another key is served on that key's next turn instead of after the
+    whole backlog.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        per_key_limit: int = 4,
+        quantum: float = 1000.0,
+        weights: Optional[Dict[str, float]] = None,
+        default_weight: float = 1.0
+    ):
+        self.max_concurrent = max(1, max_concurrent)
+        self.per_key_limit = max(1, per_key_limit)
+        self.quantum = max(1.0, quantum)
+        self.weights = weights or {}
+        self.default_weight = default_weight
+        self._keys: Dict[Hashable, _KeyQueue] = {}
+        # Keys with waiting calls, in round-robin order
+        self._active: deque = deque()
+        self._running = 0
+        self._granted = 0
+
+    @contextlib.asynccontextmanager
+    async def slot(self, key: Hashable, cost: float) -> AsyncIterator[None]:
+        """Hold a call slot for ``key`` for the duration of the block."""
+        await self.acquire(key, cost)
+        try:
+            yield
+        finally:
+            self.release(key)
+
+    async def acquire(self, key: Hashable, cost: float) -> None:
+        """Wait until a call of estimated ``cost`` tokens may run for ``key``."""
+        state = self._keys.get(key)
+        if state is None:
+            state = _KeyQueue()
+            self._keys[key] = state
+        if not state.waiters:
+            self._active.append(key)
+
+        future = asyncio.get_running_loop().create_future()
+        state.waiters.append((cost, future))
+        self._dispatch()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just before the cancellation landed
+                self.release(key)
+            else:
+                self._forget(key, state, future)
+            raise
+
+    def release(self, key: Hashable) -> None:
+        """Free a slot held by ``key`` and hand it to the next waiting call."""
+        state = self._keys[key]
+        state.running -= 1
+        self._running -= 1
+        if state.running == 0 and not state.waiters:
+            del self._keys[key]
+        self._dispatch()
+
+    def weight(self, key: Hashable) -> float:
+        """Scheduling weight of ``key``."""
+        return self.weights.get(key, self.default_weight)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return slot usage and queue sizes (without exposing keys)."""
+        return {
+            "max_concurrent": self.max_concurrent,
+            "per_key_limit": self.per_key_limit,
+            "running": self._running,
+            "queued": sum(len(state.waiters) for state in self._keys.values()),
+            "active_keys": len(self._active),
+            "granted": self._granted
+        }
+
+    def _dispatch(self) -> None:
+        active = self._active
+        while self._running < self.max_concurrent and active:
+            progressed = False
+            eligible = False
+            for _ in range(len(active)):
+                key = active[0]
+                state = self._keys[key]
+                if state.running >= self.per_key_limit:
+                    state.turn_open = False
+                    active.rotate(-1)
+                    continue
+
+                eligible = True
+                if not state.turn_open:
+                    state.turn_open = True
+                    state.deficit += self.quantum * self.weight(key)
+
+                cost, future = state.waiters[0]
+                if future.done():
+                    # Cancelled while queued; its task has not run _forget yet
+                    state.waiters.popleft()
+                    if not state.waiters:
+                        active.popleft()
+                        self._retire(key, state)
+                    progressed = True
+                    break
+                if cost > state.deficit:
+                    # Turn over; the credit carries to the next round
+                    state.turn_open = False
+                    active.rotate(-1)
+                    continue
+
+                state.waiters.popleft()
+                future.set_result(None)
+                state.deficit -= cost
+                state.running += 1
+                self._running += 1
+                self._granted += 1
+                if not state.waiters:
+                    state.deficit = 0.0
+                    state.turn_open = False
+                    active.popleft()
+                progressed = True
+                break
+
+            if not progressed and not eligible:
+                # Every waiting key is at its concurrency cap
+                return
+
+    def _forget(self, key: Hashable, state: _KeyQueue, future: asyncio.Future) -> None:
+        """Drop a cancelled waiter from its key's queue (unless ``_dispatch`` already did)."""
+        for index, (_, waiter) in enumerate(state.waiters):
+            if waiter is future:
+                del state.waiters[index]
+                break
+        # A retired state may since have been replaced by a new one for the same key
+        if not state.waiters and self._keys.get(key) is state:
+            with contextlib.suppress(ValueError):
+                self._active.remove(key)
+            self._retire(key, state)
+        self._dispatch()
+
+    def _retire(self, key: Hashable, state: _KeyQueue) -> None:
+        """Reset a key that has no waiting calls left (already removed from ``_active``)."""
+        state.deficit = 0.0
+        state.turn_open = False
+        if state.running == 0:
+            del self._keys[key]
@@ -1,15 +1,24 @@
 """Security utilities for API key validation and rate limiting."""
 
-import time
+import asyncio
 import logging
-from typing import Dict, Optional
+from typing import Optional
 from fastapi import HTTPException, status
 from config import settings
+from app.rate_limit import create_rate_limit_backend
 
 logger = logging.getLogger(__name__)
 
-# Simple in-memory rate limiting (for MVP)
-rate_limit_storage: Dict[str, Dict[str, float]] = {}
+# Per-key rate limiting; the sqlite backend is shared by all workers on the host
+rate_limiter = create_rate_limit_backend(
+    settings.RATE_LIMIT_BACKEND,
+    settings.RATE_LIMIT_ALGORITHM,
+    settings.RATE_LIMIT_PER_MINUTE,
+    window_seconds=60,
+    max_keys=settings.RATE_LIMIT_MAX_KEYS,
+    idle_seconds=settings.RATE_LIMIT_IDLE_SECONDS,
+    sqlite_path=settings.RATE_LIMIT_SQLITE_PATH
+)
 
 
 def validate_api_key(api_key: Optional[str]) -> bool:
@@ -24,28 +33,7 @@ def validate_api_key(api_key: Optional[str]) -> bool:
 
 def check_rate_limit(api_key: str) -> bool:
     """Check if API key has exceeded rate limit."""
-    current_time = time.time()
-    minute_window = int(current_time // 60)
-    
-    if api_key not in rate_limit_storage:
-        rate_limit_storage[api_key] = {}
-    
-    user_limits = rate_limit_storage[api_key]
-    
-    # Clean old windows
-    for window in list(user_limits.keys()):
-        if int(window) < minute_window - 1:  # Keep only current and previous window
-            del user_limits[window]
-    
-    # Check current window
-    current_requests = user_limits.get(str(minute_window), 0)
-    
-    if current_requests >= settings.RATE_LIMIT_PER_MINUTE:
-        return False
-    
-    # Increment counter
-    user_limits[str(minute_window)] = current_requests + 1
-    return True
+    return rate_limiter.allow(api_key)
 
 
 def get_api_key_from_header(header: Optional[str]) -> Optional[str]:
@@ -67,7 +55,12 @@ async def verify_api_key(api_key: Optional[str]) -> str:
             detail="Invalid or missing API key"
         )
     
-    if not check_rate_limit(api_key):
+    if rate_limiter.blocking:
+        # The sqlite backend writes to disk; keep the event loop free meanwhile
+        allowed = await asyncio.to_thread(check_rate_limit, api_key)
+    else:
+        allowed = check_rate_limit(api_key)
+    if not allowed:
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Rate limit exceeded. Please try again later."
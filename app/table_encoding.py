@@ -0,0 +1,147 @@
+"""Compact table encodings used when sending table data to the LLM."""
+
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ENCODING_MODES = ("repr", "json", "tsv")
+
+# A column is dictionary-encoded when it has at most this share of distinct values
+DICTIONARY_MAX_DISTINCT_RATIO = 0.5
+DICTIONARY_MIN_ROWS = 4
+
+
+def table_columns(table_data: List[Dict[str, Any]]) -> List[str]:
+    """Union of row keys in first-seen order."""
+    columns: Dict[str, None] = {}
+    for row in table_data:
+        for key in row:
+            if key not in columns:
+                columns[key] = None
+    return list(columns)
+
+
+def _dictionary_columns(table_data: List[Dict[str, Any]], columns: List[str]) -> Dict[str, List[str]]:
+    """Pick string columns with heavy repetition and build their value dictionaries."""
+    if len(table_data) < DICTIONARY_MIN_ROWS:
+        return {}
+
+    dictionaries = {}
+    for column in columns:
+        values: Dict[str, None] = {}
+        for row in table_data:
+            value = row.get(column)
+            if value is None:
+                continue
+            if not isinstance(value, str):
+                break
+            values[value] = None
+        else:
+            if values and len(values) <= len(table_data) * DICTIONARY_MAX_DISTINCT_RATIO:
+                dictionaries[column] = list(values)
+    return dictionaries
+
+
+class TableEncoder:
+    """Serializes table rows as a header plus value rows, optionally dictionary-encoded."""
+
+    def __init__(self, mode: str = "json", dictionary: bool = True):
+        if mode not in ENCODING_MODES:
+            raise ValueError(f"Unknown table encoding '{mode}', expected one of {ENCODING_MODES}")
+        self.mode = mode
+        self.dictionary = dictionary
+
+    def encode(self, table_data: List[Dict[str, Any]]) -> Tuple[str, str]:
+        """Return (description, encoded table) ready to be placed in a prompt."""
+        if self.mode == "repr":
+            return "list of row objects", str(table_data)
+
+        columns = table_columns(table_data)
+        dictionaries = _dictionary_columns(table_data, columns) if self.dictionary else {}
+        codes = {column: {value: i for i, value in enumerate(values)} for column, values in dictionaries.items()}
+
+        if self.mode == "json":
+            return self._encode_json(table_data, columns, dictionaries, codes)
+        return self._encode_tsv(table_data, columns, dictionaries, codes)
+
+    def _encode_json(self, table_data, columns, dictionaries, codes) -> Tuple[str, str]:
+        rows = []
+        for row in table_data:
+            cells = []
+            for column in columns:
+                value = row.get(column)
+                if column in codes and value is not None:
+                    value = codes[column][value]
+                cells.append(value)
+            rows.append(cells)
+
+        payload: Dict[str, Any] = {"columns": columns}
+        description = (
+            'compact JSON: "columns" lists the field names and each entry of "rows" '
+            "holds one record's values in column order, row 0 first"
+        )
+        if dictionaries:
+            payload["dictionaries"] = dictionaries
+            description += (
+                '; cells of columns listed in "dictionaries" are indexes into that '
+                "column's value list"
+            )
+        payload["rows"] = rows
+        return description, json.dumps(payload, separators=(",", ":"), ensure_ascii=False, default=str)
+
+    def _encode_tsv(self, table_data, columns, dictionaries, codes) -> Tuple[str, str]:
+        lines = []
+        for column, values in dictionaries.items():
+            entries = "\t".join(f"{i}={_tsv_cell(value)}" for i, value in enumerate(values))
+            lines.append(f"#{column}\t{entries}")
+        lines.append("\t".join(columns))
+
+        for row in table_data:
+            cells = []
+            for column in columns:
+                value = row.get(column)
+                if column in codes and value is not None:
+                    value = codes[column][value]
+                cells.append(_tsv_cell(value))
+            lines.append("\t".join(cells))
+
+        description = (
+            "TSV: the first non-# line is the header and every following line is one "
+            "record, row 0 first; empty cells are null and nested values are JSON"
+        )
+        if dictionaries:
+            description += (
+                '; lines starting with "#<column>" define numbered values for that '
+                "column and its cells hold those numbers"
+            )
+        return description, "\n".join(lines)
+
+
+def _tsv_cell(value: Any) -> str:
+    """Render a single TSV cell."""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value.replace("\t", " ").replace("\n", " ")
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def decode_table(encoded: str, mode: str) -> Optional[List[Dict[str, Any]]]:
+    """Rebuild rows from a ``json`` encoding; returns None for other modes."""
+    if mode != "json":
+        return None
+
+    payload = json.loads(encoded)
+    columns = payload["columns"]
+    dictionaries = payload.get("dictionaries", {})
+    rows = []
+    for cells in payload["rows"]:
+        row = {}
+        for column, value in zip(columns, cells):
+            if column in dictionaries and value is not None:
+                value = dictionaries[column][value]
+            row[column] = value
+        rows.append(row)
+    return rows
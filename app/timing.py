@@ -0,0 +1,86 @@
+"""Per-request stage timing, recorded into the stage histogram and the Server-Timing header."""
+
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+from app.metrics import STAGE_SECONDS
+
+# Server-Timing metric names of the pipeline stages
+SERVER_TIMING_NAMES = {
+    "auth": "auth",
+    "intent": "classify",
+    "queue": "queue",
+    "prompt_build": "prompt",
+    "llm_call": "llm",
+    "parse": "parse",
+    "execute": "execute",
+    "serialize": "serialize"
+}
+
+
+class RequestTiming:
+    """
+    Time spent per stage while serving one request.
+
+    Durations of stages that run several times (one model call per chunk,
+    say) are summed, so with concurrent chunks ``llm`` can exceed ``total``.
+    """
+
+    __slots__ = ("started", "stages", "cache")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.cache: Optional[str] = None
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def header(self) -> str:
+        """The ``Server-Timing`` header value, durations in milliseconds."""
+        entries = [
+            f"{SERVER_TIMING_NAMES.get(stage, stage)};dur={seconds * 1000:.1f}"
+            for stage, seconds in self.stages.items()
+        ]
+        if self.cache is not None:
+            entries.append(f'cache;desc="{self.cache}"')
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+
+_current: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+
+def start_request_timing() -> RequestTiming:
+    """Start timing the current request; tasks spawned from it record into the same timing."""
+    timing = RequestTiming()
+    _current.set(timing)
+    return timing
+
+
+def current_timing() -> Optional[RequestTiming]:
+    """Timing of the current request, or None when it is not being timed."""
+    return _current.get()
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    """Record ``seconds`` spent in ``stage``."""
+    STAGE_SECONDS.observe(seconds, (stage,))
+    timing = _current.get()
+    if timing is not None:
+        timing.add(stage, seconds)
+
+
+class stage:
+    """Context manager recording the wall-clock duration of the block as ``name``."""
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        observe_stage(self.name, time.perf_counter() - self.start)
@@ -0,0 +1,147 @@
+"""Persistent memo of per-value transformation results, shared across requests and workers."""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+from app.cache import normalize_prompt
+
+logger = logging.getLogger(__name__)
+
+# Keys looked up per query, under SQLite's bound parameter limit
+_LOOKUP_BATCH = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS value_results (
+    key TEXT PRIMARY KEY,
+    fields TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS value_results_last_used ON value_results (last_used_at);
+"""
+
+
+class ValueResultStore:
+    """
+    SQLite-backed memo of (transformation intent, input value) -> derived fields.
+
+    Keys are hashes, so input values are never written to disk; the derived
+    fields are. Entries older than ``ttl_seconds`` count as misses and are
+    removed, and once more than ``max_entries`` are stored the least recently
+    used ones are evicted. WAL mode lets several worker processes share one
+    file.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100000, ttl_seconds: float = 30 * 24 * 3600):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def intent_key(user_prompt: str, column: str, template_version: str) -> str:
+        """Identity of a transformation: normalized prompt, source column name and prompt template."""
+        raw = f"{template_version}\x00{normalize_prompt(user_prompt)}\x00{column}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def entry_key(intent_key: str, value_key: str) -> str:
+        return hashlib.sha256(f"{intent_key}\x00{value_key}".encode("utf-8")).hexdigest()
+
+    def get_many(self, intent_key: str, value_keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Stored fields for each of ``value_keys`` that has a live entry."""
+        by_entry = {self.entry_key(intent_key, key): key for key in value_keys}
+        found: Dict[str, Dict[str, Any]] = {}
+        now = time.time()
+        expired = []
+        entries = list(by_entry)
+
+        with self._lock:
+            for start in range(0, len(entries), _LOOKUP_BATCH):
+                batch = entries[start:start + _LOOKUP_BATCH]
+                rows = self._connection.execute(
+                    f"SELECT key, fields, created_at FROM value_results WHERE key IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+                for entry, fields, created_at in rows:
+                    if self.ttl_seconds > 0 and now - created_at >= self.ttl_seconds:
+                        expired.append(entry)
+                        continue
+                    found[by_entry[entry]] = json.loads(fields)
+
+            hit_entries = [self.entry_key(intent_key, key) for key in found]
+            with self._connection:
+                self._connection.executemany(
+                    "UPDATE value_results SET last_used_at = ?, hits = hits + 1 WHERE key = ?",
+                    [(now, entry) for entry in hit_entries]
+                )
+                self._connection.executemany("DELETE FROM value_results WHERE key = ?", [(entry,) for entry in expired])
+            self.hits += len(found)
+            self.misses += len(entries) - len(found)
+        return found
+
+    def set_many(self, intent_key: str, fields_by_value: Dict[str, Dict[str, Any]]) -> None:
+        """Store the derived fields of each value, then evict down to ``max_entries``."""
+        if not fields_by_value:
+            return
+        now = time.time()
+        rows = [
+            (self.entry_key(intent_key, key), json.dumps(fields, ensure_ascii=False, default=str), now, now)
+            for key, fields in fields_by_value.items()
+        ]
+        with self._lock:
+            with self._connection:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO value_results (key, fields, created_at, last_used_at) VALUES (?, ?, ?, ?)",
+                    rows
+                )
+                excess = self._count() - self.max_entries
+                if excess > 0:
+                    self._connection.execute(
+                        "DELETE FROM value_results WHERE key IN "
+                        "(SELECT key FROM value_results ORDER BY last_used_at LIMIT ?)",
+                        (excess,)
+                    )
+                    self.evictions += excess
+
+    def stats(self) -> Dict[str, Any]:
+        """Return occupancy and hit/miss counters of this process."""
+        with self._lock:
+            entries = self._count()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def _count(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM value_results").fetchone()[0]
+
+
+def open_value_store(path: str, max_entries: int, ttl_seconds: float) -> Optional[ValueResultStore]:
+    """Open the store at ``path``, or return None (memo disabled) when it cannot be opened."""
+    try:
+        return ValueResultStore(path, max_entries=max_entries, ttl_seconds=ttl_seconds)
+    except sqlite3.Error as e:
+        logger.error(f"Could not open value result store at {path}: {e}")
+        return None
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Micro-benchmark of LLM response JSON extraction on large synthetic responses."""
+
+import sys
+import os
+import json
+import re
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.json_extract import extract_json
+from benchmarks.fixtures import make_contact_signals
+
+ROW_COUNTS = [1000, 5000, 10000, 50000]
+REPEATS = 3
+
+
+def legacy_extract(text):
+    """The previous approach: whole-string json.loads, then a greedy regex and a second parse."""
+    try:
+        return json.loads(text)
+    except Exception:
+        match = re.search(r'\{.*\}', text, re.DOTALL)
+        if match:
+            return json.loads(match.group(0))
+        raise ValueError("no JSON found")
+
+
+def make_responses(rows):
+    """Response shapes seen from the model for the same payload."""
+    for row in rows:
+        row["nationality"] = "German"
+        row["reasoning"] = "Ratke is a German surname, isn't it? {maybe}"
+    body = json.dumps({"TRANSFORMED_DATA": rows, "EXPLANATION": "Added nationality."}, indent=2)
+    array = json.dumps(rows, indent=2)
+    return {
+        "plain": body,
+        "fenced + prose": f"Here's the transformed data you asked for:\n```json\n{body}\n```\nAll rows were processed.",
+        "labelled array": f"TRANSFORMED_DATA: {array}\nEXPLANATION: Added nationality.",
+        "trailing brace": f"{body}\nNote: values in {{braces}} are estimates.",
+    }
+
+
+def timed(func, text):
+    best = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        try:
+            func(text)
+            ok = True
+        except ValueError:
+            ok = False
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, ok
+
+
+def main():
+    print("JSON extraction benchmark (best of 3, ms)")
+    print("=" * 72)
+    print(f"{'rows':>6}  {'shape':<16}{'size MB':>9}{'legacy':>12}{'single-pass':>14}")
+    for count in ROW_COUNTS:
+        for shape, text in make_responses(make_contact_signals(count)).items():
+            legacy, legacy_ok = timed(legacy_extract, text)
+            single, single_ok = timed(extract_json, text)
+            legacy_cell = f"{legacy * 1000:.1f}" if legacy_ok else "failed"
+            single_cell = f"{single * 1000:.1f}" if single_ok else "failed"
+            print(f"{count:>6}  {shape:<16}{len(text) / 1e6:>9.2f}{legacy_cell:>12}{single_cell:>14}")
+
+
+if __name__ == "__main__":
+    main()
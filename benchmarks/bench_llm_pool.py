@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Benchmark per-request LLM client construction against the shared client pool."""
+
+import sys
+import os
+import asyncio
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Client construction does not touch the network, so a dummy key is enough
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark-dummy-key")
+
+from app.llm_pool import LLMClientPool, create_llm_client
+from app.llm_service import LLMService
+
+ITERATIONS = 200
+
+
+def bench_per_request(iterations: int) -> float:
+    """Old behaviour: a brand new client for every request."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        LLMService(llm=create_llm_client())
+    return time.perf_counter() - start
+
+
+async def bench_pooled(iterations: int, pool: LLMClientPool) -> float:
+    """New behaviour: every request borrows a pooled client."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        LLMService(llm=await pool.acquire())
+    return time.perf_counter() - start
+
+
+def main():
+    pool = LLMClientPool()
+    pool_start = time.perf_counter()
+    pool.start()
+    pool_startup = time.perf_counter() - pool_start
+
+    per_request = bench_per_request(ITERATIONS)
+    pooled = asyncio.run(bench_pooled(ITERATIONS, pool))
+
+    print("LLM client setup benchmark")
+    print("=" * 50)
+    print(f"Iterations:               {ITERATIONS}")
+    print(f"Pool size:                {pool.size} (startup {pool_startup * 1000:.2f} ms)")
+    print(f"Per-request client:       {per_request / ITERATIONS * 1e6:10.1f} us/request")
+    print(f"Pooled client:            {pooled / ITERATIONS * 1e6:10.1f} us/request")
+    print(f"Overhead saved:           {(per_request - pooled) / ITERATIONS * 1e6:10.1f} us/request")
+    print(f"Pool stats:               {pool.stats()}")
+
+
+if __name__ == "__main__":
+    main()
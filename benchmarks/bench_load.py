@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test of /api/v1/process against the fake LLM backend.
+
+Drives ``app.main:app`` in-process through an httpx ASGI transport, sweeping
+concurrency, table size and row width, and writes latency percentiles,
+throughput, peak RSS and event-loop lag for every scenario as JSON.
+
+    python benchmarks/bench_load.py --concurrency 1,8,32 --rows 10,100 --width 12,48
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import json
+import math
+import platform
+import resource
+import statistics
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Must be set before the application settings are loaded; explicit env vars win
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("FAKE_LLM_LATENCY_MS", "50")
+os.environ.setdefault("RESPONSE_CACHE_ENABLED", "False")
+os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "100000000")
+
+import httpx
+from app.main import app
+from config import settings
+from benchmarks.fixtures import make_contact_signals
+
+LAG_INTERVAL = 0.01
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of ``values``."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """Percentiles of a list of seconds, in milliseconds."""
+    return {
+        "p50": round(percentile(values, 0.50) * 1000, 2),
+        "p95": round(percentile(values, 0.95) * 1000, 2),
+        "p99": round(percentile(values, 0.99) * 1000, 2),
+        "mean": round(statistics.fmean(values) * 1000, 2) if values else 0.0,
+        "max": round(max(values) * 1000, 2) if values else 0.0
+    }
+
+
+def make_table(rows: int, width: int) -> List[Dict[str, Any]]:
+    """Contact-signal rows padded (or trimmed) to ``width`` fields."""
+    table = make_contact_signals(rows)
+    for index, row in enumerate(table):
+        for column in range(len(row), width):
+            row[f"extra_{column}"] = f"value {index}-{column}"
+        for key in list(row)[width:]:
+            del row[key]
+    return table
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+async def monitor_loop_lag(samples: List[float], stop: asyncio.Event) -> None:
+    """Record how late the event loop wakes a sleeper that asked for LAG_INTERVAL."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(LAG_INTERVAL)
+        samples.append(max(0.0, time.perf_counter() - start - LAG_INTERVAL))
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    concurrency: int,
+    rows: int,
+    width: int,
+    requests: int,
+    stream: bool
+) -> Dict[str, Any]:
+    """Send ``requests`` requests from ``concurrency`` concurrent clients."""
+    table = make_table(rows, width)
+    headers = {"Accept": "application/x-ndjson"} if stream else {}
+    latencies: List[float] = []
+    status_counts: Dict[str, int] = {}
+    sent = 0
+
+    async def worker(worker_id: int) -> None:
+        nonlocal sent
+        while sent < requests:
+            sequence = sent
+            sent += 1
+            body = {
+                # Distinct prompts so no two requests share a cache entry
+                "user_prompt": f"Label each prospect by likely budget (request {sequence})",
+                "request_data": {"table_data": table}
+            }
+            start = time.perf_counter()
+            response = await client.post(
+                "/api/v1/process",
+                json=body,
+                headers={**headers, "X-API-Key": f"load-test-{worker_id}"}
+            )
+            latencies.append(time.perf_counter() - start)
+            status_counts[str(response.status_code)] = status_counts.get(str(response.status_code), 0) + 1
+
+    lag_samples: List[float] = []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(monitor_loop_lag(lag_samples, stop))
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker(i) for i in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await lag_task
+
+    return {
+        "concurrency": concurrency,
+        "rows": rows,
+        "width": width,
+        "stream": stream,
+        "requests": requests,
+        "status_counts": status_counts,
+        "errors": requests - status_counts.get("200", 0),
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_s": round(requests / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": summarize(latencies),
+        "loop_lag_ms": summarize(lag_samples),
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    # The ASGI transport does not send lifespan events, so run startup by hand
+    await app.router.startup()
+    transport = httpx.ASGITransport(app=app)
+    scenarios = []
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=None) as client:
+            for concurrency in args.concurrency:
+                for rows in args.rows:
+                    for width in args.width:
+                        result = await run_scenario(client, concurrency, rows, width, args.requests, args.stream)
+                        scenarios.append(result)
+                        latency = result["latency_ms"]
+                        print(
+                            f"c={concurrency:<4} rows={rows:<5} width={width:<4} "
+                            f"{result['requests_per_s']:8.1f} req/s  "
+                            f"p50={latency['p50']:8.1f}ms p95={latency['p95']:8.1f}ms p99={latency['p99']:8.1f}ms  "
+                            f"lag p99={result['loop_lag_ms']['p99']:6.1f}ms  "
+                            f"rss={result['peak_rss_mb']:7.1f}MB  errors={result['errors']}"
+                        )
+    finally:
+        await app.router.shutdown()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "llm_backend": settings.LLM_BACKEND,
+            "fake_llm_latency_ms": settings.FAKE_LLM_LATENCY_MS,
+            "fake_llm_latency_distribution": settings.FAKE_LLM_LATENCY_DISTRIBUTION,
+            "fake_llm_tokens_per_second": settings.FAKE_LLM_TOKENS_PER_SECOND,
+            "table_encoding": settings.TABLE_ENCODING,
+            "transform_output_mode": settings.TRANSFORM_OUTPUT_MODE,
+            "chunk_size": settings.LLM_CHUNK_SIZE,
+            "max_concurrency": settings.LLM_MAX_CONCURRENCY
+        },
+        "scenarios": scenarios
+    }
+
+
+def int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int_list, default=[1, 8, 32], help="comma-separated client counts")
+    parser.add_argument("--rows", type=int_list, default=[10, 100], help="comma-separated table sizes")
+    parser.add_argument("--width", type=int_list, default=[12], help="comma-separated fields per row")
+    parser.add_argument("--requests", type=int, default=100, help="requests per scenario")
+    parser.add_argument("--stream", action="store_true", help="request NDJSON streaming responses")
+    parser.add_argument("--output", default="", help="JSON results file (default: benchmarks/results/load-<time>.json)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    output = args.output
+    if not output:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        output = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", f"load-{stamp}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
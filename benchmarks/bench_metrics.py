@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Benchmark the hot-path cost of recording metrics."""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.metrics import Counter, Histogram
+
+ITERATIONS = 200_000
+
+
+def main():
+    histogram = Histogram("bench_stage_duration_seconds", "Benchmark histogram", ("stage",))
+    counter = Counter("bench_tokens_total", "Benchmark counter", ("direction",))
+
+    start = time.perf_counter()
+    for i in range(ITERATIONS):
+        histogram.observe(i * 1e-6, ("llm_call",))
+    observe = (time.perf_counter() - start) / ITERATIONS
+
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        with histogram.time(("parse",)):
+            pass
+    timed = (time.perf_counter() - start) / ITERATIONS
+
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        counter.inc(40, ("input",))
+    inc = (time.perf_counter() - start) / ITERATIONS
+
+    print("Metrics recording benchmark")
+    print("=" * 50)
+    print(f"histogram.observe:     {observe * 1e9:8.0f} ns")
+    print(f"histogram.time block:  {timed * 1e9:8.0f} ns")
+    print(f"counter.inc:           {inc * 1e9:8.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
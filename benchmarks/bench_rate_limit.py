@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Benchmark rate limit checks and memory at 100k distinct API keys."""
+
+import sys
+import os
+import time
+import tracemalloc
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.rate_limit import TokenBucketLimiter, SlidingLogLimiter
+
+KEYS = 100_000
+LIMIT = 100
+MAX_KEYS = 10_000
+
+
+class LegacyLimiter:
+    """The previous dict-of-dicts fixed-window limiter, kept for comparison."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.storage = {}
+
+    def allow(self, api_key):
+        minute_window = int(time.time() // 60)
+        if api_key not in self.storage:
+            self.storage[api_key] = {}
+        user_limits = self.storage[api_key]
+        for window in list(user_limits.keys()):
+            if int(window) < minute_window - 1:
+                del user_limits[window]
+        current_requests = user_limits.get(str(minute_window), 0)
+        if current_requests >= self.limit:
+            return False
+        user_limits[str(minute_window)] = current_requests + 1
+        return True
+
+
+def run(name, limiter):
+    keys = [f"key-{i}" for i in range(KEYS)]
+    tracemalloc.start()
+    start = time.perf_counter()
+    for key in keys:
+        limiter.allow(key)
+    # A second pass over a hot subset exercises the existing-key path
+    for key in keys[-1000:] * 10:
+        limiter.allow(key)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    checks = KEYS + 10_000
+    tracked = limiter.stats()["tracked_keys"] if hasattr(limiter, "stats") else len(limiter.storage)
+    print(f"{name:<28}{elapsed / checks * 1e6:>10.2f}{peak / 1e6:>12.1f}{tracked:>14}")
+
+
+def main():
+    print(f"Rate limiter benchmark ({KEYS} distinct keys, cap {MAX_KEYS} for new limiters)")
+    print("=" * 64)
+    print(f"{'limiter':<28}{'us/check':>10}{'peak MB':>12}{'tracked keys':>14}")
+    run("legacy fixed window", LegacyLimiter(LIMIT))
+    run("token bucket", TokenBucketLimiter(LIMIT, max_keys=MAX_KEYS))
+    run("sliding log", SlidingLogLimiter(LIMIT, max_keys=MAX_KEYS))
+
+
+if __name__ == "__main__":
+    main()
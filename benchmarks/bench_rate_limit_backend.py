@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Benchmark per-request overhead of the rate limit backends and check cross-process accuracy."""
+
+import sys
+import os
+import multiprocessing
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.rate_limit import SQLiteRateLimitBackend, TokenBucketLimiter
+
+CHECKS = 20_000
+KEYS = 1000
+WORKERS = 4
+LIMIT = 100
+
+
+def time_checks(backend, checks):
+    start = time.perf_counter()
+    for i in range(checks):
+        backend.allow(f"key-{i % KEYS}")
+    return (time.perf_counter() - start) / checks
+
+
+def hammer_one_key(path, attempts, results):
+    """Worker process: try ``attempts`` requests against one shared key."""
+    backend = SQLiteRateLimitBackend(path, LIMIT)
+    allowed = sum(backend.allow("shared-key") for _ in range(attempts))
+    results.put(allowed)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rate-limits.db")
+
+        print("Rate limit backend benchmark")
+        print("=" * 50)
+        memory = time_checks(TokenBucketLimiter(LIMIT), CHECKS)
+        sqlite = time_checks(SQLiteRateLimitBackend(path, LIMIT), CHECKS)
+        print(f"memory token bucket:   {memory * 1e6:8.1f} us/check")
+        print(f"sqlite token bucket:   {sqlite * 1e6:8.1f} us/check")
+
+        # Every worker fires LIMIT requests at the same key within one window
+        results = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(target=hammer_one_key, args=(path, LIMIT, results))
+            for _ in range(WORKERS)
+        ]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        allowed = sum(results.get() for _ in workers)
+
+        print(f"\n{WORKERS} processes x {LIMIT} requests on one key ({elapsed:.2f}s)")
+        print(f"allowed: {allowed} (limit {LIMIT}; per-worker memory limiters would allow {LIMIT * WORKERS})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Compare prompt size of the table encodings on the contact-signal fixture."""
+
+import sys
+import os
+import re
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.table_encoding import TableEncoder
+from benchmarks.fixtures import CONTACT_SIGNALS, make_contact_signals
+
+# Rough BPE approximation: words, numbers and individual punctuation marks
+_TOKEN_RE = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+ENCODERS = [
+    ("repr (current)", TableEncoder("repr")),
+    ("json", TableEncoder("json", dictionary=False)),
+    ("json + dictionary", TableEncoder("json", dictionary=True)),
+    ("tsv", TableEncoder("tsv", dictionary=False)),
+    ("tsv + dictionary", TableEncoder("tsv", dictionary=True)),
+]
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a prompt fragment."""
+    return len(_TOKEN_RE.findall(text))
+
+
+def report(title, table_data):
+    print(f"\n{title} ({len(table_data)} rows)")
+    print(f"{'encoding':<20}{'chars':>10}{'tokens':>10}{'vs repr':>10}")
+    baseline = None
+    for name, encoder in ENCODERS:
+        description, encoded = encoder.encode(table_data)
+        text = f"{description}\n{encoded}"
+        tokens = estimate_tokens(text)
+        baseline = baseline or tokens
+        print(f"{name:<20}{len(text):>10}{tokens:>10}{tokens / baseline:>9.0%}")
+
+
+def main():
+    print("Table encoding token benchmark")
+    print("=" * 50)
+    report("Contact-signal fixture from test_parsing.py", CONTACT_SIGNALS)
+    report("Synthetic contact signals", make_contact_signals(500))
+
+
+if __name__ == "__main__":
+    main()
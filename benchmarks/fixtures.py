@@ -0,0 +1,64 @@
+"""Shared table fixtures for the benchmarks."""
+
+import copy
+import random
+from typing import Any, Dict, List
+
+# The contact-signal rows used by test_parsing.py, without the LLM-added fields
+CONTACT_SIGNALS: List[Dict[str, Any]] = [
+    {
+        "id": "f2d9969a-b1cb-4dd2-bb5d-099d217aa2c3",
+        "prospectName": "Herbert Runolfsdottir",
+        "company": "Wilderman - Medhurst",
+        "title": "Direct Quality Analyst",
+        "signalType": "tech_adoption",
+        "urgency": "medium",
+        "industry": "Automotive",
+        "companySize": "1-50",
+        "description": "Migrated to Cloud Infrastructure platform",
+        "timestamp": "2025-08-20T15:51:33.591Z",
+        "confidence": 80,
+        "actionTaken": False
+    },
+    {
+        "id": "a66d3de7-9487-4140-bb5f-5b4075ac26bd",
+        "prospectName": "Dr. Jermaine Bins PhD",
+        "company": "Hickle Group",
+        "title": "Senior Solutions Executive",
+        "signalType": "hiring",
+        "urgency": "medium",
+        "industry": "Hospitality",
+        "companySize": "1-50",
+        "description": "Recruiting 6 Product Manager professionals for North Thurmanburgh office",
+        "timestamp": "2025-08-20T02:24:40.239Z",
+        "confidence": 83,
+        "actionTaken": False
+    },
+    {
+        "id": "b96702f1-aa93-4738-9c3c-fd817bed510d",
+        "prospectName": "Francis Ratke",
+        "company": "Kessler - Borer",
+        "title": "Dynamic Functionality Architect",
+        "signalType": "intent",
+        "urgency": "high",
+        "industry": "Media & Entertainment",
+        "companySize": "1-50",
+        "description": "Evaluating CRM tools and platforms",
+        "timestamp": "2025-08-15T14:39:09.463Z",
+        "confidence": 86,
+        "actionTaken": False
+    }
+]
+
+
+def make_contact_signals(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Build ``count`` contact-signal rows by recombining the fixture values."""
+    rng = random.Random(seed)
+    columns = {key: [row[key] for row in CONTACT_SIGNALS] for key in CONTACT_SIGNALS[0]}
+    rows = []
+    for i in range(count):
+        row = {key: rng.choice(values) for key, values in columns.items()}
+        row["id"] = f"{rng.getrandbits(128):032x}"
+        row["confidence"] = rng.randint(50, 99)
+        rows.append(copy.deepcopy(row))
+    return rows
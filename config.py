@@ -20,15 +20,117 @@ class Settings:
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
     API_KEY_HEADER: str = os.getenv("API_KEY_HEADER", "X-API-Key")
     
+    # LLM Backend: "gemini" or "fake" (deterministic local stand-in for benchmarking)
+    LLM_BACKEND: str = os.getenv("LLM_BACKEND", "gemini")
+    
     # Google AI
     GOOGLE_API_KEY: str = os.getenv("GOOGLE_API_KEY", "")
+    LLM_MODEL: str = os.getenv("LLM_MODEL", "gemini-1.5-flash")
+    LLM_TEMPERATURE: float = float(os.getenv("LLM_TEMPERATURE", "0.1"))
+    LLM_TRANSPORT: str = os.getenv("LLM_TRANSPORT", "grpc")
+    
+    # Fake LLM Backend
+    FAKE_LLM_LATENCY_MS: float = float(os.getenv("FAKE_LLM_LATENCY_MS", "200"))
+    # "fixed", "uniform", "exponential" or "lognormal"
+    FAKE_LLM_LATENCY_DISTRIBUTION: str = os.getenv("FAKE_LLM_LATENCY_DISTRIBUTION", "lognormal")
+    FAKE_LLM_TOKENS_PER_SECOND: float = float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "0"))
+    FAKE_LLM_ERROR_RATE: float = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+    FAKE_LLM_RATE_LIMIT_RATE: float = float(os.getenv("FAKE_LLM_RATE_LIMIT_RATE", "0"))
+    FAKE_LLM_TRUNCATION_RATE: float = float(os.getenv("FAKE_LLM_TRUNCATION_RATE", "0"))
+    FAKE_LLM_SEED: int = int(os.getenv("FAKE_LLM_SEED", "0"))
+    
+    # LLM Client Pool
+    LLM_POOL_SIZE: int = int(os.getenv("LLM_POOL_SIZE", "4"))
+    LLM_POOL_KEEPALIVE_SECONDS: int = int(os.getenv("LLM_POOL_KEEPALIVE_SECONDS", "300"))
+    
+    # Table Encoding ("json", "tsv" or legacy "repr")
+    TABLE_ENCODING: str = os.getenv("TABLE_ENCODING", "json")
+    TABLE_DICTIONARY_ENCODING: bool = os.getenv("TABLE_DICTIONARY_ENCODING", "False").lower() == "true"
+    
+    # Transformation output: "full" rows or "delta" (only new fields keyed by row index)
+    TRANSFORM_OUTPUT_MODE: str = os.getenv("TRANSFORM_OUTPUT_MODE", "full")
+    
+    # Plan-then-execute: the model writes a table program from a sample that runs over all rows locally
+    PLAN_EXECUTION_ENABLED: bool = os.getenv("PLAN_EXECUTION_ENABLED", "False").lower() == "true"
+    PLAN_SAMPLE_ROWS: int = int(os.getenv("PLAN_SAMPLE_ROWS", "5"))
+    PLAN_CACHE_ENABLED: bool = os.getenv("PLAN_CACHE_ENABLED", "True").lower() == "true"
+    PLAN_CACHE_MAX_ENTRIES: int = int(os.getenv("PLAN_CACHE_MAX_ENTRIES", "1000"))
+    PLAN_CACHE_TTL_SECONDS: int = int(os.getenv("PLAN_CACHE_TTL_SECONDS", "86400"))
+    
+    # Send only the distinct values of the one column a transformation is about, then broadcast the results
+    VALUE_DEDUP_ENABLED: bool = os.getenv("VALUE_DEDUP_ENABLED", "False").lower() == "true"
+    # SQLite file remembering per-value results across requests and restarts (empty disables)
+    VALUE_STORE_PATH: str = os.getenv("VALUE_STORE_PATH", "")
+    VALUE_STORE_MAX_ENTRIES: int = int(os.getenv("VALUE_STORE_MAX_ENTRIES", "100000"))
+    VALUE_STORE_TTL_SECONDS: int = int(os.getenv("VALUE_STORE_TTL_SECONDS", str(30 * 24 * 3600)))
+    
+    # Send one representative of each group of duplicate rows (ignoring the listed fields) and copy its results
+    ROW_DEDUP_ENABLED: bool = os.getenv("ROW_DEDUP_ENABLED", "False").lower() == "true"
+    ROW_DEDUP_IGNORE_FIELDS: str = os.getenv("ROW_DEDUP_IGNORE_FIELDS", "id,timestamp")
+    
+    # Chunked Processing
+    LLM_CHUNK_SIZE: int = int(os.getenv("LLM_CHUNK_SIZE", "50"))
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+    LLM_CHUNK_TIMEOUT_SECONDS: float = float(os.getenv("LLM_CHUNK_TIMEOUT_SECONDS", "60"))
+    
+    # Response Cache
+    RESPONSE_CACHE_ENABLED: bool = os.getenv("RESPONSE_CACHE_ENABLED", "True").lower() == "true"
+    RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+    RESPONSE_CACHE_TTL_SECONDS: int = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+    RESPONSE_CACHE_MAX_BYTES: int = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
     
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_PER_MINUTE", "100"))
+    # "memory" (per worker) or "sqlite" (shared by all workers on the host)
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    RATE_LIMIT_SQLITE_PATH: str = os.getenv("RATE_LIMIT_SQLITE_PATH", "/tmp/llm-backend-rate-limits.db")
+    # "token_bucket" or "sliding_log"
+    RATE_LIMIT_ALGORITHM: str = os.getenv("RATE_LIMIT_ALGORITHM", "token_bucket")
+    RATE_LIMIT_MAX_KEYS: int = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+    RATE_LIMIT_IDLE_SECONDS: int = int(os.getenv("RATE_LIMIT_IDLE_SECONDS", "120"))
+    
+    # Token Quotas (per API key, 0 disables a budget)
+    TOKEN_QUOTA_INPUT_PER_WINDOW: int = int(os.getenv("TOKEN_QUOTA_INPUT_PER_WINDOW", "0"))
+    TOKEN_QUOTA_OUTPUT_PER_WINDOW: int = int(os.getenv("TOKEN_QUOTA_OUTPUT_PER_WINDOW", "0"))
+    TOKEN_QUOTA_WINDOW_SECONDS: int = int(os.getenv("TOKEN_QUOTA_WINDOW_SECONDS", "3600"))
+    
+    # Admission Control (0 in-flight disables)
+    ADMISSION_MAX_IN_FLIGHT: int = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "16"))
+    ADMISSION_MAX_QUEUE: int = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+    ADMISSION_QUEUE_SLO_SECONDS: float = float(os.getenv("ADMISSION_QUEUE_SLO_SECONDS", "10"))
+    
+    # Fair Scheduling of LLM calls across API keys (0 concurrent calls disables)
+    SCHEDULER_MAX_CONCURRENT_CALLS: int = int(os.getenv("SCHEDULER_MAX_CONCURRENT_CALLS", "16"))
+    SCHEDULER_PER_KEY_MAX_CALLS: int = int(os.getenv("SCHEDULER_PER_KEY_MAX_CALLS", "8"))
+    SCHEDULER_QUANTUM_TOKENS: int = int(os.getenv("SCHEDULER_QUANTUM_TOKENS", "2000"))
+    # Comma-separated "api-key:weight" pairs; unlisted keys have weight 1
+    SCHEDULER_KEY_WEIGHTS: str = os.getenv("SCHEDULER_KEY_WEIGHTS", "")
+    
+    # Upstream Governor (provider limits shared by this worker's calls, 0 disables a limit)
+    UPSTREAM_RPM_LIMIT: int = int(os.getenv("UPSTREAM_RPM_LIMIT", "0"))
+    UPSTREAM_TPM_LIMIT: int = int(os.getenv("UPSTREAM_TPM_LIMIT", "0"))
+    UPSTREAM_MAX_WAIT_SECONDS: float = float(os.getenv("UPSTREAM_MAX_WAIT_SECONDS", "10"))
+    UPSTREAM_MAX_RETRIES: int = int(os.getenv("UPSTREAM_MAX_RETRIES", "3"))
+    UPSTREAM_BACKOFF_BASE_SECONDS: float = float(os.getenv("UPSTREAM_BACKOFF_BASE_SECONDS", "1"))
+    UPSTREAM_BACKOFF_MAX_SECONDS: float = float(os.getenv("UPSTREAM_BACKOFF_MAX_SECONDS", "30"))
+    
+    # Metrics (Prometheus text format at /metrics)
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+    # Per-stage durations in a Server-Timing header on /api/v1/process responses
+    SERVER_TIMING_ENABLED: bool = os.getenv("SERVER_TIMING_ENABLED", "False").lower() == "true"
     
     # Logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     
+    # Intent Classification
+    # "keyword", "naive_bayes" or "llm" (no local classifier)
+    INTENT_CLASSIFIER: str = os.getenv("INTENT_CLASSIFIER", "keyword")
+    INTENT_CONFIDENCE_THRESHOLD: float = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.6"))
+    INTENT_TRAINING_FILE: str = os.getenv("INTENT_TRAINING_FILE", "")
+    INTENT_LOG_FILE: str = os.getenv("INTENT_LOG_FILE", "")
+    # Start the likeliest processing path while the LLM classifier runs
+    SPECULATIVE_PROCESSING_ENABLED: bool = os.getenv("SPECULATIVE_PROCESSING_ENABLED", "True").lower() == "true"
+    
     # Intent Classification Categories
     INTENT_CATEGORIES: List[str] = [
         # "data_filtering",    # Filter, search, or select specific data
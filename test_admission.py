@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Test script for admission control in front of the LLM stage."""
+
+import sys
+import os
+import asyncio
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.admission import AdmissionController, Overloaded
+
+
+async def stub_llm_call(admission: AdmissionController, seconds: float) -> str:
+    """A request that holds an admission slot while a stubbed model call runs."""
+    admitted_at = await admission.acquire()
+    try:
+        await asyncio.sleep(seconds)
+        return "ok"
+    finally:
+        admission.release(admitted_at)
+
+
+def test_limits_in_flight_and_queues():
+    """Requests beyond the in-flight limit wait their turn instead of running concurrently."""
+    admission = AdmissionController(max_in_flight=2, max_queue=10, slo_seconds=5)
+
+    async def run():
+        calls = [stub_llm_call(admission, 0.05) for _ in range(6)]
+        peak = 0
+
+        async def watch():
+            nonlocal peak
+            while admission.stats()["admitted"] < 6:
+                peak = max(peak, admission.stats()["in_flight"])
+                await asyncio.sleep(0.005)
+
+        results = await asyncio.gather(watch(), *calls)
+        return results[1:], peak
+
+    results, peak = asyncio.run(run())
+    assert results == ["ok"] * 6
+    assert peak == 2
+    stats = admission.stats()
+    assert stats["in_flight"] == 0 and stats["queue_depth"] == 0
+    assert stats["max_wait_seconds"] >= 0.1
+
+
+def test_sheds_when_estimated_wait_exceeds_slo():
+    """Once service time is known, requests that would wait past the SLO are rejected fast."""
+    admission = AdmissionController(max_in_flight=1, max_queue=10, slo_seconds=0.15)
+
+    async def run():
+        await stub_llm_call(admission, 0.1)
+        outcomes = await asyncio.gather(
+            *[stub_llm_call(admission, 0.1) for _ in range(4)],
+            return_exceptions=True
+        )
+        return outcomes
+
+    outcomes = asyncio.run(run())
+    rejected = [o for o in outcomes if isinstance(o, Overloaded)]
+    assert outcomes[:2] == ["ok", "ok"]
+    assert len(rejected) == 2
+    assert all(o.retry_after > 0.15 for o in rejected)
+    assert admission.stats()["rejected"] == 2
+
+
+def test_sheds_when_queue_full():
+    """A full queue rejects new requests without waiting."""
+    admission = AdmissionController(max_in_flight=1, max_queue=1, slo_seconds=5)
+
+    async def run():
+        return await asyncio.gather(
+            *[stub_llm_call(admission, 0.05) for _ in range(3)],
+            return_exceptions=True
+        )
+
+    outcomes = asyncio.run(run())
+    assert outcomes[:2] == ["ok", "ok"]
+    assert isinstance(outcomes[2], Overloaded)
+
+
+def test_waiter_cancelled_as_it_is_admitted_gives_the_slot_back():
+    """A queued request cancelled just as a slot is handed to it (a client disconnect) does not leak that slot."""
+    admission = AdmissionController(max_in_flight=1, max_queue=10, slo_seconds=5)
+
+    async def run():
+        admitted_at = await admission.acquire()
+        waiter = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0)
+        admission.release(admitted_at)
+        waiter.cancel()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            pass
+        else:
+            admission.release(waiter.result())
+        return await asyncio.wait_for(stub_llm_call(admission, 0), timeout=1)
+
+    assert asyncio.run(run()) == "ok"
+    stats = admission.stats()
+    assert stats["in_flight"] == 0 and stats["queue_depth"] == 0
+
+
+if __name__ == "__main__":
+    test_limits_in_flight_and_queues()
+    test_sheds_when_estimated_wait_exceeds_slo()
+    test_sheds_when_queue_full()
+    test_waiter_cancelled_as_it_is_admitted_gives_the_slot_back()
+    print("All admission control tests passed!")
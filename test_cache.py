@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Test script for the in-process response cache."""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.cache import TTLCache, PlanCache, ResponseCache
+from app.plan import describe_schema
+
+
+def test_lru_eviction():
+    """The least recently used entry is evicted first."""
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_ttl_expiry():
+    """Entries expire after their TTL."""
+    cache = TTLCache(max_entries=10, ttl_seconds=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_memory_ceiling():
+    """Total size never exceeds the byte ceiling."""
+    cache = TTLCache(max_entries=100, ttl_seconds=60, max_bytes=100)
+    for i in range(10):
+        cache.set(i, "x", size=30)
+    assert cache.stats()["bytes"] <= 100
+    cache.set("huge", "x", size=500)
+    assert cache.get("huge") is None
+
+
+def test_response_key():
+    """Keys ignore prompt casing/whitespace and row key order, but not the template version."""
+    rows_a = [{"name": "kabir", "age": 30}]
+    rows_b = [{"age": 30, "name": "kabir"}]
+    key = ResponseCache.make_key("Add  nationality", rows_a, "1")
+
+    assert key == ResponseCache.make_key("add nationality ", rows_b, "1")
+    assert key != ResponseCache.make_key("add nationality", rows_a, "2")
+    assert key != ResponseCache.make_key("add nationality", [{"name": "ivan", "age": 30}], "1")
+
+    cache = ResponseCache(max_entries=10, ttl_seconds=60)
+    cache.set_response(key, "Added nationality.", rows_a)
+    assert cache.get_response(key) == ("Added nationality.", rows_a)
+    assert cache.stats()["hits"] == 1
+
+
+def test_plan_key():
+    """Tables of the same shape share a plan key; different values do not matter, types do."""
+    schema = describe_schema([{"data": {"name": "Laptop", "price": 1200}}])
+    same_shape = describe_schema([{"data": {"price": 25, "name": "Book"}}, {"data": {"price": 300, "name": "Monitor"}}])
+    key = PlanCache.make_key("Filter products with price greater than 100", schema, "1")
+
+    assert key == PlanCache.make_key("filter products with price  greater than 100", same_shape, "1")
+    assert key != PlanCache.make_key("Filter products with price greater than 100", schema, "2")
+    assert key != PlanCache.make_key(
+        "Filter products with price greater than 100",
+        describe_schema([{"data": {"name": "Laptop", "price": "1200"}}]),
+        "1"
+    )
+
+    cache = PlanCache(max_entries=10, ttl_seconds=60)
+    program = {"filter": {"op": ">", "args": [{"field": "data.price"}, 100]}}
+    cache.set_plan(key, "Kept products over 100.", program)
+    assert cache.get_plan(key) == ("Kept products over 100.", program)
+
+
+if __name__ == "__main__":
+    test_lru_eviction()
+    test_ttl_expiry()
+    test_memory_ceiling()
+    test_response_key()
+    test_plan_key()
+    print("All cache tests passed!")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Test script for chunked concurrent fan-out of table rows."""
+
+import sys
+import os
+import asyncio
+import random
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.chunking import chunk_rows, fan_out, merge_chunk_results
+
+
+def test_chunk_rows():
+    """Rows are split into bounded, consecutive chunks."""
+    rows = [{"id": i} for i in range(7)]
+    chunks = chunk_rows(rows, 3)
+    assert [len(c) for c in chunks] == [3, 3, 1]
+    assert chunk_rows(rows, 0) == [rows]
+
+
+def test_fan_out_preserves_order():
+    """Chunks finishing out of order are reassembled in row order."""
+    rows = [{"id": i} for i in range(20)]
+    in_flight = 0
+    peak = 0
+
+    async def worker(chunk):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(random.random() / 100)
+        in_flight -= 1
+        return "Added double.", [{**row, "double": row["id"] * 2} for row in chunk]
+
+    results = asyncio.run(fan_out(rows, worker, chunk_size=3, max_concurrency=2))
+    explanation, merged = merge_chunk_results(results)
+
+    assert [row["id"] for row in merged] == list(range(20))
+    assert all(row["double"] == row["id"] * 2 for row in merged)
+    assert explanation == "Added double."
+    assert peak <= 2
+
+
+def test_fan_out_failed_chunk_keeps_rows():
+    """A chunk that times out is returned unchanged and reported."""
+    rows = [{"id": i} for i in range(4)]
+
+    async def worker(chunk):
+        if chunk[0]["id"] == 2:
+            await asyncio.sleep(1)
+        return "ok", [{**row, "seen": True} for row in chunk]
+
+    results = asyncio.run(fan_out(rows, worker, chunk_size=2, max_concurrency=4, timeout=0.05))
+    explanation, merged = merge_chunk_results(results)
+
+    assert [row.get("seen") for row in merged] == [True, True, None, None]
+    assert "1 of 2 chunk(s)" in explanation
+
+
+def test_chunk_with_wrong_row_count_keeps_rows():
+    """A chunk returning fewer or more rows than it was sent is treated as failed."""
+    rows = [{"id": i} for i in range(6)]
+
+    async def worker(chunk):
+        if chunk[0]["id"] == 0:
+            return "dropped one", [{**row, "seen": True} for row in chunk[1:]]
+        if chunk[0]["id"] == 2:
+            return "added one", [{**row, "seen": True} for row in chunk] + [{"id": 99}]
+        return "ok", [{**row, "seen": True} for row in chunk]
+
+    results = asyncio.run(fan_out(rows, worker, chunk_size=2, max_concurrency=4))
+    explanation, merged = merge_chunk_results(results)
+
+    assert merged[:4] == rows[:4]
+    assert [row.get("seen") for row in merged[4:]] == [True, True]
+    assert [result.error for result in results] == ["row count mismatch", "row count mismatch", None]
+    assert "2 of 3 chunk(s)" in explanation
+
+
+def test_unmatched_chunk_may_return_any_row_count():
+    """Without ``match_rows`` a filter's shorter result is kept."""
+    rows = [{"id": i} for i in range(3)]
+
+    async def worker(chunk):
+        return "kept odd ids", [row for row in chunk if row["id"] % 2]
+
+    results = asyncio.run(fan_out(rows, worker, chunk_size=0, max_concurrency=1, match_rows=False))
+    assert merge_chunk_results(results) == ("kept odd ids", [{"id": 1}])
+
+
+def test_fan_out_abort_on_cancels_remaining():
+    """An ``abort_on`` exception propagates and the other chunks are cancelled."""
+    rows = [{"id": i} for i in range(4)]
+    finished = []
+
+    async def worker(chunk):
+        if chunk[0]["id"] == 0:
+            raise LookupError("busy")
+        await asyncio.sleep(0.5)
+        finished.append(chunk)
+        return "ok", chunk
+
+    try:
+        asyncio.run(fan_out(rows, worker, chunk_size=2, max_concurrency=4, abort_on=(LookupError,)))
+        assert False, "expected LookupError"
+    except LookupError:
+        pass
+    assert finished == []
+
+
+if __name__ == "__main__":
+    test_chunk_rows()
+    test_fan_out_preserves_order()
+    test_fan_out_failed_chunk_keeps_rows()
+    test_chunk_with_wrong_row_count_keeps_rows()
+    test_unmatched_chunk_may_return_any_row_count()
+    test_fan_out_abort_on_cancels_remaining()
+    print("All chunking tests passed!")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Test script for value deduplication."""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.dedup import (
+    broadcast_fields,
+    derive_fields,
+    diff_fields,
+    distinct_values,
+    find_source_column,
+    group_rows,
+    is_row_mapping,
+    merge_fields,
+    parse_ignored_fields,
+    value_key
+)
+
+
+def test_find_source_column():
+    """Exactly one named column is found; ambiguous or unnamed prompts find none."""
+    rows = [{"company_name": "Acme", "name": "kabir", "industry": "Software", "employees": 10}]
+    assert find_source_column("Categorize each name by likeliest nationality", rows) == ("name",)
+    assert find_source_column("Map industries to a sector", rows) == ("industry",)
+    # "name" is part of "company_name", so only the longer column counts
+    assert find_source_column("Guess the country of each company name", rows) == ("company_name",)
+    assert find_source_column("Label the industry given the number of employees", rows) is None
+    assert find_source_column("Add a greeting", rows) is None
+    # Single-column tables need no hint, nested or not
+    assert find_source_column("Add a greeting", [{"data": {"name": "kabir"}}]) == ("data", "name")
+
+
+def test_distinct_values_and_broadcast():
+    rows = [
+        {"data": {"name": "kabir", "id": 1}},
+        {"data": {"name": "ivan", "id": 2}},
+        {"data": {"name": "kabir", "id": 3}},
+        {"data": {"name": None, "id": 4}},
+    ]
+    values = distinct_values(rows, ("data", "name"))
+    assert values == ["kabir", "ivan", None]
+
+    transformed = [
+        {"name": "kabir", "nationality": "Indian"},
+        {"name": "ivan", "nationality": "Russian"},
+        {"name": None},
+    ]
+    fields_by_value = derive_fields("name", values, transformed)
+    assert value_key(None) not in fields_by_value
+    result = broadcast_fields(rows, ("data", "name"), fields_by_value)
+    assert [row["data"].get("nationality") for row in result] == ["Indian", "Russian", "Indian", None]
+    assert result[2]["data"]["id"] == 3
+    assert "nationality" not in rows[0]["data"]
+
+
+def test_rewritten_source_values_are_broadcast():
+    """"Capitalize each name" changes the source column itself."""
+    rows = [{"data": {"name": "kabir", "id": 1}}, {"data": {"name": "ivan", "id": 2}}, {"data": {"name": "kabir", "id": 3}}]
+    fields_by_value = derive_fields("name", ["kabir", "ivan"], [{"name": "Kabir"}, {"name": "Ivan"}])
+    assert fields_by_value == {value_key("kabir"): {"name": "Kabir"}, value_key("ivan"): {"name": "Ivan"}}
+    result = broadcast_fields(rows, ("data", "name"), fields_by_value)
+    assert [row["data"] for row in result] == [
+        {"name": "Kabir", "id": 1}, {"name": "Ivan", "id": 2}, {"name": "Kabir", "id": 3}
+    ]
+
+
+def test_non_mapping_replies_are_rejected():
+    """Filters and sorts do not return one row per value, so the rows must be transformed instead."""
+    assert derive_fields("name", ["kabir", "ivan"], [{"name": "kabir"}]) is None
+    assert not is_row_mapping("Sort by name")
+    assert not is_row_mapping("Keep names starting with K")
+    assert not is_row_mapping("Remove duplicates")
+    assert is_row_mapping("Capitalize each name")
+    assert is_row_mapping("Guess the country of each name")
+
+
+def test_group_rows_ignoring_id_and_timestamp():
+    ignored = parse_ignored_fields(" id, timestamp ,")
+    rows = [
+        {"data": {"id": 1, "timestamp": "2024-01-01", "email": "a@x.com", "title": "CTO"}},
+        {"data": {"id": 2, "timestamp": "2024-02-01", "title": "CTO", "email": "a@x.com"}},
+        {"data": {"id": 3, "timestamp": "2024-01-01", "email": "b@x.com", "title": "CTO"}},
+        {"data": {"id": 1, "timestamp": "2024-01-01", "email": "a@x.com", "title": "CTO"}},
+    ]
+    assert group_rows(rows, ignored) == [[0, 1, 3], [2]]
+    assert group_rows(rows) == [[0, 3], [1], [2]]
+
+
+def test_fan_back_out_keeps_each_rows_own_fields():
+    representative = {"data": {"id": 1, "title": "CTO"}}
+    transformed = {"data": {"id": 1, "title": "CTO", "seniority": "C-level"}, "reasoning": "Chief officer"}
+    delta = diff_fields(representative, transformed)
+    assert delta == {"data": {"seniority": "C-level"}, "reasoning": "Chief officer"}
+
+    duplicate = {"data": {"id": 2, "title": "CTO"}}
+    assert merge_fields(duplicate, delta) == {
+        "data": {"id": 2, "title": "CTO", "seniority": "C-level"},
+        "reasoning": "Chief officer"
+    }
+    assert duplicate == {"data": {"id": 2, "title": "CTO"}}
+
+
+def test_fan_back_out_skips_ignored_fields():
+    """Ignored fields differ within a group, so the representative's values are not copied."""
+    ignored = parse_ignored_fields("id,timestamp")
+    representative = {"data": {"id": 1, "title": "CTO"}}
+    # The model echoed (and even rewrote) the representative's id
+    transformed = {"data": {"id": "1", "title": "CTO", "seniority": "C-level"}, "id": 1, "timestamp": "now"}
+    delta = diff_fields(representative, transformed, ignored)
+    assert delta == {"data": {"seniority": "C-level"}}
+
+    duplicate = {"data": {"id": 2, "title": "CTO"}}
+    assert merge_fields(duplicate, delta) == {"data": {"id": 2, "title": "CTO", "seniority": "C-level"}}
+    assert diff_fields({}, {"meta": {"id": 7, "kind": "lead"}}, ignored) == {"meta": {"kind": "lead"}}
+
+
+if __name__ == "__main__":
+    test_find_source_column()
+    test_distinct_values_and_broadcast()
+    test_rewritten_source_values_are_broadcast()
+    test_non_mapping_replies_are_rejected()
+    test_group_rows_ignoring_id_and_timestamp()
+    test_fan_back_out_keeps_each_rows_own_fields()
+    test_fan_back_out_skips_ignored_fields()
+    print("All dedup tests passed!")
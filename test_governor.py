@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Test script for the upstream RPM/TPM governor."""
+
+import sys
+import os
+import asyncio
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.governor import UpstreamBusy, UpstreamGovernor
+from app.timing import stage, start_request_timing
+
+
+class RateLimitError(Exception):
+    """Stand-in for a provider's 429 error."""
+
+
+def test_paces_requests_per_window():
+    """Calls beyond the RPM limit wait for the window instead of failing."""
+    governor = UpstreamGovernor(rpm_limit=2, window_seconds=0.2, max_wait_seconds=1)
+
+    async def run():
+        start = time.monotonic()
+        for _ in range(4):
+            await governor.acquire(1)
+        return time.monotonic() - start
+
+    elapsed = asyncio.run(run())
+    assert 0.2 <= elapsed < 0.6
+    assert governor.stats()["delayed"] == 1
+
+
+def test_rejects_when_wait_exceeds_bound():
+    """A call that would wait longer than allowed is rejected with a retry hint."""
+    governor = UpstreamGovernor(tpm_limit=100, window_seconds=60, max_wait_seconds=0.1)
+
+    async def run():
+        await governor.acquire(80)
+        await governor.acquire(30)
+
+    try:
+        asyncio.run(run())
+        assert False, "expected UpstreamBusy"
+    except UpstreamBusy as e:
+        assert 59 < e.retry_after <= 60
+    assert governor.stats()["rejected"] == 1
+
+
+def test_cancelled_waiter_does_not_hold_the_lock():
+    """A call cancelled while queued behind a paced one (a client disconnect) leaves the governor usable."""
+    governor = UpstreamGovernor(rpm_limit=1, window_seconds=0.1, max_wait_seconds=1)
+
+    async def run():
+        await governor.acquire(1)
+        paced = asyncio.create_task(governor.acquire(1))
+        queued = asyncio.create_task(governor.acquire(1))
+        await asyncio.sleep(0.02)
+        queued.cancel()
+        await paced
+        try:
+            await queued
+        except asyncio.CancelledError:
+            pass
+        await asyncio.wait_for(governor.acquire(1), timeout=1)
+
+    asyncio.run(run())
+    assert governor.stats()["admitted"] == 3
+
+
+def test_retries_upstream_rate_limits():
+    """Upstream 429s are retried after a backoff; other errors are not."""
+    governor = UpstreamGovernor(max_retries=3, backoff_base_seconds=0.01, backoff_max_seconds=0.02)
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RateLimitError("429 Resource has been exhausted")
+        return "ok"
+
+    assert asyncio.run(governor.call(flaky, 10)) == "ok"
+    assert len(attempts) == 3
+    assert governor.stats()["retries"] == 2
+
+    async def broken():
+        raise KeyError("boom")
+
+    try:
+        asyncio.run(governor.call(broken, 10))
+        assert False, "expected KeyError"
+    except KeyError:
+        pass
+
+
+def test_gives_up_after_max_retries():
+    """Persistent upstream pushback surfaces as UpstreamBusy."""
+    governor = UpstreamGovernor(max_retries=1, backoff_base_seconds=0.01, backoff_max_seconds=0.01)
+
+    async def exhausted():
+        raise RateLimitError("rate limit")
+
+    try:
+        asyncio.run(governor.call(exhausted, 10))
+        assert False, "expected UpstreamBusy"
+    except UpstreamBusy as e:
+        assert e.retry_after >= 1
+
+
+def test_waiting_is_timed_apart_from_the_call():
+    """Time spent waiting for capacity is recorded as ``queue``, not as part of the model call."""
+    governor = UpstreamGovernor(rpm_limit=1, window_seconds=0.1, max_wait_seconds=1)
+
+    async def call():
+        with stage("llm_call"):
+            await asyncio.sleep(0.01)
+            return "ok"
+
+    async def run():
+        timing = start_request_timing()
+        await governor.call(call, 1)
+        await governor.call(call, 1)
+        return timing
+
+    timing = asyncio.run(run())
+    assert timing.stages["queue"] >= 0.08
+    assert timing.stages["llm_call"] < 0.08
+
+
+if __name__ == "__main__":
+    test_paces_requests_per_window()
+    test_rejects_when_wait_exceeds_bound()
+    test_cancelled_waiter_does_not_hold_the_lock()
+    test_retries_upstream_rate_limits()
+    test_gives_up_after_max_retries()
+    test_waiting_is_timed_apart_from_the_call()
+    print("All upstream governor tests passed!")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Test script for the local intent classifiers."""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.intent import KeywordIntentClassifier, LocalIntentClassifier, NaiveBayesIntentClassifier
+
+CATEGORIES = ["data_filtering", "data_transformation", "data_analysis"]
+
+
+def test_keyword_classifier():
+    """Keyword rules pick the category with the most matching keywords."""
+    classifier = KeywordIntentClassifier(CATEGORIES)
+
+    assert classifier.predict("Filter products with price greater than 100")[0] == "data_filtering"
+    assert classifier.predict("Categorize each name based on likeliest nationality")[0] == "data_transformation"
+    assert classifier.predict("Summarize the average confidence by industry")[0] == "data_analysis"
+    assert classifier.predict("hello there") == (None, 0.0)
+
+
+def test_naive_bayes_classifier():
+    """A classifier trained on logged prompts predicts with a posterior confidence."""
+    classifier = NaiveBayesIntentClassifier(CATEGORIES)
+    used = classifier.train([
+        ("keep rows where urgency is high", "data_filtering"),
+        ("drop contacts from small companies", "data_filtering"),
+        ("guess the seniority of each title", "data_transformation"),
+        ("tag every company with its sector", "data_transformation"),
+        ("what is the typical confidence per signal type", "data_analysis"),
+        ("unknown label is ignored", "not_a_category"),
+    ])
+
+    assert used == 5
+    intent, confidence = classifier.predict("guess the sector of each company")
+    assert intent == "data_transformation"
+    assert 0.0 < confidence <= 1.0
+
+
+def test_classifier_without_predict_cannot_be_built():
+    """A classifier missing ``predict`` fails when constructed, not on the first prompt."""
+    class Incomplete(LocalIntentClassifier):
+        pass
+
+    try:
+        Incomplete()
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("an incomplete classifier was instantiated")
+
+
+if __name__ == "__main__":
+    test_keyword_classifier()
+    test_naive_bayes_classifier()
+    test_classifier_without_predict_cannot_be_built()
+    print("All intent tests passed!")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Test script for the single-pass JSON extractor."""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.json_extract import extract_json
+
+
+def test_plain_json():
+    """A bare JSON response is parsed directly."""
+    value, end = extract_json('{"TRANSFORMED_DATA": [{"a": 1}], "EXPLANATION": "ok"}')
+    assert value["TRANSFORMED_DATA"] == [{"a": 1}]
+
+
+def test_code_fence_and_prose():
+    """Code fences and leading/trailing prose (with stray brackets and quotes) are skipped."""
+    text = (
+        "Sure! Here's the result [as requested]:\n```json\n"
+        '{"TRANSFORMED_DATA": [{"name": "O\'Brien", "note": "uses } and ] and \\"quotes\\""}],'
+        ' "EXPLANATION": "done"}\n```\nLet me know if you need anything else.'
+    )
+    value, _ = extract_json(text)
+    assert value["TRANSFORMED_DATA"][0]["note"] == 'uses } and ] and "quotes"'
+    assert value["EXPLANATION"] == "done"
+
+
+def test_labelled_array():
+    """The legacy 'TRANSFORMED_DATA: [...] EXPLANATION: ...' format yields the array."""
+    text = 'TRANSFORMED_DATA: [{"a": 1}, {"a": 2}]\nEXPLANATION: Added a.'
+    value, end = extract_json(text)
+    assert value == [{"a": 1}, {"a": 2}]
+    assert text[end:].strip() == "EXPLANATION: Added a."
+
+
+def test_stray_brackets_and_missing():
+    """Bracketed prose that is not a payload is skipped; no JSON raises ValueError."""
+    assert extract_json('oops { ] see [1, 2] then {"ok": true}')[0] == {"ok": True}
+    for text in ("no json here", '{"TRANSFORMED_DATA": [' + '{"a": 1}, ' * 100):
+        try:
+            extract_json(text)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("expected ValueError")
+
+
+def test_truncated_reply_is_not_mistaken_for_a_row():
+    """A reply cut off mid-array must fail rather than yield its first row as the payload."""
+    for text in (
+        '{"TRANSFORMED_DATA": [{"name": "kabir", "nationality": "Indian"}, {"name": "iv',
+        'Here you go: [{"a": 1}, {"a": 2}, {"a": 3'
+    ):
+        try:
+            value, _ = extract_json(text)
+        except ValueError:
+            continue
+        raise AssertionError(f"expected ValueError, got {value!r}")
+
+
+if __name__ == "__main__":
+    test_plain_json()
+    test_code_fence_and_prose()
+    test_labelled_array()
+    test_stray_brackets_and_missing()
+    test_truncated_reply_is_not_mistaken_for_a_row()
+    print("All JSON extraction tests passed!")
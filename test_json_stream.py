@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Test script for the incremental streaming row parser."""
+
+import sys
+import os
+import json
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.json_stream import IncrementalRowParser
+
+ROWS = [{"name": "kabir", "note": "braces } ] and \"quotes\" \\ inside"}, {"name": "ivan", "tags": ["a", {"b": 1}]}]
+
+
+def feed_in_pieces(parser, text, size):
+    """Feed text a few characters at a time, collecting rows as they complete."""
+    rows = []
+    for i in range(0, len(text), size):
+        rows.extend(parser.feed(text[i:i + size]))
+    return rows
+
+
+def test_rows_yielded_as_they_close():
+    """Each row is returned as soon as its closing brace arrives."""
+    text = json.dumps({"TRANSFORMED_DATA": ROWS, "EXPLANATION": "Added \"tags\"."})
+    parser = IncrementalRowParser()
+
+    first_row_end = text.index("}, {") + 1
+    assert parser.feed(text[:first_row_end - 1]) == []
+    assert parser.feed(text[first_row_end - 1:first_row_end]) == [ROWS[0]]
+
+    for size in (1, 3, 17):
+        parser = IncrementalRowParser()
+        assert feed_in_pieces(parser, text, size) == ROWS
+        assert parser.explanation() == 'Added "tags".'
+
+
+def test_labelled_and_fenced_arrays():
+    """Labelled and fenced bare arrays are recognized too."""
+    for text in (
+        f"TRANSFORMED_DATA: {json.dumps(ROWS)}\nEXPLANATION: Added tags.",
+        f"```json\n{json.dumps(ROWS)}\n```\nEXPLANATION: Added tags.",
+    ):
+        parser = IncrementalRowParser()
+        assert feed_in_pieces(parser, text, 5) == ROWS
+        assert parser.explanation() == "Added tags."
+
+
+def test_no_array_keeps_text():
+    """Without a data array nothing is consumed, so the caller can fall back."""
+    parser = IncrementalRowParser()
+    assert feed_in_pieces(parser, "Sorry, I cannot help with that.", 4) == []
+    assert not parser.found_array
+    assert parser.text == "Sorry, I cannot help with that."
+
+
+if __name__ == "__main__":
+    test_rows_yielded_as_they_close()
+    test_labelled_and_fenced_arrays()
+    test_no_array_keeps_text()
+    print("All streaming parser tests passed!")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Test script for the deterministic fake LLM backend."""
+
+import sys
+import os
+import asyncio
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.delta import merge_delta_rows
+from app.json_extract import extract_json
+from app.llm_backends import LLMBackend, FakeLLMBackend, FakeLLMError, FakeRateLimitError
+from app.table_encoding import TableEncoder
+
+ROWS = [{"name": "kabir", "city": "Pune"}, {"name": "ivan", "city": "Kazan"}, {"name": "ana", "city": "Pune"}]
+
+
+class Message:
+    """Minimal stand-in for a chat message."""
+
+    def __init__(self, type, content):
+        self.type = type
+        self.content = content
+
+
+def transform_messages(rows, delta=True):
+    description, table = TableEncoder("json").encode(rows)
+    system = 'Return one object per record with "_row".' if delta else "Return full records."
+    return [
+        Message("system", system),
+        Message("human", f"User request: label each row\n\nTable data ({description}):\n{table}")
+    ]
+
+
+def test_delta_output_is_well_formed():
+    """The fake answers with one delta per input row that merges cleanly."""
+    backend = FakeLLMBackend(latency_ms=0)
+    response = asyncio.run(backend.ainvoke(transform_messages(ROWS)))
+    payload, _ = extract_json(response.content)
+    merged, missing, extra = merge_delta_rows(ROWS, payload["TRANSFORMED_DATA"])
+    assert not missing and not extra
+    assert all("fake_label" in row and row["city"] for row in merged)
+    assert response.usage_metadata["output_tokens"] > 0
+
+
+def test_deterministic_and_streamed():
+    """Same prompt, same reply; streamed pieces reassemble into the invoked reply."""
+    backend = FakeLLMBackend(latency_ms=0, seed=7)
+    messages = transform_messages(ROWS, delta=False)
+
+    async def stream():
+        return "".join([piece.content async for piece in backend.astream(messages)])
+
+    first = asyncio.run(backend.ainvoke(messages)).content
+    assert asyncio.run(backend.ainvoke(messages)).content == first
+    assert asyncio.run(stream()) == first
+    assert extract_json(first)[0]["TRANSFORMED_DATA"][1]["name"] == "ivan"
+
+
+def test_failures_and_truncation():
+    """Error, rate limit and truncation rates of 1 always apply."""
+    messages = transform_messages(ROWS)
+    for backend, error in ((FakeLLMBackend(latency_ms=0, error_rate=1), FakeLLMError),
+                           (FakeLLMBackend(latency_ms=0, rate_limit_rate=1), FakeRateLimitError)):
+        try:
+            asyncio.run(backend.ainvoke(messages))
+            assert False, "expected a simulated failure"
+        except error:
+            pass
+
+    truncated = asyncio.run(FakeLLMBackend(latency_ms=0, truncation_rate=1).ainvoke(messages)).content
+    full = asyncio.run(FakeLLMBackend(latency_ms=0).ainvoke(messages)).content
+    assert full.startswith(truncated) and len(truncated) < len(full)
+
+
+def test_backend_without_streaming_cannot_be_built():
+    """A backend missing ``astream`` fails when constructed, not on the first streamed request."""
+    class Incomplete(LLMBackend):
+        async def ainvoke(self, messages):
+            return None
+
+    try:
+        Incomplete()
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("an incomplete backend was instantiated")
+
+
+if __name__ == "__main__":
+    test_delta_output_is_well_formed()
+    test_deterministic_and_streamed()
+    test_failures_and_truncation()
+    test_backend_without_streaming_cannot_be_built()
+    print("All fake LLM backend tests passed!")
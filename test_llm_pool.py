@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Test script for the shared LLM client pool."""
+
+import sys
+import os
+import asyncio
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+from app.llm_pool import LLMClientPool
+from app.main import app
+
+
+class CountingFactory:
+    """Client factory recording the threads clients were built on."""
+
+    def __init__(self):
+        self.threads = []
+
+    def __call__(self):
+        self.threads.append(threading.current_thread())
+        return object()
+
+
+def test_started_pool_hands_out_clients_round_robin():
+    """A started pool builds every client up front and cycles through them."""
+    factory = CountingFactory()
+    pool = LLMClientPool(size=2, keepalive_seconds=0, factory=factory)
+    pool.start()
+
+    async def run():
+        return [await pool.acquire() for _ in range(4)]
+
+    clients = asyncio.run(run())
+    assert clients[0] is clients[2] and clients[1] is clients[3] and clients[0] is not clients[1]
+    assert pool.stats()["created"] == 2
+
+
+def test_late_builds_run_off_the_event_loop():
+    """Slots filled lazily are built once each, in a worker thread, even under concurrent acquires."""
+    factory = CountingFactory()
+    pool = LLMClientPool(size=2, keepalive_seconds=0, factory=factory)
+
+    async def run():
+        return await asyncio.gather(*[pool.acquire() for _ in range(6)])
+
+    clients = asyncio.run(run())
+    assert len({id(client) for client in clients}) == 2
+    assert pool.stats()["created"] == 2
+    assert all(thread is not threading.main_thread() for thread in factory.threads)
+
+
+def test_rejected_request_takes_no_client():
+    """A request without an API key is refused before a pooled client is taken."""
+    factory = CountingFactory()
+
+    async def run():
+        await app.router.startup()
+        try:
+            app.state.llm_pool = LLMClientPool(size=1, keepalive_seconds=0, factory=factory)
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://pool-test") as client:
+                return await client.post("/api/v1/process", json={
+                    "user_prompt": "Label each person with a category",
+                    "request_data": {"table_data": [{"name": "ana"}]}
+                })
+        finally:
+            await app.router.shutdown()
+
+    response = asyncio.run(run())
+    assert response.status_code == 401
+    assert factory.threads == []
+
+
+if __name__ == "__main__":
+    test_started_pool_hands_out_clients_round_robin()
+    test_late_builds_run_off_the_event_loop()
+    test_rejected_request_takes_no_client()
+    print("All LLM client pool tests passed!")
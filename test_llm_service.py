@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Test script for LLMService request handling against a scripted model."""
+
+import sys
+import os
+import asyncio
+import json
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import settings
+from app.llm_backends import LLMBackend, LLMMessage
+from app.llm_service import LLMService
+
+PRODUCTS = [
+    {"data": {"name": "Laptop", "price": 1200, "category": "Electronics", "in_stock": True}},
+    {"data": {"name": "Book", "price": 25, "category": "Education", "in_stock": True}},
+    {"data": {"name": "Monitor", "price": 300, "category": "Electronics", "in_stock": False}},
+]
+
+
+class ScriptedLLM(LLMBackend):
+    """Chat model answering every call with ``reply(system, human)``, recording the calls."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = []
+
+    def _answer(self, messages):
+        system = " ".join(str(m.content) for m in messages if getattr(m, "type", "") == "system")
+        human = " ".join(str(m.content) for m in messages if getattr(m, "type", "") != "system")
+        self.calls.append((system, human))
+        return self.reply(system, human)
+
+    async def ainvoke(self, messages):
+        return LLMMessage(self._answer(messages))
+
+    async def astream(self, messages):
+        text = self._answer(messages)
+        for start in range(0, len(text), 16):
+            yield LLMMessage(text[start:start + 16])
+
+
+def test_filter_prompt_is_sent_whole_and_may_drop_rows():
+    """A filter is one call over the whole table, and its shorter reply is kept as is."""
+    reply = json.dumps({"TRANSFORMED_DATA": [PRODUCTS[0], PRODUCTS[2]], "EXPLANATION": "Kept products above 100."})
+    llm = ScriptedLLM(lambda system, human: reply)
+    chunk_size = settings.LLM_CHUNK_SIZE
+    settings.LLM_CHUNK_SIZE = 2
+    try:
+        service = LLMService(llm=llm)
+        explanation, rows = asyncio.run(
+            service.process_data("data_filtering", "Filter products with price greater than 100", PRODUCTS)
+        )
+    finally:
+        settings.LLM_CHUNK_SIZE = chunk_size
+
+    assert len(llm.calls) == 1
+    assert '"_row"' not in llm.calls[0][0]
+    assert rows == [PRODUCTS[0], PRODUCTS[2]]
+    assert explanation == "Kept products above 100."
+    assert not service.degraded
+
+
+def test_failed_planning_call_falls_back_to_rows():
+    """An upstream error while planning is not the request's answer; the rows are transformed instead."""
+    def reply(system, human):
+        if "table program" in system:
+            raise RuntimeError("500 Internal error")
+        return json.dumps({"TRANSFORMED_DATA": [{**row, "label": "x"} for row in PRODUCTS], "EXPLANATION": "Labelled."})
+
+    plan_execution = settings.PLAN_EXECUTION_ENABLED
+    settings.PLAN_EXECUTION_ENABLED = True
+    try:
+        service = LLMService(llm=ScriptedLLM(reply))
+        explanation, rows = asyncio.run(service.process_data("data_transformation", "Label each product", PRODUCTS))
+    finally:
+        settings.PLAN_EXECUTION_ENABLED = plan_execution
+
+    assert explanation == "Labelled."
+    assert [row["label"] for row in rows] == ["x", "x", "x"]
+
+
+async def collect(records):
+    return [record async for record in records]
+
+
+def test_streamed_filter_has_no_offsets_and_no_refilled_rows():
+    """Streamed filter rows come in result order, and dropped rows stay dropped."""
+    reply = json.dumps({"TRANSFORMED_DATA": [PRODUCTS[2], PRODUCTS[0]], "EXPLANATION": "Kept products above 100."})
+    service = LLMService(llm=ScriptedLLM(lambda system, human: reply))
+    records = asyncio.run(collect(
+        service.stream_process_data("data_filtering", "Filter products with price greater than 100", PRODUCTS)
+    ))
+
+    rows = [record for record in records if record["type"] == "rows"]
+    assert all("offset" not in record for record in rows)
+    assert [record["rows"][0] for record in rows] == [PRODUCTS[2], PRODUCTS[0]]
+    assert records[-1]["type"] == "explanation"
+    assert records[-1]["row_count"] == 2
+    assert not service.degraded
+
+
+if __name__ == "__main__":
+    test_filter_prompt_is_sent_whole_and_may_drop_rows()
+    test_failed_planning_call_falls_back_to_rows()
+    test_streamed_filter_has_no_offsets_and_no_refilled_rows()
+    print("All LLM service tests passed!")
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""Test script for the Prometheus metrics registry."""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.metrics import Counter, Gauge, Histogram, render
+
+
+def test_histogram_buckets_are_cumulative():
+    """Bucket counts accumulate and +Inf equals the observation count."""
+    histogram = Histogram("test_stage_seconds", "Test histogram", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, ("parse",))
+    with histogram.time(("auth",)):
+        pass
+
+    text = render()
+    assert 'test_stage_seconds_bucket{stage="parse",le="0.1"} 1' in text
+    assert 'test_stage_seconds_bucket{stage="parse",le="1"} 3' in text
+    assert 'test_stage_seconds_bucket{stage="parse",le="+Inf"} 4' in text
+    assert 'test_stage_seconds_sum{stage="parse"} 6.05' in text
+    assert histogram.count(("auth",)) == 1
+
+
+def test_counter_and_gauge():
+    counter = Counter("test_lookups_total", "Test counter", ("result",))
+    counter.inc(labels=("hit",))
+    counter.inc(2, ("hit",))
+    gauge = Gauge("test_in_flight", "Test gauge")
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+
+    text = render()
+    assert "# TYPE test_lookups_total counter" in text
+    assert 'test_lookups_total{result="hit"} 3' in text
+    assert "test_in_flight 1" in text
+
+
+if __name__ == "__main__":
+    test_histogram_buckets_are_cumulative()
+    test_counter_and_gauge()
+    print("All metrics tests passed!")
@@ -11,11 +11,8 @@ import logging
 # Set up logging to see the debug output
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
-def test_parsing():
-    """Test the parsing function with the provided example."""
-    
-    # Example response content from the user
-    response_content = """TRANSFORMED_DATA: [
+# Example response content from the user
+RESPONSE_CONTENT = """TRANSFORMED_DATA: [
   {
     "id": "f2d9969a-b1cb-4dd2-bb5d-099d217aa2c3",
     "prospectName": "Herbert Runolfsdottir",
@@ -67,6 +64,11 @@ def test_parsing():
 ]
 EXPLANATION: Added a new field called "nationality" to each object in the array. The reasoning for each nationality assignment is also provided. Note that these nationalities are based on common name associations and may not be entirely accurate."""
 
+def test_parsing():
+    """Test the parsing function with the provided example."""
+    
+    response_content = RESPONSE_CONTENT
+
     # Create a mock LLMService instance (we only need the parsing method)
     class MockLLMService:
         def _parse_llm_response(self, response_content: str, fallback_data):
@@ -188,5 +190,39 @@ EXPLANATION: Added a new field called "nationality" to each object in the array.
     print("\n" + "=" * 50)
     print("Test completed!")
 
+def test_delta_output_size():
+    """Compare output size of full-row and delta-only responses for the same transformation."""
+    import json
+    import re
+    from app.delta import merge_delta_rows, ROW_ID_FIELD
+    
+    full_rows = json.loads(re.search(r'TRANSFORMED_DATA:\s*(\[.*?\n\])', RESPONSE_CONTENT, re.DOTALL).group(1))
+    added_fields = ("nationality", "reasoning")
+    original_rows = [{k: v for k, v in row.items() if k not in added_fields} for row in full_rows]
+    delta_rows = [
+        {ROW_ID_FIELD: i, **{k: row[k] for k in added_fields}}
+        for i, row in enumerate(full_rows)
+    ]
+    
+    full_output = json.dumps({"TRANSFORMED_DATA": full_rows})
+    delta_output = json.dumps({"TRANSFORMED_DATA": delta_rows})
+    
+    print("Testing delta-only output...")
+    print("=" * 50)
+    print(f"Full output:  {len(full_output)} characters")
+    print(f"Delta output: {len(delta_output)} characters ({len(delta_output) / len(full_output):.0%} of full)")
+    
+    merged, missing, extra = merge_delta_rows(original_rows, delta_rows)
+    assert merged == full_rows
+    assert missing == [] and extra == []
+    
+    # The merge detects rows the model dropped and rows it invented
+    _, missing, extra = merge_delta_rows(original_rows, delta_rows[1:] + [{ROW_ID_FIELD: 7, "nationality": "?"}])
+    assert missing == [0] and extra == [7]
+    
+    print("Delta merge reproduces the full output!")
+
+
 if __name__ == "__main__":
     test_parsing()
+    test_delta_output_size()
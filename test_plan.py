@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Test script for sandboxed table programs."""
+
+import sys
+import os
+import json
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.plan import PlanError, TablePlan, describe_schema
+
+
+def example_rows():
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "example_request.json")) as f:
+        return json.load(f)["request_data"]["table_data"]
+
+
+def test_filter_nested_rows():
+    """The example request's filter runs over nested ``data`` rows."""
+    rows = example_rows()
+    plan = TablePlan({"filter": {"op": ">", "args": [{"field": "data.price"}, 100]}})
+    result = plan.execute(rows)
+    assert [row["data"]["name"] for row in result] == ["Laptop", "Monitor"]
+
+
+def test_assign_sort_and_limit_leave_input_unchanged():
+    rows = example_rows()
+    plan = TablePlan({
+        "assign": {"data.label": {"op": "concat", "args": [{"op": "upper", "args": [{"field": "data.name"}]}, "!"]}},
+        "sort": {"by": {"field": "data.price"}, "descending": True},
+        "limit": 2
+    })
+    result = plan.execute(rows)
+    assert [row["data"]["label"] for row in result] == ["LAPTOP!", "MONITOR!"]
+    assert "label" not in rows[0]["data"]
+
+
+def test_values_are_coerced_and_failures_yield_null():
+    rows = [{"price": "150"}, {"price": "n/a"}, {"price": None}, {"price": 99}]
+    plan = TablePlan({
+        "filter": {"op": ">=", "args": [{"field": "price"}, 99]},
+        "assign": {"half": {"op": "/", "args": [{"field": "price"}, 2]}}
+    })
+    assert plan.execute(rows) == [{"price": "150", "half": 75.0}, {"price": 99, "half": 49.5}]
+    # Text cannot be multiplied into huge strings
+    plan = TablePlan({"assign": {"big": {"op": "*", "args": [{"field": "price"}, 1000000000]}}})
+    assert plan.execute([{"price": "x"}]) == [{"price": "x", "big": None}]
+
+
+def test_chained_assigns_cannot_grow_values_without_bound():
+    """Assigns reading earlier assigns double a value per step; results past the caps become null."""
+    concat = {"f0": "ab"}
+    product = {"g0": 1000}
+    for step in range(1, 28):
+        concat[f"f{step}"] = {"op": "concat", "args": [{"field": f"f{step - 1}"}, {"field": f"f{step - 1}"}]}
+        product[f"g{step}"] = {"op": "*", "args": [{"field": f"g{step - 1}"}, {"field": f"g{step - 1}"}]}
+
+    row = TablePlan({"assign": {**concat, **product}}).execute([{}])[0]
+    assert len(row["f12"]) == 2 ** 13
+    assert row["f13"] is None and row["f27"] == ""
+    assert row["g1"] == 1000000
+    assert row["g27"] is None
+    assert all(len(str(value)) <= 10000 for value in row.values())
+
+
+def test_invalid_programs_are_rejected():
+    invalid = [
+        {"filter": {"op": "__import__", "args": ["os"]}},
+        {"filter": {"op": ">", "args": [1]}},
+        {"assign": {"a..b": 1}},
+        {"limit": -1},
+        {"delete": True},
+        {"filter": {"field": "a", "op": "=="}},
+        "filter everything",
+    ]
+    nested = 1
+    for _ in range(100):
+        nested = {"op": "not", "args": [nested]}
+    invalid.append({"filter": nested})
+    for program in invalid:
+        try:
+            TablePlan(program)
+        except PlanError:
+            continue
+        raise AssertionError(f"Accepted invalid program {program!r}")
+
+
+def test_describe_schema():
+    schema = describe_schema(example_rows())
+    assert schema == {
+        "data.name": "string",
+        "data.price": "number",
+        "data.category": "string",
+        "data.in_stock": "boolean"
+    }
+
+
+if __name__ == "__main__":
+    test_filter_nested_rows()
+    test_assign_sort_and_limit_leave_input_unchanged()
+    test_values_are_coerced_and_failures_yield_null()
+    test_chained_assigns_cannot_grow_values_without_bound()
+    test_invalid_programs_are_rejected()
+    test_describe_schema()
+    print("All plan tests passed!")
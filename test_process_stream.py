@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""Test script for the NDJSON streaming variant of /api/v1/process, driven end to end."""
+
+import sys
+import os
+import asyncio
+import json
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+from config import settings
+from app.main import app
+from app.metrics import REQUESTS_IN_FLIGHT
+
+NDJSON = "application/x-ndjson"
+PEOPLE = [
+    {"name": "kabir", "city": "Pune"},
+    {"name": "ivan", "city": "Kazan"},
+    {"name": "ana", "city": "Porto"},
+    {"name": "kabir", "city": "Pune"},
+    {"name": "ivan", "city": "Kazan"},
+]
+
+
+def configure(**overrides):
+    """Point the app at an instant fake backend; returns the previous values to restore."""
+    values = {
+        "LLM_BACKEND": "fake",
+        "FAKE_LLM_LATENCY_MS": 0,
+        "RESPONSE_CACHE_ENABLED": False,
+        "PLAN_EXECUTION_ENABLED": False,
+        "VALUE_DEDUP_ENABLED": False,
+        "ROW_DEDUP_ENABLED": False,
+        "LLM_CHUNK_SIZE": 2,
+        **overrides
+    }
+    previous = {name: getattr(settings, name) for name in values}
+    for name, value in values.items():
+        setattr(settings, name, value)
+    return previous
+
+
+async def post_stream(body, api_key="stream-test"):
+    """Run startup, POST ``body`` asking for NDJSON and return the parsed records."""
+    await app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://stream-test") as client:
+            response = await client.post(
+                "/api/v1/process",
+                json=body,
+                headers={"Accept": NDJSON, "X-API-Key": api_key}
+            )
+        assert response.status_code == 200, response.text
+        assert response.headers["content-type"].startswith(NDJSON)
+        records = [json.loads(line) for line in response.text.splitlines() if line]
+        return records, app.state.admission.stats()
+    finally:
+        await app.router.shutdown()
+
+
+def rows_by_offset(records):
+    placed = {}
+    for record in records:
+        if record["type"] != "rows":
+            continue
+        for position, row in enumerate(record["rows"]):
+            offset = record["offset"] + position
+            assert offset not in placed, f"offset {offset} sent twice"
+            placed[offset] = row
+    return placed
+
+
+def test_stream_framing_and_offsets():
+    """Every input row arrives once at its own offset, and one explanation record closes the stream."""
+    previous = configure()
+    try:
+        records, admission = asyncio.run(post_stream({
+            "user_prompt": "Label each person with a category",
+            "request_data": {"table_data": PEOPLE}
+        }))
+    finally:
+        configure(**previous)
+
+    assert [record["type"] for record in records].count("explanation") == 1
+    assert records[-1]["type"] == "explanation"
+    assert records[-1]["row_count"] == len(PEOPLE)
+    assert records[-1]["deduplicated_rows"] == 0
+
+    placed = rows_by_offset(records)
+    assert sorted(placed) == list(range(len(PEOPLE)))
+    for offset, row in placed.items():
+        assert row["name"] == PEOPLE[offset]["name"] and row["city"] == PEOPLE[offset]["city"]
+        assert "fake_label" in row
+    assert admission["in_flight"] == 0
+    assert REQUESTS_IN_FLIGHT.value() == 0
+
+
+def test_streamed_duplicates_are_fanned_back_out():
+    """With row deduplication each group is sent once and its result copied to every duplicate."""
+    previous = configure(ROW_DEDUP_ENABLED=True, ROW_DEDUP_IGNORE_FIELDS="")
+    try:
+        records, admission = asyncio.run(post_stream({
+            "user_prompt": "Label each person with a category",
+            "request_data": {"table_data": PEOPLE}
+        }))
+    finally:
+        configure(**previous)
+
+    assert records[-1]["deduplicated_rows"] == 2
+    placed = rows_by_offset(records)
+    assert sorted(placed) == list(range(len(PEOPLE)))
+    assert placed[3] == placed[0]
+    assert placed[4] == placed[1]
+    assert admission["in_flight"] == 0
+
+
+def test_disconnect_before_the_body_releases_admission():
+    """A client gone before the first record still gives back its admission slot, exactly once."""
+    previous = configure()
+    body = json.dumps({
+        "user_prompt": "Label each person with a category",
+        "request_data": {"table_data": PEOPLE}
+    }).encode()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/api/v1/process",
+        "raw_path": b"/api/v1/process",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", b"stream-test"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"accept", NDJSON.encode()),
+            (b"x-api-key", b"stream-test"),
+        ],
+        "client": ("127.0.0.1", 1234),
+        "server": ("stream-test", 80),
+    }
+    messages = []
+
+    async def run():
+        received = False
+
+        async def receive():
+            nonlocal received
+            if not received:
+                received = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            messages.append(message["type"])
+
+        await app.router.startup()
+        try:
+            await app(scope, receive, send)
+            return app.state.admission.stats()
+        finally:
+            await app.router.shutdown()
+
+    try:
+        admission = asyncio.run(run())
+    finally:
+        configure(**previous)
+
+    assert messages[0] == "http.response.start"
+    assert admission["in_flight"] == 0
+    assert REQUESTS_IN_FLIGHT.value() == 0
+
+
+if __name__ == "__main__":
+    test_stream_framing_and_offsets()
+    test_streamed_duplicates_are_fanned_back_out()
+    test_disconnect_before_the_body_releases_admission()
+    print("All streaming route tests passed!")
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Test script for per-key token quotas."""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.quotas import TokenQuotaTracker, QuotaExceeded
+
+
+def test_reserve_and_reject():
+    """Requests are admitted until the input budget is spent, then rejected with a retry hint."""
+    tracker = TokenQuotaTracker(input_limit=1000, output_limit=0, window_seconds=60)
+    tracker.reserve("k", 600, 100, now=0)
+    tracker.reserve("other", 900, 100, now=0)
+    try:
+        tracker.reserve("k", 600, 100, now=10)
+        assert False, "expected QuotaExceeded"
+    except QuotaExceeded as e:
+        assert e.retry_after == 50
+    tracker.reserve("k", 600, 100, now=61)
+
+
+def test_settle_replaces_estimate():
+    """Settling swaps the estimate for the actual usage, freeing unused budget."""
+    tracker = TokenQuotaTracker(input_limit=0, output_limit=500, window_seconds=3600)
+    reservation = tracker.reserve("k", 100, 400)
+    tracker.settle(reservation, 120, 50)
+    usage = tracker.usage("k")
+    assert usage["input_tokens"] == 120 and usage["output_tokens"] == 50
+    tracker.reserve("k", 100, 400)
+
+    # Settling twice has no further effect
+    tracker.settle(reservation, 0, 0)
+    assert tracker.usage("k")["output_tokens"] == 450
+
+
+def test_settle_after_eviction_is_dropped():
+    """A key evicted from the LRU while its request ran does not get the settlement delta on a fresh entry."""
+    tracker = TokenQuotaTracker(input_limit=1000, output_limit=1000, window_seconds=3600, max_keys=1)
+    reservation = tracker.reserve("k", 100, 400)
+    tracker.reserve("other", 10, 10)
+    tracker.reserve("k", 50, 50)
+
+    tracker.settle(reservation, 120, 50)
+    usage = tracker.usage("k")
+    assert usage["input_tokens"] == 50 and usage["output_tokens"] == 50
+
+
+if __name__ == "__main__":
+    test_reserve_and_reject()
+    test_settle_replaces_estimate()
+    test_settle_after_eviction_is_dropped()
+    print("All token quota tests passed!")
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Test script for the bounded-memory rate limiters."""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.metrics import RATE_LIMIT_FAIL_OPEN_TOTAL
+from app.rate_limit import RateLimiter, TokenBucketLimiter, SlidingLogLimiter, SQLiteRateLimitBackend
+
+
+def test_token_bucket():
+    """A full bucket allows a burst of ``limit`` and then refills evenly."""
+    limiter = TokenBucketLimiter(limit=3, window_seconds=60)
+    assert [limiter.allow("k", now=0) for _ in range(4)] == [True, True, True, False]
+    assert limiter.allow("k", now=10) is False
+    assert limiter.allow("k", now=20) is True
+    assert limiter.allow("other", now=20) is True
+
+
+def test_sliding_log():
+    """Exactly ``limit`` requests are accepted in any window."""
+    limiter = SlidingLogLimiter(limit=2, window_seconds=60)
+    assert limiter.allow("k", now=0) and limiter.allow("k", now=30)
+    assert limiter.allow("k", now=59) is False
+    assert limiter.allow("k", now=61) is True
+    assert limiter.allow("k", now=80) is False
+
+
+def test_key_cap_and_idle_eviction():
+    """Tracked keys never exceed the cap and idle keys are dropped."""
+    limiter = SlidingLogLimiter(limit=5, window_seconds=60, max_keys=100, idle_seconds=120)
+    for i in range(1000):
+        limiter.allow(f"key-{i}", now=0)
+    assert len(limiter) == 100
+    assert limiter.evictions == 900
+
+    limiter.allow("fresh", now=500)
+    assert len(limiter) == 1
+
+
+def test_limiter_without_a_policy_cannot_be_built():
+    """A subclass missing ``_check`` fails when constructed, not on its first request."""
+    class Incomplete(RateLimiter):
+        def _new_state(self, now):
+            return []
+
+    try:
+        Incomplete(limit=1)
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("an incomplete limiter was instantiated")
+
+
+def test_sqlite_backend_shared_between_instances():
+    """Two backends on the same file (as in two workers) share one bucket."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rate-limits.db")
+        worker_a = SQLiteRateLimitBackend(path, limit=3)
+        worker_b = SQLiteRateLimitBackend(path, limit=3)
+
+        results = [worker_a.allow("k", now=0), worker_b.allow("k", now=0), worker_a.allow("k", now=0)]
+        assert results == [True, True, True]
+        assert worker_b.allow("k", now=0) is False
+        assert worker_b.allow("k", now=20) is True
+        worker_a.close()
+        worker_b.close()
+
+
+def test_sqlite_backend_retries_a_briefly_held_lock():
+    """A lock released after the busy timeout but within the retries does not fail open."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rate-limits.db")
+        backend = SQLiteRateLimitBackend(path, limit=1, busy_timeout=0.05, lock_retries=5, retry_delay=0.02)
+        assert backend.allow("k", now=0) is True
+        fail_open = RATE_LIMIT_FAIL_OPEN_TOTAL.value()
+
+        holder = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        holder.execute("BEGIN EXCLUSIVE")
+        release = threading.Timer(0.08, lambda: holder.execute("ROLLBACK"))
+        release.start()
+        try:
+            assert backend.allow("k", now=0) is False
+        finally:
+            release.join()
+            holder.close()
+        assert RATE_LIMIT_FAIL_OPEN_TOTAL.value() == fail_open
+        backend.close()
+
+
+def test_sqlite_backend_fails_open_when_locked():
+    """A check gives up after its retries, allows the request and counts it."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rate-limits.db")
+        backend = SQLiteRateLimitBackend(path, limit=1, busy_timeout=0.05, lock_retries=1)
+        assert backend.allow("k", now=0) is True
+        fail_open = RATE_LIMIT_FAIL_OPEN_TOTAL.value()
+
+        holder = sqlite3.connect(path, isolation_level=None)
+        holder.execute("BEGIN EXCLUSIVE")
+        start = time.monotonic()
+        assert backend.allow("k", now=0) is True
+        assert time.monotonic() - start < 1.0
+        assert RATE_LIMIT_FAIL_OPEN_TOTAL.value() == fail_open + 1
+        holder.execute("ROLLBACK")
+        holder.close()
+
+        assert backend.allow("k", now=0) is False
+        backend.close()
+
+
+if __name__ == "__main__":
+    test_token_bucket()
+    test_sliding_log()
+    test_key_cap_and_idle_eviction()
+    test_limiter_without_a_policy_cannot_be_built()
+    test_sqlite_backend_shared_between_instances()
+    test_sqlite_backend_retries_a_briefly_held_lock()
+    test_sqlite_backend_fails_open_when_locked()
+    print("All rate limit tests passed!")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Test script for the fair scheduler of LLM calls."""
+
+import sys
+import os
+import asyncio
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.scheduler import FairScheduler, parse_key_weights
+
+
+async def run_calls(scheduler, calls, order):
+    """Run (key, cost) calls through the scheduler, recording the order they start in."""
+    async def call(key, cost):
+        async with scheduler.slot(key, cost):
+            order.append(key)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*[call(key, cost) for key, cost in calls])
+
+
+def test_small_request_not_starved():
+    """An interactive call is served on its key's next turn, not after a batch backlog."""
+    scheduler = FairScheduler(max_concurrent=1, per_key_limit=1, quantum=1000)
+    order = []
+    calls = [("batch", 1000)] * 10 + [("interactive", 200)]
+    asyncio.run(run_calls(scheduler, calls, order))
+    assert order.index("interactive") <= 2
+    assert scheduler.stats()["running"] == 0
+
+
+def test_weighted_shares():
+    """A key with twice the weight gets about twice the calls while both are backlogged."""
+    scheduler = FairScheduler(max_concurrent=1, per_key_limit=1, quantum=1000, weights={"gold": 2.0})
+    order = []
+    calls = [("gold", 1000)] * 12 + [("basic", 1000)] * 12
+    asyncio.run(run_calls(scheduler, calls, order))
+    # Allow for the first gold call starting before any basic call is queued
+    assert 8 <= order[:12].count("gold") <= 9
+
+
+def test_per_key_cap():
+    """No key holds more than its share of slots even when slots are free."""
+    scheduler = FairScheduler(max_concurrent=8, per_key_limit=2)
+    peak = 0
+
+    async def run():
+        nonlocal peak
+
+        async def call():
+            nonlocal peak
+            async with scheduler.slot("batch", 100):
+                peak = max(peak, scheduler.stats()["running"])
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*[call() for _ in range(6)])
+
+    asyncio.run(run())
+    assert peak == 2
+
+
+def test_cancelled_waiter_does_not_leak_slot():
+    """A queued call cancelled before its task resumes is skipped, not granted."""
+    async def run():
+        scheduler = FairScheduler(max_concurrent=1, per_key_limit=1)
+        await scheduler.acquire("a", 10)
+        waiter = asyncio.ensure_future(scheduler.acquire("b", 10))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        # Release before the cancelled task gets to run its cleanup
+        scheduler.release("a")
+        assert scheduler.stats()["running"] == 0
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            pass
+        assert scheduler.stats()["running"] == 0
+
+        await asyncio.wait_for(scheduler.acquire("c", 10), timeout=1)
+        scheduler.release("c")
+        assert scheduler.stats() == {**scheduler.stats(), "running": 0, "queued": 0, "active_keys": 0}
+
+    asyncio.run(run())
+
+
+def test_parse_key_weights():
+    assert parse_key_weights("a:2, b:0.5,") == {"a": 2.0, "b": 0.5}
+    assert parse_key_weights("") == {}
+
+
+if __name__ == "__main__":
+    test_small_request_not_starved()
+    test_weighted_shares()
+    test_per_key_cap()
+    test_cancelled_waiter_does_not_leak_slot()
+    test_parse_key_weights()
+    print("All scheduler tests passed!")
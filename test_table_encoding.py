@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Test script for the compact table encodings."""
+
+import sys
+import os
+import json
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.table_encoding import TableEncoder, decode_table
+
+ROWS = [
+    {"name": "kabir", "industry": "Automotive", "confidence": 80},
+    {"name": "ivan", "industry": "Automotive", "confidence": 83},
+    {"name": "herbert", "industry": "Hospitality", "confidence": 86},
+    {"name": "francis", "industry": "Automotive", "confidence": 90, "extra": {"a": 1}},
+]
+
+
+def test_json_round_trip():
+    """The JSON encoding dictionary-encodes repeated strings and decodes back."""
+    description, encoded = TableEncoder("json").encode(ROWS)
+    payload = json.loads(encoded)
+
+    assert payload["columns"] == ["name", "industry", "confidence", "extra"]
+    assert payload["dictionaries"] == {"industry": ["Automotive", "Hospitality"]}
+    assert payload["rows"][2] == ["herbert", 1, 86, None]
+    assert "dictionaries" in description
+
+    decoded = decode_table(encoded, "json")
+    assert decoded[3] == ROWS[3]
+    assert decoded[0] == {**ROWS[0], "extra": None}
+
+
+def test_tsv_encoding():
+    """The TSV encoding emits dictionary lines, a header and one line per row."""
+    _, encoded = TableEncoder("tsv").encode(ROWS)
+    lines = encoded.split("\n")
+
+    assert lines[0] == "#industry\t0=Automotive\t1=Hospitality"
+    assert lines[1] == "name\tindustry\tconfidence\textra"
+    assert lines[2] == "kabir\t0\t80\t"
+    assert lines[5] == 'francis\t0\t90\t{"a":1}'
+
+
+def test_repr_encoding_is_unchanged():
+    """The legacy mode still sends Python repr."""
+    assert TableEncoder("repr").encode(ROWS)[1] == str(ROWS)
+
+
+if __name__ == "__main__":
+    test_json_round_trip()
+    test_tsv_encoding()
+    test_repr_encoding_is_unchanged()
+    print("All table encoding tests passed!")
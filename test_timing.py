@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Test script for per-request stage timing."""
+
+import sys
+import os
+import asyncio
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.timing import current_timing, observe_stage, stage, start_request_timing
+
+
+def test_server_timing_header():
+    """Stages are summed, renamed and followed by the cache status and total."""
+    async def run():
+        timing = start_request_timing()
+        with stage("auth"):
+            pass
+        observe_stage("llm_call", 0.25)
+        observe_stage("llm_call", 0.5)
+        timing.cache = "MISS"
+        return timing.header()
+
+    header = asyncio.run(run())
+    entries = header.split(", ")
+    assert entries[0].startswith("auth;dur=")
+    assert entries[1] == "llm;dur=750.0"
+    assert entries[2] == 'cache;desc="MISS"'
+    assert entries[3].startswith("total;dur=")
+
+
+def test_child_tasks_share_the_request_timing():
+    """Work fanned out into tasks records into the timing of the request that spawned it."""
+    async def chunk():
+        observe_stage("parse", 0.001)
+
+    async def run():
+        timing = start_request_timing()
+        await asyncio.gather(*[asyncio.ensure_future(chunk()) for _ in range(3)])
+        return timing
+
+    timing = asyncio.run(run())
+    assert abs(timing.stages["parse"] - 0.003) < 1e-9
+
+
+def test_untimed_requests_record_nothing():
+    async def run():
+        observe_stage("parse", 0.001)
+        return current_timing()
+
+    assert asyncio.run(run()) is None
+
+
+if __name__ == "__main__":
+    test_server_timing_header()
+    test_child_tasks_share_the_request_timing()
+    test_untimed_requests_record_nothing()
+    print("All timing tests passed!")
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Test script for the persistent per-value result store."""
+
+import sys
+import os
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.value_store import ValueResultStore
+
+
+def test_round_trip_across_instances():
+    """Results survive reopening the store; intents are kept apart."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "values.sqlite3")
+        intent = ValueResultStore.intent_key("Nationality of each  NAME", "name", "3")
+        assert intent == ValueResultStore.intent_key("nationality of each name", "name", "3")
+
+        store = ValueResultStore(path)
+        store.set_many(intent, {'"ivan"': {"nationality": "Russian"}})
+        store.close()
+
+        store = ValueResultStore(path)
+        assert store.get_many(intent, ['"ivan"', '"kabir"']) == {'"ivan"': {"nationality": "Russian"}}
+        other = ValueResultStore.intent_key("seniority of each title", "name", "3")
+        assert store.get_many(other, ['"ivan"']) == {}
+        stats = store.stats()
+        assert (stats["entries"], stats["hits"], stats["misses"]) == (1, 1, 2)
+        store.close()
+
+
+def test_eviction_and_expiry():
+    """Least recently used entries are evicted; expired entries count as misses."""
+    with tempfile.TemporaryDirectory() as directory:
+        store = ValueResultStore(os.path.join(directory, "values.sqlite3"), max_entries=2)
+        store.set_many("intent", {"a": {"x": 1}})
+        time.sleep(0.01)
+        store.set_many("intent", {"b": {"x": 2}})
+        time.sleep(0.01)
+        store.get_many("intent", ["a"])
+        time.sleep(0.01)
+        store.set_many("intent", {"c": {"x": 3}})
+        assert set(store.get_many("intent", ["a", "b", "c"])) == {"a", "c"}
+        assert store.stats()["evictions"] == 1
+
+        store.ttl_seconds = 0.01
+        time.sleep(0.02)
+        assert store.get_many("intent", ["a", "c"]) == {}
+        assert store.stats()["entries"] == 0
+        store.close()
+
+
+if __name__ == "__main__":
+    test_round_trip_across_instances()
+    test_eviction_and_expiry()
+    print("All value store tests passed!")